@@ -0,0 +1,795 @@
+#!/usr/bin/env python3
+"""
+Lead Generation REST API Server
+This script serves the lead database to the lead-generation-frontend over HTTP
+"""
+
+import os
+import sys
+import json
+import gzip
+import base64
+import queue
+import sqlite3
+import asyncio
+import hashlib
+import argparse
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+
+from aiohttp import web
+
+# Add the database and automation modules to the path
+sys.path.append('/home/ubuntu/lead_generation/database')
+sys.path.append('/home/ubuntu/lead_generation/automation')
+
+from lead_database import LeadDatabase, fts_query, activity_rollups_query
+from lead_importer import LeadImporter, READ_SIZE
+from job_runner import JobRunner, JobCancelled, COMPONENTS, FINISHED_STATUSES, TIME_FORMAT
+
+# Paths whose responses change independently of the lead database
+UNCACHED_PATHS = ('/api/automation', '/api/scraping')
+
+# Sortable columns; each sort is paired with c.id so cursors are unique
+SORT_COLUMNS = {
+    'id': 'c.id',
+    'company_name': 'c.company_name',
+    'created_at': 'c.created_at',
+    'industry': "COALESCE(c.industry, '')",
+    'score': 'COALESCE(ls.score, 0)'
+}
+
+LEAD_COLUMNS = '''
+c.id, c.company_name, c.website, c.industry, c.company_size, c.current_chatbot,
+c.city, c.state, c.country, c.source, c.scraped_date, c.created_at, c.updated_at,
+ls.status, ls.score, ls.next_action, ls.next_action_date
+'''
+
+MAX_PAGE_SIZE = 500
+
+# Trend charts cover this many days unless a start date is given, and return at most MAX_TREND_ROWS counters
+TREND_DAYS = {'day': 90, 'week': 364}
+MAX_TREND_ROWS = 5000
+
+class ReadPool:
+    """Fixed pool of read-only SQLite connections used from worker threads"""
+
+    def __init__(self, db_path, size=8):
+        self.db_path = db_path
+        self.connections = queue.Queue()
+        self.executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix='api-read')
+
+        for _ in range(size):
+            conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA query_only = 1')
+            self.connections.put(conn)
+
+    def _call(self, func, args):
+        conn = self.connections.get()
+        try:
+            return func(conn, *args)
+        finally:
+            self.connections.put(conn)
+
+    async def run(self, func, *args):
+        """Run func(conn, *args) on a pooled connection without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self._call, func, args)
+
+    def close(self):
+        """Close every pooled connection"""
+        self.executor.shutdown(wait=True)
+        while not self.connections.empty():
+            self.connections.get().close()
+
+def encode_cursor(values):
+    """Encode the sort key of the last row as an opaque cursor"""
+    return base64.urlsafe_b64encode(json.dumps(values).encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    """Decode a cursor produced by encode_cursor"""
+    padded = cursor + '=' * (-len(cursor) % 4)
+    return json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+
+def filter_keys(params):
+    """Return the names of the list filters set in params"""
+    return [key for key in ('status', 'industry', 'company_size', 'search') if params.get(key)]
+
+def common_status(conn, status, share=0.01):
+    """Return True if at least share of all leads have a status"""
+    matching, total = conn.execute('''
+    SELECT (SELECT count FROM lead_totals WHERE dimension = 'status' AND value = ?),
+           (SELECT count FROM lead_totals WHERE dimension = 'all')
+    ''', (status,)).fetchone()
+    return bool(matching and total) and matching >= total * share
+
+def lead_filters(params, status_index=True):
+    """Build the WHERE clause and parameters for the lead list filters
+
+    With status_index false, the status filter is written so that SQLite
+    cannot use the status index for it.
+    """
+    clauses = []
+    values = []
+
+    if params.get('status'):
+        clauses.append('ls.status = ?' if status_index else '+ls.status = ?')
+        values.append(params['status'])
+
+    if params.get('industry'):
+        clauses.append('(c.industry = ? OR c.industry_bucket = ?)')
+        values.extend([params['industry'], params['industry']])
+
+    if params.get('company_size'):
+        clauses.append('c.company_size = ?')
+        values.append(params['company_size'])
+
+    search = fts_query(params.get('search'))
+    if search:
+        clauses.append('c.id IN (SELECT rowid FROM leads_fts WHERE leads_fts MATCH ?)')
+        values.append(search)
+
+    return clauses, values
+
+def query_leads(conn, params, count_cache):
+    """Return one page of leads using keyset pagination"""
+    limit = max(1, min(int(params.get('limit') or 25), MAX_PAGE_SIZE))
+    page = max(1, int(params.get('page') or 1))
+    sort = params.get('sort') if params.get('sort') in SORT_COLUMNS else 'id'
+    descending = params.get('order') == 'desc'
+    sort_column = SORT_COLUMNS[sort]
+
+    clauses, values = lead_filters(params)
+    count_key = (tuple(clauses), tuple(values))
+
+    # The total is only needed for page numbers, so it is cached per filter and data version
+    total = count_cache.get(count_key)
+    if total is None and set(filter_keys(params)) <= {'status'}:
+        # Unfiltered and status-only totals are kept up to date in lead_totals
+        dimension, value = ('status', params['status']) if params.get('status') else ('all', '')
+        row = conn.execute('SELECT count FROM lead_totals WHERE dimension = ? AND value = ?', (dimension, value)).fetchone()
+        total = row[0] if row else 0
+        count_cache[count_key] = total
+    if total is None:
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        # Only a status filter needs lead_status, and then the join can be an inner one
+        join = 'JOIN lead_status ls ON c.id = ls.company_id' if params.get('status') else ''
+        total = conn.execute(f'''
+        SELECT COUNT(*) FROM companies c
+        {join}
+        {where}
+        ''', values).fetchone()[0]
+        count_cache[count_key] = total
+
+    # A common status matches often enough that walking the sort index beats
+    # collecting every match from the status index and sorting them
+    status_index = not (params.get('status') and common_status(conn, params['status']))
+    page_clauses, page_values = lead_filters(params, status_index)
+    offset = 0
+
+    if params.get('cursor'):
+        sort_value, last_id = decode_cursor(params['cursor'])
+        page_clauses.append(f"({sort_column}, c.id) {'<' if descending else '>'} (?, ?)")
+        page_values.extend([sort_value, last_id])
+    elif page > 1:
+        # Clients that jump straight to a page number fall back to OFFSET
+        offset = (page - 1) * limit
+
+    where = f"WHERE {' AND '.join(page_clauses)}" if page_clauses else ''
+    direction = 'DESC' if descending else 'ASC'
+
+    rows = conn.execute(f'''
+    SELECT {LEAD_COLUMNS}, {sort_column} AS sort_value
+    FROM companies c
+    LEFT JOIN lead_status ls ON c.id = ls.company_id
+    {where}
+    ORDER BY {sort_column} {direction}, c.id {direction}
+    LIMIT ? OFFSET ?
+    ''', page_values + [limit + 1, offset]).fetchall()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    leads = []
+    for row in rows:
+        lead = dict(row)
+        lead.pop('sort_value')
+        leads.append(lead)
+
+    next_cursor = encode_cursor([rows[-1]['sort_value'], rows[-1]['id']]) if has_more else None
+
+    return {
+        'data': leads,
+        'pagination': {
+            'page': page,
+            'limit': limit,
+            'total': total,
+            'totalPages': (total + limit - 1) // limit,
+            'has_more': has_more,
+            'next_cursor': next_cursor
+        }
+    }
+
+def search_leads(conn, params):
+    """Return the leads best matching a free-text query, ranked by relevance"""
+    query = fts_query(params.get('q'))
+    limit = max(1, min(int(params.get('limit') or 20), MAX_PAGE_SIZE))
+    if not query:
+        return {'data': []}
+
+    rows = conn.execute(f'''
+    SELECT {LEAD_COLUMNS}, bm25(leads_fts, 10.0, 1.0, 4.0, 2.0, 5.0) AS rank
+    FROM leads_fts
+    JOIN companies c ON c.id = leads_fts.rowid
+    LEFT JOIN lead_status ls ON c.id = ls.company_id
+    WHERE leads_fts MATCH ?
+    ORDER BY rank
+    LIMIT ?
+    ''', (query, limit)).fetchall()
+
+    return {'data': [dict(row) for row in rows]}
+
+def query_lead(conn, lead_id):
+    """Return one lead with its contacts, interactions and tags"""
+    row = conn.execute(f'''
+    SELECT {LEAD_COLUMNS}, c.description, c.address, c.zipcode, ls.assigned_to
+    FROM companies c
+    LEFT JOIN lead_status ls ON c.id = ls.company_id
+    WHERE c.id = ?
+    ''', (lead_id,)).fetchone()
+
+    if row is None:
+        return None
+
+    lead = dict(row)
+    lead['contacts'] = [dict(r) for r in conn.execute('SELECT * FROM contacts WHERE company_id = ?', (lead_id,))]
+    lead['interactions'] = [dict(r) for r in conn.execute(
+        'SELECT * FROM interactions WHERE company_id = ? ORDER BY interaction_date DESC LIMIT 100', (lead_id,)
+    )]
+    lead['tags'] = [r[0] for r in conn.execute('''
+    SELECT t.name FROM tags t
+    JOIN company_tags ct ON t.id = ct.tag_id
+    WHERE ct.company_id = ?
+    ''', (lead_id,))]
+    return lead
+
+def lead_totals(conn, dimension, limit=50):
+    """Return the precomputed lead counts for one dimension, largest first"""
+    return [
+        {'value': row['value'], 'count': row['count']}
+        for row in conn.execute('''
+        SELECT NULLIF(value, '') AS value, count FROM lead_totals
+        WHERE dimension = ? AND count > 0
+        ORDER BY count DESC
+        LIMIT ?
+        ''', (dimension, limit))
+    ]
+
+def query_lead_stats(conn):
+    """Return lead totals grouped by status, industry and source"""
+    total = conn.execute("SELECT count FROM lead_totals WHERE dimension = 'all'").fetchone()
+
+    return {
+        'total_leads': total[0] if total else 0,
+        'leads_by_status': [{'status': row['value'], 'count': row['count']} for row in lead_totals(conn, 'status')],
+        'leads_by_industry': [{'industry': row['value'], 'count': row['count']} for row in lead_totals(conn, 'industry')],
+        'leads_by_source': [{'source': row['value'], 'count': row['count']} for row in lead_totals(conn, 'source')],
+        'recent_activity': [dict(r) for r in conn.execute('''
+        SELECT * FROM interactions ORDER BY interaction_date DESC LIMIT 20
+        ''')]
+    }
+
+def query_campaign_stats(conn):
+    """Return email and LinkedIn campaign totals and rates"""
+    def rate(part, whole):
+        return round(part / whole, 4) if whole else 0
+
+    # Daily rollups summed over all time and campaigns
+    events = {row['metric']: row['count'] for row in conn.execute('''
+    SELECT metric, SUM(count) AS count FROM activity_rollups
+    WHERE period = 'day' AND dimension IN ('email_campaign', 'linkedin_campaign')
+    GROUP BY metric
+    ''')}
+
+    emails_sent = events.get('email_sent', 0)
+    connections = events.get('connection_sent', 0)
+    messages = events.get('message_sent', 0)
+
+    return {
+        'email_campaigns': {
+            'total': conn.execute('SELECT COUNT(*) FROM email_campaigns').fetchone()[0],
+            'active': conn.execute("SELECT COUNT(*) FROM email_campaigns WHERE status = 'Active'").fetchone()[0],
+            'emails_sent': emails_sent,
+            'open_rate': rate(events.get('email_opened', 0), emails_sent),
+            'click_rate': rate(events.get('email_clicked', 0), emails_sent),
+            'reply_rate': rate(events.get('email_replied', 0), emails_sent)
+        },
+        'linkedin_campaigns': {
+            'total': conn.execute('SELECT COUNT(*) FROM linkedin_campaigns').fetchone()[0],
+            'active': conn.execute("SELECT COUNT(*) FROM linkedin_campaigns WHERE status = 'Active'").fetchone()[0],
+            'connections_sent': connections,
+            'acceptance_rate': rate(events.get('connection_accepted', 0), connections),
+            'messages_sent': messages,
+            'reply_rate': rate(events.get('linkedin_replied', 0), messages)
+        }
+    }
+
+def query_funnel(conn):
+    """Return lead counts for each stage of the outreach funnel"""
+    stages = ['New', 'Contacted', 'Connection Requested', 'Message Sent', 'Responded', 'Qualified', 'Converted']
+    counts = {row['value']: row['count'] for row in lead_totals(conn, 'status', limit=-1)}
+    return [{'stage': stage, 'count': counts.pop(stage, 0)} for stage in stages] + \
+        [{'stage': status, 'count': count} for status, count in counts.items()]
+
+def query_trends(conn, params):
+    """Return daily or weekly activity counters for the trend charts"""
+    period = params.get('period') if params.get('period') in ('day', 'week') else 'day'
+    start = params.get('start') or (datetime.now() - timedelta(days=TREND_DAYS[period])).strftime('%Y-%m-%d')
+    limit = max(1, min(int(params.get('limit') or MAX_TREND_ROWS), MAX_TREND_ROWS))
+
+    rows = conn.execute(*activity_rollups_query(
+        period, params.get('metric'), params.get('dimension'), start, params.get('end'), limit + 1
+    )).fetchall()
+
+    return {
+        'period': period,
+        'start': start,
+        'data': [dict(row) for row in rows[:limit]],
+        'hasMore': len(rows) > limit
+    }
+
+def scraping_job(job):
+    """Shape a web scraping job the way the frontend's ScrapingJob type expects"""
+    web_scraping = job['config'].get('overrides', {}).get('web_scraping', {})
+    return {
+        'id': job['id'],
+        'status': job['status'],
+        'industries': web_scraping.get('target_industries', []),
+        'leads_per_industry': web_scraping.get('leads_per_industry'),
+        'total_leads': job['processed'] if job['message'] == 'Importing scraped leads' else 0,
+        'progress': job['progress'],
+        'message': job['message'],
+        'started_at': job['started_at'],
+        'completed_at': job['completed_at'],
+        'error_message': job['error_message']
+    }
+
+class LeadApiServer:
+    def __init__(self, db_path=None, pool_size=8, jobs_db=None, max_workers=2):
+        """Initialize the API server"""
+        self.db_path = db_path or '/home/ubuntu/lead_generation/database/leads.db'
+        self.pool_size = pool_size
+        self.pool = None
+
+        # Imports run one at a time on their own write connection
+        self.write_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='api-write')
+
+        # Cached list totals, cleared whenever the database changes
+        self.count_cache = {}
+        self.count_cache_version = None
+
+        # Automation jobs run in worker processes and are recorded in their own database
+        self.jobs_db = jobs_db or '/home/ubuntu/lead_generation/automation/data/jobs.db'
+        self.max_workers = max_workers
+        self.runner = None
+        self.supervisor = None
+
+        self.app = web.Application(middlewares=[self.cors_middleware, self.cache_middleware])
+        self.app.on_startup.append(self.on_startup)
+        self.app.on_cleanup.append(self.on_cleanup)
+
+        self.app.router.add_get('/api/leads', self.get_leads)
+        self.app.router.add_get('/api/leads/{id:\\d+}', self.get_lead)
+        self.app.router.add_get('/api/leads/search', self.search_leads)
+        self.app.router.add_post('/api/leads/import', self.import_leads)
+        self.app.router.add_get('/api/analytics/leads', self.get_lead_stats)
+        self.app.router.add_get('/api/analytics/campaigns', self.get_campaign_stats)
+        self.app.router.add_get('/api/analytics/funnel', self.get_funnel)
+        self.app.router.add_get('/api/analytics/trends', self.get_trends)
+        self.app.router.add_post('/api/automation/run', self.run_automation)
+        self.app.router.add_post('/api/automation/run/{component}', self.run_automation)
+        self.app.router.add_get('/api/automation/status/{job_id}', self.get_automation_status)
+        self.app.router.add_get('/api/automation/history', self.get_automation_history)
+        self.app.router.add_post('/api/automation/cancel/{job_id}', self.cancel_job)
+        self.app.router.add_get('/api/automation/events', self.stream_job_events)
+        self.app.router.add_get('/api/automation/events/{job_id}', self.stream_job_events)
+        self.app.router.add_post('/api/scraping/start', self.start_scraping)
+        self.app.router.add_get('/api/scraping/status/{job_id}', self.get_scraping_status)
+        self.app.router.add_get('/api/scraping/history', self.get_scraping_history)
+        self.app.router.add_post('/api/scraping/cancel/{job_id}', self.cancel_job)
+        self.app.router.add_get('/api/scraping/events/{job_id}', self.stream_job_events)
+        self.app.router.add_get('/api/system/health', self.get_health)
+
+    async def on_startup(self, app):
+        """Make sure the schema and planner statistics exist, then open the read pool"""
+        db = LeadDatabase(self.db_path)
+        if db.connect():
+            db.create_tables()
+            db.optimize()
+            db.close()
+
+        self.pool = ReadPool(self.db_path, self.pool_size)
+
+        self.runner = JobRunner(self.jobs_db, self.max_workers)
+        self.supervisor = asyncio.ensure_future(self.runner.supervise())
+
+    async def on_cleanup(self, app):
+        """Stop the job runner and close the read pool"""
+        if self.supervisor:
+            self.supervisor.cancel()
+        if self.runner:
+            await self.runner.stop()
+        self.write_executor.shutdown(wait=True)
+        if self.pool:
+            self.pool.close()
+
+    def data_version(self):
+        """Return a token that changes whenever the database or its WAL is written"""
+        parts = []
+        for path in (self.db_path, f"{self.db_path}-wal"):
+            try:
+                stat = os.stat(path)
+                parts.append(f"{stat.st_mtime_ns}:{stat.st_size}")
+            except OSError:
+                parts.append('-')
+        return '|'.join(parts)
+
+    @web.middleware
+    async def cors_middleware(self, request, handler):
+        """Allow the frontend dev server to call the API from another origin"""
+        if request.method == 'OPTIONS':
+            response = web.Response()
+        else:
+            response = await handler(request)
+
+        # Streamed responses have already sent their headers
+        if not response.prepared:
+            self.add_cors_headers(response)
+        return response
+
+    def add_cors_headers(self, response):
+        """Set the cross-origin headers on a response"""
+        response.headers['Access-Control-Allow-Origin'] = '*'
+        response.headers['Access-Control-Allow-Headers'] = 'Authorization, Content-Type, If-None-Match'
+        response.headers['Access-Control-Allow-Methods'] = 'GET, POST, PUT, DELETE, OPTIONS'
+        response.headers['Access-Control-Expose-Headers'] = 'ETag'
+
+    @web.middleware
+    async def cache_middleware(self, request, handler):
+        """Answer unchanged GET requests with 304 and gzip the rest"""
+        if request.method != 'GET' or request.path.startswith(UNCACHED_PATHS):
+            return await handler(request)
+
+        version = self.data_version()
+        if version != self.count_cache_version:
+            self.count_cache = {}
+            self.count_cache_version = version
+
+        # The ETag depends only on the data version and the request, so it is known before querying
+        etag = '"' + hashlib.sha1(f"{version}\0{request.path_qs}".encode('utf-8')).hexdigest() + '"'
+        if etag in request.headers.get('If-None-Match', ''):
+            return web.Response(status=304, headers={'ETag': etag})
+
+        response = await handler(request)
+
+        if response.status == 200:
+            response.headers['ETag'] = etag
+            response.headers['Cache-Control'] = 'no-cache'
+
+        if 'gzip' in request.headers.get('Accept-Encoding', '') and response.body and len(response.body) > 1024:
+            response.body = gzip.compress(response.body, compresslevel=5)
+            response.headers['Content-Encoding'] = 'gzip'
+            response.headers['Vary'] = 'Accept-Encoding'
+
+        return response
+
+    def json_response(self, data, status=200):
+        """Return a compact JSON response"""
+        return web.Response(
+            body=json.dumps(data, default=str, separators=(',', ':')).encode('utf-8'),
+            status=status,
+            content_type='application/json'
+        )
+
+    def error_response(self, message, status):
+        """Return an error in the shape the frontend reads"""
+        return self.json_response({'success': False, 'message': message}, status)
+
+    async def get_leads(self, request):
+        """GET /api/leads"""
+        try:
+            result = await self.pool.run(query_leads, dict(request.query), self.count_cache)
+        except (ValueError, TypeError) as e:
+            return self.error_response(f"Invalid query parameters: {e}", 400)
+        return self.json_response(result)
+
+    async def search_leads(self, request):
+        """GET /api/leads/search?q="""
+        try:
+            result = await self.pool.run(search_leads, dict(request.query))
+        except (ValueError, TypeError) as e:
+            return self.error_response(f"Invalid query parameters: {e}", 400)
+        return self.json_response(result)
+
+    async def get_lead(self, request):
+        """GET /api/leads/{id}"""
+        lead = await self.pool.run(query_lead, int(request.match_info['id']))
+        if lead is None:
+            return self.error_response('Lead not found', 404)
+        return self.json_response(lead)
+
+    def run_import(self, chunks, file_format, filename, progress):
+        """Import a lead file on a write connection owned by the calling thread"""
+        db = LeadDatabase(self.db_path)
+        if not db.connect():
+            raise sqlite3.OperationalError(f"Cannot open {self.db_path}")
+
+        try:
+            return LeadImporter(db, progress=progress).import_stream(chunks, file_format, filename)
+        finally:
+            db.close()
+
+    async def report_import(self, job_id, stats, size):
+        """Publish an import's progress and return whether it should stop"""
+        self.runner.update(
+            job_id,
+            processed=stats['rows'],
+            progress=round(min(99.9, 100.0 * stats['bytes_read'] / size), 1) if size else 0.0,
+            message=f"Imported {stats['imported']} leads ({stats['rows_per_sec']} rows/sec)",
+            result=stats
+        )
+        return self.runner.store.cancel_requested(job_id)
+
+    async def import_leads(self, request):
+        """POST /api/leads/import with a CSV, JSON or JSON Lines file in the 'file' field
+
+        The upload is parsed while it is received: the import thread pulls
+        the next chunk from the request only after writing the previous
+        rows, so a slow database slows the upload instead of buffering it.
+        Each import is recorded as a 'lead_import' job, so clients follow its
+        progress on /api/automation/events and can cancel it like any job.
+        """
+        try:
+            reader = await request.multipart()
+        except (AssertionError, ValueError, KeyError):
+            return self.error_response('Expected a multipart/form-data upload', 400)
+
+        field = await reader.next()
+        while field is not None and field.name != 'file':
+            await field.release()
+            field = await reader.next()
+
+        if field is None:
+            return self.error_response("Missing 'file' field", 400)
+
+        file_format = request.query.get('format')
+        if file_format not in (None, 'csv', 'json'):
+            return self.error_response(f"Unknown format: {file_format}", 400)
+
+        loop = asyncio.get_running_loop()
+        job_id = self.runner.track('lead_import', {'filename': field.filename, 'format': file_format})
+
+        def chunks():
+            while True:
+                chunk = asyncio.run_coroutine_threadsafe(field.read_chunk(READ_SIZE), loop).result()
+                if not chunk:
+                    return
+                yield chunk
+
+        def progress(stats):
+            report = self.report_import(job_id, stats, request.content_length)
+            if asyncio.run_coroutine_threadsafe(report, loop).result():
+                raise JobCancelled()
+
+        try:
+            stats = await loop.run_in_executor(self.write_executor, self.run_import, chunks(), file_format, field.filename, progress)
+        except JobCancelled:
+            self.runner.update(job_id, status='cancelled', message='Cancelled', completed_at=datetime.now().strftime(TIME_FORMAT))
+            return self.error_response('Import cancelled', 409)
+        except ValueError as e:
+            self.runner.update(job_id, status='failed', error_message=str(e), completed_at=datetime.now().strftime(TIME_FORMAT))
+            return self.error_response(f"Invalid file: {e}", 400)
+        except BaseException as e:
+            self.runner.update(job_id, status='failed', error_message=str(e) or type(e).__name__, completed_at=datetime.now().strftime(TIME_FORMAT))
+            raise
+
+        self.runner.update(job_id, status='completed', progress=100.0, processed=stats['rows'], result=stats,
+                           message=f"Imported {stats['imported']} leads", completed_at=datetime.now().strftime(TIME_FORMAT))
+        return self.json_response(dict(stats, success=True, job_id=job_id))
+
+    async def get_lead_stats(self, request):
+        """GET /api/analytics/leads"""
+        return self.json_response(await self.pool.run(query_lead_stats))
+
+    async def get_campaign_stats(self, request):
+        """GET /api/analytics/campaigns"""
+        return self.json_response(await self.pool.run(query_campaign_stats))
+
+    async def get_funnel(self, request):
+        """GET /api/analytics/funnel"""
+        return self.json_response(await self.pool.run(query_funnel))
+
+    async def get_trends(self, request):
+        """GET /api/analytics/trends"""
+        return self.json_response(await self.pool.run(query_trends, dict(request.query)))
+
+    def submit_job(self, component, body):
+        """Queue a job, pointing its automation at this server's lead database"""
+        overrides = body.get('overrides') or {}
+        overrides.setdefault('database', {})['path'] = self.db_path
+        return self.runner.submit(component, {'config_file': body.get('config_file'), 'overrides': overrides})
+
+    async def read_json(self, request):
+        """Return the JSON request body, or an empty dict if there is none"""
+        if not request.can_read_body:
+            return {}
+        body = await request.json()
+        if not isinstance(body, dict):
+            raise ValueError('Request body must be a JSON object')
+        return body
+
+    async def run_automation(self, request):
+        """POST /api/automation/run[/{component}]"""
+        component = request.match_info.get('component', 'all')
+        if component not in COMPONENTS:
+            return self.error_response(f"Unknown component: {component}", 400)
+
+        try:
+            body = await self.read_json(request)
+        except ValueError as e:
+            return self.error_response(f"Invalid request body: {e}", 400)
+
+        return self.json_response({'job_id': self.submit_job(component, body)}, 202)
+
+    async def start_scraping(self, request):
+        """POST /api/scraping/start with a ScrapingConfig body"""
+        try:
+            body = await self.read_json(request)
+        except ValueError as e:
+            return self.error_response(f"Invalid request body: {e}", 400)
+
+        web_scraping = {key: body[key] for key in ('target_industries', 'leads_per_industry', 'enrich_data') if key in body}
+        job_id = self.submit_job('web_scraping', {'overrides': {'web_scraping': web_scraping}})
+        return self.json_response(scraping_job(self.runner.store.get(job_id)), 202)
+
+    async def get_automation_status(self, request):
+        """GET /api/automation/status/{job_id}"""
+        job = self.runner.store.get(request.match_info['job_id'])
+        if job is None:
+            return self.error_response('Job not found', 404)
+        return self.json_response(job)
+
+    async def get_automation_history(self, request):
+        """GET /api/automation/history"""
+        return self.json_response(self.runner.store.list(request.query.get('component')))
+
+    async def get_scraping_status(self, request):
+        """GET /api/scraping/status/{job_id}"""
+        job = self.runner.store.get(request.match_info['job_id'])
+        if job is None or job['component'] != 'web_scraping':
+            return self.error_response('Job not found', 404)
+        return self.json_response(scraping_job(job))
+
+    async def get_scraping_history(self, request):
+        """GET /api/scraping/history"""
+        return self.json_response([scraping_job(job) for job in self.runner.store.list('web_scraping')])
+
+    async def cancel_job(self, request):
+        """POST /api/automation/cancel/{job_id} and /api/scraping/cancel/{job_id}"""
+        if not self.runner.cancel(request.match_info['job_id']):
+            return self.error_response('Job not found or already finished', 404)
+        return self.json_response({'success': True})
+
+    async def stream_job_events(self, request):
+        """GET /api/automation/events[/{job_id}]: job changes as server-sent events
+
+        With a job id the stream starts with the job's current state and ends
+        once the job finishes; without one it reports every job until the
+        client disconnects.
+        """
+        job_id = request.match_info.get('job_id')
+        format_job = scraping_job if request.path.startswith('/api/scraping') else (lambda job: job)
+
+        if job_id:
+            job = self.runner.store.get(job_id)
+            if job is None:
+                return self.error_response('Job not found', 404)
+
+        response = web.StreamResponse(headers={
+            'Content-Type': 'text/event-stream',
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        })
+        self.add_cors_headers(response)
+        await response.prepare(request)
+
+        async def send(job):
+            data = json.dumps(format_job(job), default=str, separators=(',', ':'))
+            await response.write(f"id: {job['updated_at']}\nevent: job\ndata: {data}\n\n".encode('utf-8'))
+
+        queue = self.runner.subscribe()
+        try:
+            if job_id:
+                await send(job)
+                if job['status'] in FINISHED_STATUSES:
+                    return response
+
+            while True:
+                try:
+                    job = await asyncio.wait_for(queue.get(), 15)
+                except asyncio.TimeoutError:
+                    # Comment lines keep proxies from closing an idle stream
+                    await response.write(b": keep-alive\n\n")
+                    continue
+
+                if job_id and job['id'] != job_id:
+                    continue
+
+                await send(job)
+                if job_id and job['status'] in FINISHED_STATUSES:
+                    break
+        except (ConnectionResetError, asyncio.CancelledError):
+            pass
+        finally:
+            self.runner.unsubscribe(queue)
+
+        return response
+
+    async def get_health(self, request):
+        """GET /api/system/health"""
+        try:
+            await self.pool.run(lambda conn: conn.execute('SELECT 1').fetchone())
+            database = 'ok'
+        except sqlite3.Error as e:
+            database = f"error: {e}"
+
+        running = len(self.runner.store.with_status('running'))
+        return self.json_response({
+            'status': 'ok' if database == 'ok' else 'degraded',
+            'components': {
+                'database': database,
+                'automation_jobs_running': running
+            }
+        })
+
+    def run(self, host='0.0.0.0', port=5000):
+        """Serve the API until interrupted"""
+        web.run_app(self.app, host=host, port=port)
+
+def parse_arguments():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Lead Generation REST API Server')
+
+    parser.add_argument('--db-path', type=str,
+                        default='/home/ubuntu/lead_generation/database/leads.db',
+                        help='Path to the SQLite database')
+
+    parser.add_argument('--host', type=str, default='0.0.0.0',
+                        help='Host to listen on')
+
+    parser.add_argument('--port', type=int, default=5000,
+                        help='Port to listen on (default: 5000)')
+
+    parser.add_argument('--pool-size', type=int, default=8,
+                        help='Number of read connections')
+
+    parser.add_argument('--jobs-db', type=str,
+                        default='/home/ubuntu/lead_generation/automation/data/jobs.db',
+                        help='Path to the automation job database')
+
+    parser.add_argument('--max-workers', type=int, default=2,
+                        help='Number of automation jobs that can run at once')
+
+    return parser.parse_args()
+
+def main():
+    """Main function to run the API server"""
+    args = parse_arguments()
+
+    server = LeadApiServer(args.db_path, args.pool_size, args.jobs_db, args.max_workers)
+    server.run(args.host, args.port)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
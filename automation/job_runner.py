@@ -0,0 +1,472 @@
+#!/usr/bin/env python3
+"""
+Background Job Runner for Lead Generation Automation
+This module runs automation components in worker processes, persists job state
+and progress in SQLite, and supports cooperative cancellation
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import sqlite3
+import asyncio
+import argparse
+import multiprocessing
+from datetime import datetime
+
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Automation methods a job can run, by step name
+STEPS = {
+    'web_scraping': 'run_web_scraping',
+    'entity_resolution': 'run_entity_resolution',
+    'linkedin_profile_finder': 'run_linkedin_profile_finder',
+    'linkedin_automation': 'run_linkedin_automation',
+    'email_outreach': 'run_email_outreach',
+    'report': 'generate_report'
+}
+
+# Components the API and command line accept, and the steps each one runs
+COMPONENTS = {
+    'all': ['web_scraping', 'entity_resolution', 'linkedin_profile_finder', 'linkedin_automation', 'email_outreach',
+            'report'],
+    'web_scraping': ['web_scraping'],
+    'entity_resolution': ['entity_resolution'],
+    'linkedin': ['linkedin_profile_finder', 'linkedin_automation'],
+    'linkedin_profile_finder': ['linkedin_profile_finder'],
+    'linkedin_automation': ['linkedin_automation'],
+    'email': ['email_outreach'],
+    'email_outreach': ['email_outreach'],
+    'report': ['report']
+}
+
+FINISHED_STATUSES = ('completed', 'failed', 'cancelled')
+
+class JobCancelled(Exception):
+    """Raised at a safe point inside a job once its cancellation was requested"""
+
+class JobStore:
+    """Job records in SQLite, shared by the server and its worker processes"""
+
+    def __init__(self, db_file):
+        """Open the job database, creating it if needed"""
+        self.db_file = db_file
+        os.makedirs(os.path.dirname(db_file), exist_ok=True)
+
+        self.conn = sqlite3.connect(db_file, timeout=30)
+        self.conn.row_factory = sqlite3.Row
+
+        # WAL lets the server read job state while a worker is writing progress
+        self.conn.execute('PRAGMA journal_mode = WAL')
+        self.conn.execute('''
+        CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            component TEXT NOT NULL,
+            config TEXT,
+            status TEXT NOT NULL DEFAULT 'pending',
+            step TEXT,
+            progress REAL DEFAULT 0,
+            processed INTEGER DEFAULT 0,
+            total INTEGER DEFAULT 0,
+            message TEXT,
+            result TEXT,
+            error_message TEXT,
+            cancel_requested INTEGER DEFAULT 0,
+            pid INTEGER,
+            created_at TEXT,
+            started_at TEXT,
+            completed_at TEXT,
+            updated_at REAL
+        )
+        ''')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_jobs_updated_at ON jobs (updated_at)')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status)')
+        self.conn.commit()
+
+    def row_to_job(self, row):
+        """Convert a job row to a dict with its JSON fields decoded"""
+        if row is None:
+            return None
+
+        job = dict(row)
+        job['config'] = json.loads(job['config']) if job['config'] else {}
+        job['result'] = json.loads(job['result']) if job['result'] else None
+        job['cancel_requested'] = bool(job['cancel_requested'])
+        return job
+
+    def create(self, component, config=None):
+        """Add a pending job and return its id"""
+        job_id = uuid.uuid4().hex[:12]
+        self.conn.execute('''
+        INSERT INTO jobs (id, component, config, created_at, updated_at)
+        VALUES (?, ?, ?, ?, ?)
+        ''', (job_id, component, json.dumps(config or {}), datetime.now().strftime(TIME_FORMAT), time.time()))
+        self.conn.commit()
+        return job_id
+
+    def get(self, job_id):
+        """Return one job, or None if it does not exist"""
+        return self.row_to_job(self.conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone())
+
+    def list(self, component=None, limit=50):
+        """Return the most recent jobs, optionally for one component"""
+        query = 'SELECT * FROM jobs'
+        params = []
+
+        if component:
+            query += ' WHERE component = ?'
+            params.append(component)
+
+        query += ' ORDER BY created_at DESC, rowid DESC LIMIT ?'
+        params.append(limit)
+        return [self.row_to_job(row) for row in self.conn.execute(query, params)]
+
+    def changed_since(self, updated_at):
+        """Return the jobs updated after a time.time() value, oldest change first"""
+        return [self.row_to_job(row) for row in self.conn.execute(
+            'SELECT * FROM jobs WHERE updated_at > ? ORDER BY updated_at', (updated_at,)
+        )]
+
+    def with_status(self, *statuses):
+        """Return the jobs in any of the given statuses, oldest first"""
+        return [self.row_to_job(row) for row in self.conn.execute(
+            f"SELECT * FROM jobs WHERE status IN ({','.join('?' * len(statuses))}) ORDER BY created_at, rowid",
+            statuses
+        )]
+
+    def update(self, job_id, **fields):
+        """Set fields on a job"""
+        if 'result' in fields:
+            fields['result'] = json.dumps(fields['result'], default=str)
+
+        fields['updated_at'] = time.time()
+        assignments = ', '.join(f"{column} = ?" for column in fields)
+        self.conn.execute(f'UPDATE jobs SET {assignments} WHERE id = ?', list(fields.values()) + [job_id])
+        self.conn.commit()
+
+    def request_cancel(self, job_id):
+        """Ask a job to stop; pending jobs are cancelled right away
+
+        Returns False if the job does not exist or has already finished.
+        """
+        job = self.get(job_id)
+        if job is None or job['status'] in FINISHED_STATUSES:
+            return False
+
+        if job['status'] == 'pending':
+            self.update(job_id, status='cancelled', cancel_requested=1,
+                        completed_at=datetime.now().strftime(TIME_FORMAT))
+        else:
+            self.update(job_id, cancel_requested=1, message='Cancelling')
+        return True
+
+    def claim(self, job_id, pid):
+        """Mark a pending job as running in a worker; returns False if it was cancelled first"""
+        cursor = self.conn.execute('''
+        UPDATE jobs SET status = 'running', pid = ?, started_at = ?, updated_at = ?
+        WHERE id = ? AND status = 'pending'
+        ''', (pid, datetime.now().strftime(TIME_FORMAT), time.time(), job_id))
+        self.conn.commit()
+        return cursor.rowcount == 1
+
+    def cancel_requested(self, job_id):
+        """Return True if cancellation of a job was requested"""
+        row = self.conn.execute('SELECT cancel_requested FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return bool(row and row[0])
+
+    def close(self):
+        """Close the job database"""
+        self.conn.close()
+
+class JobContext:
+    """Handle a running automation uses to report progress and check for cancellation
+
+    Progress writes and cancellation checks are throttled, so calling them
+    once per lead is cheap.
+    """
+
+    def __init__(self, store, job_id, steps, min_interval=0.5):
+        self.store = store
+        self.job_id = job_id
+        self.steps = steps
+        self.min_interval = min_interval
+
+        self.step_index = 0
+        self.last_write = 0.0
+        self.last_check = 0.0
+
+    def start_step(self, index):
+        """Record that the job moved on to its next step"""
+        self.step_index = index
+        step = self.steps[index]
+        self.store.update(
+            self.job_id,
+            step=step,
+            progress=round(100.0 * index / len(self.steps), 1),
+            processed=0,
+            total=0,
+            message=f"Running {step.replace('_', ' ')}"
+        )
+        self.last_write = time.monotonic()
+
+    def progress(self, processed, total=None, message=None):
+        """Record progress within the current step"""
+        now = time.monotonic()
+        finished = total is not None and processed >= total
+        if now - self.last_write < self.min_interval and not finished:
+            return
+
+        fraction = min(1.0, processed / total) if total else 0.0
+        fields = {
+            'processed': processed,
+            'progress': round(100.0 * (self.step_index + fraction) / len(self.steps), 1)
+        }
+        if total is not None:
+            fields['total'] = total
+        if message:
+            fields['message'] = message
+
+        self.store.update(self.job_id, **fields)
+        self.last_write = now
+
+    def check_cancelled(self):
+        """Raise JobCancelled if cancellation was requested"""
+        now = time.monotonic()
+        if now - self.last_check < self.min_interval:
+            return
+
+        self.last_check = now
+        if self.store.cancel_requested(self.job_id):
+            raise JobCancelled(f"Job {self.job_id} was cancelled")
+
+def run_job(db_file, job_id):
+    """Run one job to completion; this is the entry point of a worker process"""
+    store = JobStore(db_file)
+    job = store.get(job_id)
+    steps = COMPONENTS[job['component']]
+
+    if not store.claim(job_id, os.getpid()):
+        store.close()
+        return
+
+    results = {}
+    try:
+        # Imported here so the server process never loads the automation components
+        from lead_generation_automation import LeadGenerationAutomation
+
+        config = job['config']
+        automation = LeadGenerationAutomation(config.get('config_file'))
+        automation.update_config(config.get('overrides'))
+
+        context = JobContext(store, job_id, steps)
+        automation.job = context
+
+        for index, step in enumerate(steps):
+            context.check_cancelled()
+            context.start_step(index)
+            results[step] = getattr(automation, STEPS[step])()
+
+        store.update(job_id, status='completed', progress=100.0, result=results, message='Completed',
+                     completed_at=datetime.now().strftime(TIME_FORMAT))
+    except JobCancelled:
+        store.update(job_id, status='cancelled', result=results, message='Cancelled',
+                     completed_at=datetime.now().strftime(TIME_FORMAT))
+    except BaseException as e:
+        store.update(job_id, status='failed', result=results, error_message=str(e) or type(e).__name__,
+                     completed_at=datetime.now().strftime(TIME_FORMAT))
+    finally:
+        store.close()
+
+class JobRunner:
+    """Starts pending jobs in worker processes and publishes job changes to subscribers"""
+
+    def __init__(self, db_file, max_workers=2):
+        """Initialize the runner; call supervise() on the event loop to start jobs"""
+        self.db_file = db_file
+        self.max_workers = max_workers
+        self.store = JobStore(db_file)
+
+        # Spawned workers start clean instead of inheriting the server's threads and sockets
+        self.context = multiprocessing.get_context('spawn')
+        self.processes = {}
+        self.subscribers = set()
+        self.last_update = time.time()
+        self.wakeup = None
+
+        # Jobs left running by a previous server can never finish
+        for job in self.store.with_status('running'):
+            self.store.update(job['id'], status='failed', error_message='Interrupted by a server restart',
+                              completed_at=datetime.now().strftime(TIME_FORMAT))
+
+    def submit(self, component, config=None):
+        """Queue a job for a component and return its id"""
+        if component not in COMPONENTS:
+            raise ValueError(f"Unknown component: {component}")
+
+        job_id = self.store.create(component, config)
+        if self.wakeup:
+            self.wakeup.set()
+        return job_id
+
+    def track(self, component, config=None):
+        """Record a job that runs inside this process rather than a worker and return its id
+
+        The caller reports progress with update() and must set a finished
+        status itself; cancel() only sets cancel_requested for it to check.
+        """
+        job_id = self.store.create(component, config)
+        self.update(job_id, status='running', pid=os.getpid(), started_at=datetime.now().strftime(TIME_FORMAT))
+        return job_id
+
+    def update(self, job_id, **fields):
+        """Set fields on a tracked job and publish the change"""
+        self.store.update(job_id, **fields)
+        if self.wakeup:
+            self.wakeup.set()
+
+    def cancel(self, job_id):
+        """Request cancellation of a job"""
+        cancelled = self.store.request_cancel(job_id)
+        if cancelled and self.wakeup:
+            self.wakeup.set()
+        return cancelled
+
+    def dispatch(self):
+        """Reap finished workers and start pending jobs while workers are free"""
+        for job_id, process in list(self.processes.items()):
+            if process.is_alive():
+                continue
+
+            process.join()
+            del self.processes[job_id]
+
+            # A worker that died without recording an outcome crashed
+            job = self.store.get(job_id)
+            if job and job['status'] not in FINISHED_STATUSES:
+                self.store.update(job_id, status='failed', error_message=f"Worker exited with code {process.exitcode}",
+                                  completed_at=datetime.now().strftime(TIME_FORMAT))
+
+        for job in self.store.with_status('pending'):
+            if len(self.processes) >= self.max_workers:
+                break
+
+            # A freshly started worker has not claimed its job yet
+            if job['id'] in self.processes:
+                continue
+
+            process = self.context.Process(target=run_job, args=(self.db_file, job['id']), daemon=True)
+            process.start()
+            self.processes[job['id']] = process
+
+    def subscribe(self):
+        """Return a queue that receives every changed job"""
+        queue = asyncio.Queue()
+        self.subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue):
+        """Stop sending job changes to a queue"""
+        self.subscribers.discard(queue)
+
+    def publish_changes(self):
+        """Send the jobs changed since the last call to every subscriber"""
+        for job in self.store.changed_since(self.last_update):
+            self.last_update = max(self.last_update, job['updated_at'])
+            for queue in self.subscribers:
+                queue.put_nowait(job)
+
+    async def supervise(self, interval=0.25):
+        """Dispatch jobs and publish their progress until cancelled"""
+        self.wakeup = asyncio.Event()
+
+        # PRAGMA data_version only changes when another connection commits
+        data_version = None
+
+        while True:
+            self.dispatch()
+
+            version = self.store.conn.execute('PRAGMA data_version').fetchone()[0]
+            if version != data_version or self.wakeup.is_set():
+                data_version = version
+                self.publish_changes()
+
+            self.wakeup.clear()
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def stop_workers(self, timeout=10):
+        """Wait for the workers to exit within one shared timeout, terminating any left"""
+        deadline = time.monotonic() + timeout
+        for process in self.processes.values():
+            process.join(timeout=max(0, deadline - time.monotonic()))
+            if process.is_alive():
+                process.terminate()
+
+    def shutdown(self, timeout=10):
+        """Ask running jobs to stop and wait briefly for their workers"""
+        for job_id in list(self.processes):
+            self.store.request_cancel(job_id)
+
+        self.stop_workers(timeout)
+        self.store.close()
+
+    async def stop(self, timeout=10):
+        """Shut down like shutdown, waiting for the workers without blocking the event loop"""
+        for job_id in list(self.processes):
+            self.store.request_cancel(job_id)
+
+        await asyncio.get_running_loop().run_in_executor(None, self.stop_workers, timeout)
+        self.store.close()
+
+def parse_arguments():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Lead Generation Job Runner')
+
+    parser.add_argument('--db-file', type=str,
+                        default='/home/ubuntu/lead_generation/automation/data/jobs.db',
+                        help='Job database file')
+
+    parser.add_argument('--run', type=str, choices=sorted(COMPONENTS), default=None,
+                        help='Run a component as a job and wait for it to finish')
+
+    parser.add_argument('--config', type=str, default=None,
+                        help='Path to the automation configuration file for --run')
+
+    parser.add_argument('--cancel', type=str, default=None,
+                        help='Request cancellation of a job')
+
+    return parser.parse_args()
+
+def main():
+    """Main function to run or inspect jobs"""
+    args = parse_arguments()
+    store = JobStore(args.db_file)
+
+    if args.cancel:
+        if not store.request_cancel(args.cancel):
+            print(f"Job {args.cancel} not found or already finished")
+            return 1
+        print(f"Cancellation requested for job {args.cancel}")
+        return 0
+
+    if args.run:
+        job_id = store.create(args.run, {'config_file': args.config})
+        print(f"Running job {job_id} ({args.run})")
+        run_job(args.db_file, job_id)
+        job = store.get(job_id)
+        print(f"Job {job_id} {job['status']}: {job['error_message'] or job['result']}")
+        return 0 if job['status'] == 'completed' else 1
+
+    for job in store.list():
+        print(f"{job['id']} {job['component']} {job['status']} {job['progress']:.0f}% "
+              f"{job['created_at']} {job['message'] or ''}")
+
+    store.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
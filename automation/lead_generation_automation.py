@@ -27,10 +27,15 @@ try:
     from scraper import LeadScraper
     from database import LeadDatabase
     from linkedin_automation import LinkedInAutomation
-    from profile_finder import LinkedInProfileFinder
+    from profile_finder import LinkedInProfileFinder, UNENRICHED_FIRST
     from template_generator import TemplateGenerator
     from email_template_generator import EmailTemplateGenerator
     from lead_database import LeadDatabase as MasterDatabase
+    from job_runner import JobCancelled
+    from report_engine import ReportEngine
+    from lead_scoring import LeadScorer
+    from outreach_selector import OutreachSelector
+    from entity_resolution import EntityResolver, NAME_SIMILARITY
 except ImportError as e:
     print(f"Error importing modules: {e}")
     print("Make sure all required components are installed.")
@@ -51,6 +56,37 @@ class LeadGenerationAutomation:
         
         # Create directories
         self.create_directories()
+        
+        # Set by the job runner when this automation runs as a background job
+        self.job = None
+    
+    def update_config(self, overrides):
+        """Apply configuration overrides section by section, as load_config merges a config file"""
+        for key, value in (overrides or {}).items():
+            if key in self.config and isinstance(value, dict):
+                self.config[key].update(value)
+            else:
+                self.config[key] = value
+        
+        self.db_path = self.config.get('database', {}).get('path', self.db_path)
+        self.db = MasterDatabase(self.db_path)
+    
+    def report_progress(self, processed, total=None, message=None):
+        """Report progress to the job running this automation, if any"""
+        if self.job:
+            self.job.progress(processed, total, message)
+    
+    def check_cancelled(self):
+        """Stop at a safe point if the job running this automation was cancelled"""
+        if self.job:
+            self.job.check_cancelled()
+    
+    def job_callback(self, message):
+        """Return a per-item progress callback for components that report (processed, total)"""
+        def callback(processed, total):
+            self.check_cancelled()
+            self.report_progress(processed, total, message)
+        return callback
     
     def setup_logging(self):
         """Set up logging for the automation system"""
@@ -95,7 +131,12 @@ class LeadGenerationAutomation:
                 'connection_limit_per_day': 25,
                 'message_limit_per_day': 20,
                 'profile_finder_enabled': True,
-                'profile_finder_limit': 50
+                'profile_finder_limit': 50,
+                'save_enriched_csv': False
+            },
+            'entity_resolution': {
+                'enabled': True,
+                'name_similarity': NAME_SIMILARITY
             },
             'email_outreach': {
                 'enabled': True,
@@ -103,6 +144,14 @@ class LeadGenerationAutomation:
                 'follow_up_days': 3,
                 'max_follow_ups': 2
             },
+            'industry_classification': {
+                'rules_file': None
+            },
+            'reporting': {
+                'max_table_rows': 100,
+                'follow_up_days': 7,
+                'export_csv': False
+            },
             'scheduling': {
                 'web_scraping_frequency': 'weekly',
                 'linkedin_frequency': 'daily',
@@ -208,7 +257,9 @@ class LeadGenerationAutomation:
             
             # Run the scraper
             all_leads = []
-            for industry, urls in industries_to_scrape.items():
+            for index, (industry, urls) in enumerate(industries_to_scrape.items()):
+                self.check_cancelled()
+                self.report_progress(index, len(industries_to_scrape), f"Scraping {industry}")
                 self.logger.info(f"Scraping {industry} industry")
                 industry_leads = scraper.scrape_industry(industry, urls)
                 
@@ -233,6 +284,7 @@ class LeadGenerationAutomation:
             
             # Enrich data if enabled
             if enrich_data and all_leads:
+                self.check_cancelled()
                 self.logger.info("Starting data enrichment process")
                 
                 # Import to database
@@ -244,7 +296,8 @@ class LeadGenerationAutomation:
                 
                 # Import leads
                 leads_imported = 0
-                for lead in all_leads:
+                for index, lead in enumerate(all_leads):
+                    self.report_progress(index + 1, len(all_leads), "Importing scraped leads")
                     company_id = self.db.insert_company(lead)
                     
                     if company_id:
@@ -263,10 +316,41 @@ class LeadGenerationAutomation:
                 self.db.close()
             
             return True
+        except JobCancelled:
+            self.logger.info("Cancelled web scraping process")
+            raise
         except Exception as e:
             self.logger.error(f"Error in web scraping process: {e}")
             return False
     
+    def run_entity_resolution(self):
+        """Merge duplicate companies, such as re-scrapes of one company from different sources"""
+        if not self.config.get('entity_resolution', {}).get('enabled', True):
+            self.logger.info("Entity resolution is disabled in configuration")
+            return False
+        
+        self.logger.info("Starting entity resolution process")
+        
+        try:
+            # Connect to the database
+            if not self.db.connect():
+                self.logger.error("Failed to connect to database")
+                return False
+            
+            resolver = EntityResolver(self.db, self.config.get('entity_resolution', {}).get('name_similarity', NAME_SIMILARITY))
+            stats, _ = resolver.run()
+            
+            self.logger.info(f"Merged {stats['merged']} duplicate companies in {stats['clusters']} clusters "
+                             f"and folded {stats['contacts_folded']} contacts in {stats['elapsed']}s")
+            
+            # Close the database connection
+            self.db.close()
+            
+            return stats
+        except Exception as e:
+            self.logger.error(f"Error in entity resolution process: {e}")
+            return False
+    
     def run_linkedin_profile_finder(self):
         """Run the LinkedIn profile finder component"""
         if not self.config.get('linkedin_automation', {}).get('enabled', True):
@@ -282,6 +366,7 @@ class LeadGenerationAutomation:
         try:
             # Initialize the profile finder
             finder = LinkedInProfileFinder()
+            finder.load_email_patterns(self.db_path)
             
             # Connect to the database
             if not self.db.connect():
@@ -295,15 +380,16 @@ class LeadGenerationAutomation:
             
             # Get leads with status 'New'
             leads = []
-            self.db.cursor.execute('''
+            self.db.cursor.execute(f'''
             SELECT c.id, c.company_name, c.website, c.industry, c.company_size, 
                    c.current_chatbot, c.address, c.city, c.state, c.zipcode, 
-                   c.country, ct.first_name, ct.last_name, ct.email, ct.phone,
+                   c.country, ct.id as contact_id, ct.first_name, ct.last_name, ct.email, ct.phone,
                    ct.position
             FROM companies c
             LEFT JOIN contacts ct ON c.id = ct.company_id
             LEFT JOIN lead_status ls ON c.id = ls.company_id
             WHERE ls.status = 'New'
+            ORDER BY {UNENRICHED_FIRST}
             LIMIT ?
             ''', (limit,))
             
@@ -321,52 +407,22 @@ class LeadGenerationAutomation:
             # Run the profile finder
             if leads:
                 finder.leads = leads
-                total_processed, output_file = finder.run(limit)
+                save_csv = self.config.get('linkedin_automation', {}).get('save_enriched_csv', False)
+                total_processed, output_file = finder.run(limit, save_csv=save_csv,
+                                                          progress=self.job_callback("Finding LinkedIn profiles"))
                 
                 self.logger.info(f"LinkedIn profile finder completed. Processed {total_processed} leads")
-                self.logger.info(f"Enriched leads saved to: {output_file}")
+                if output_file:
+                    self.logger.info(f"Enriched leads saved to: {output_file}")
                 
-                # Update the database with enriched lead information
-                if output_file and os.path.exists(output_file):
-                    # Reconnect to the database
-                    if not self.db.connect():
-                        self.logger.error("Failed to connect to database")
-                        return False
-                    
-                    # Load enriched leads
-                    enriched_leads = []
-                    with open(output_file, 'r', encoding='utf-8') as file:
-                        csv_reader = csv.DictReader(file)
-                        enriched_leads = list(csv_reader)
-                    
-                    # Update database
-                    updates = 0
-                    for lead in enriched_leads:
-                        if 'id' in lead and lead['id']:
-                            company_id = lead['id']
-                            
-                            # Update contacts table with LinkedIn URL and email
-                            if 'linkedin_url' in lead and lead['linkedin_url']:
-                                self.db.cursor.execute(
-                                    "UPDATE contacts SET linkedin_url = ?, updated_at = CURRENT_TIMESTAMP WHERE company_id = ?",
-                                    (lead['linkedin_url'], company_id)
-                                )
-                            
-                            if 'email' in lead and lead['email'] and lead['email'] != 'N/A':
-                                self.db.cursor.execute(
-                                    "UPDATE contacts SET email = ?, updated_at = CURRENT_TIMESTAMP WHERE company_id = ?",
-                                    (lead['email'], company_id)
-                                )
-                            
-                            updates += 1
-                    
-                    self.db.conn.commit()
-                    self.logger.info(f"Updated {updates} leads in the database")
-                    
-                    # Close the database connection
-                    self.db.close()
+                # Write the enriched LinkedIn URLs and emails straight back to the database
+                updates = finder.update_database(self.db_path)
+                self.logger.info(f"Updated {updates} leads in the database")
             
             return True
+        except JobCancelled:
+            self.logger.info("Cancelled LinkedIn profile finder process")
+            raise
         except Exception as e:
             self.logger.error(f"Error in LinkedIn profile finder process: {e}")
             return False
@@ -379,159 +435,164 @@ class LeadGenerationAutomation:
         
         self.logger.info("Starting LinkedIn automation process")
         
+        linkedin = None
         try:
             # Initialize the LinkedIn automation
-            linkedin = LinkedInAutomation()
+            linkedin = LinkedInAutomation(rules_file=self.config.get('industry_classification', {}).get('rules_file'))
             
             # Connect to the database
             if not self.db.connect():
                 self.logger.error("Failed to connect to database")
                 return False
             
+            # Classify any companies that don't have a cached industry bucket yet
+            self.db.update_industry_buckets(linkedin.classifier.classify, linkedin.classifier.version)
+            
+            # Rescore the leads whose scoring inputs changed since the last run
+            self.score_leads()
+            
             # Get leads from database
             connection_limit = self.config.get('linkedin_automation', {}).get('connection_limit_per_day', 25)
             message_limit = self.config.get('linkedin_automation', {}).get('message_limit_per_day', 20)
             
-            self.logger.info(f"Loading leads from database for LinkedIn automation")
-            
-            # Get leads with status 'New' or 'Connection Requested'
-            leads = []
-            self.db.cursor.execute('''
-            SELECT c.id, c.company_name, c.website, c.industry, c.company_size, 
-                   c.current_chatbot, c.address, c.city, c.state, c.zipcode, 
-                   c.country, ct.id as contact_id, ct.first_name, ct.last_name, ct.email, ct.phone,
-                   ct.position, ct.linkedin_url, ls.status
-            FROM companies c
-            LEFT JOIN contacts ct ON c.id = ct.company_id
-            LEFT JOIN lead_status ls ON c.id = ls.company_id
-            WHERE ls.status IN ('New', 'Connection Requested')
-            AND ct.linkedin_url IS NOT NULL
-            AND ct.linkedin_url != ''
-            ''')
-            
-            columns = [column[0] for column in self.db.cursor.description]
+            self.logger.info(f"Selecting leads from database for LinkedIn automation")
             
-            for row in self.db.cursor.fetchall():
-                lead = dict(zip(columns, row))
-                leads.append(lead)
+            # Pick the best 'New' leads to connect with and 'Connection Requested' leads to message
+            selector = OutreachSelector(self.db)
+            new_leads = selector.select('linkedin', ['New'], connection_limit)
+            connection_leads = selector.select('linkedin', ['Connection Requested'], message_limit)
+            leads = new_leads + connection_leads
             
-            self.logger.info(f"Loaded {len(leads)} leads from database")
+            self.logger.info(f"Selected {len(new_leads)} leads to connect with and {len(connection_leads)} leads to message")
             
             # Close the database connection temporarily
             self.db.close()
             
             # Run the LinkedIn automation
             if leads:
-                linkedin.leads = leads
-                
                 # Determine which industries to target
                 industries = list(linkedin.config['search_filters'].keys())
                 
-                # Determine which actions to perform
-                new_leads = [lead for lead in leads if lead.get('status') == 'New']
-                connection_leads = [lead for lead in leads if lead.get('status') == 'Connection Requested']
-                
-                actions = []
-                if new_leads:
-                    actions.append('connection')
-                if connection_leads:
-                    actions.append('follow_up')
-                
-                # Set limits
-                limits = {
-                    'connection': min(connection_limit, len(new_leads)),
-                    'follow_up': min(message_limit, len(connection_leads))
-                }
-                
-                # Run the automation
-                total_actions = linkedin.run(industries, actions, limits)
-                
-                self.logger.info(f"LinkedIn automation completed. Total actions: {total_actions}")
-                
-                # Update the database with LinkedIn actions
-                if total_actions > 0:
-                    # Reconnect to the database
-                    if not self.db.connect():
-                        self.logger.error("Failed to connect to database")
-                        return False
-                    
-                    # Create a LinkedIn campaign
-                    campaign_id = self.db.create_linkedin_campaign(
-                        f"LinkedIn Campaign {self.timestamp}",
-                        "Automated LinkedIn campaign",
-                        "Active"
-                    )
-                    
-                    if campaign_id:
-                        # Add templates
-                        connection_template_id = self.db.add_linkedin_template(
-                            campaign_id,
-                            'connection_request',
-                            "Connection request template"
-                        )
-                        
-                        followup_template_id = self.db.add_linkedin_template(
-                            campaign_id,
-                            'follow_up',
-                            "Follow-up message template"
-                        )
-                        
-                        # Record actions
-                        for action in linkedin.actions_log:
-                            if action['action_type'] == 'connection_request':
-                                # Find the lead
-                                for lead in new_leads:
-                                    if f"{lead.get('first_name', '')} {lead.get('last_name', '')}" in action['target']:
-                                        # Record the connection request
-                                        self.db.record_linkedin_connection_sent(
-                                            lead['contact_id'],
-                                            connection_template_id,
-                                            campaign_id
-                                        )
-                                        
-                                        # Update lead status
-                                        self.db.update_lead_status(
-                                            lead['id'],
-                                            'Connection Requested',
-                                            next_action='Check Connection Status',
-                                            next_action_date=(datetime.now() + timedelta(days=5)).strftime("%Y-%m-%d")
-                                        )
-                                        
-                                        break
-                            
-                            elif action['action_type'] == 'follow_up_message':
-                                # Find the lead
-                                for lead in connection_leads:
-                                    if f"{lead.get('first_name', '')} {lead.get('last_name', '')}" in action['target']:
-                                        # Record the interaction
-                                        self.db.record_interaction(
-                                            lead['id'],
-                                            lead['contact_id'],
-                                            'LinkedIn Message',
-                                            'LinkedIn',
-                                            f"Follow-up message sent: {action['notes']}"
-                                        )
-                                        
-                                        # Update lead status
-                                        self.db.update_lead_status(
-                                            lead['id'],
-                                            'Message Sent',
-                                            next_action='Check Response',
-                                            next_action_date=(datetime.now() + timedelta(days=7)).strftime("%Y-%m-%d")
-                                        )
-                                        
-                                        break
-                    
-                    self.db.conn.commit()
-                    self.logger.info(f"Updated database with LinkedIn actions")
-                    
-                    # Close the database connection
-                    self.db.close()
+                # Queue each action over its own selected leads, in priority order
+                for action, action_leads in (('connection', new_leads), ('follow_up', connection_leads)):
+                    if action_leads:
+                        linkedin.leads = action_leads
+                        linkedin.schedule(industries, [action], {action: len(action_leads)})
+            
+            # Perform the queued slots that are due now, including earlier runs'; later
+            # slots are left to a long-running driver such as the campaign runner
+            self.check_cancelled()
+            total_actions = linkedin.run_due()
+            self.report_progress(total_actions, total_actions, "Sending LinkedIn actions")
             
+            self.logger.info(f"LinkedIn automation completed. Total actions: {total_actions}")
+        
             return True
+        except JobCancelled:
+            self.logger.info("Cancelled LinkedIn automation process")
+            raise
         except Exception as e:
             self.logger.error(f"Error in LinkedIn automation process: {e}")
             return False
+        finally:
+            if linkedin:
+                # Record what was sent even when the run failed or was cancelled part way,
+                # since those slots are already done and the journal is per run
+                try:
+                    self.record_linkedin_actions(linkedin)
+                except Exception as e:
+                    self.logger.error(f"Error recording LinkedIn actions: {e}")
+                linkedin.close()
+    
+    def record_linkedin_actions(self, linkedin):
+        """Record the sent actions journaled by a LinkedIn automation run in the lead database"""
+        if not len(linkedin.actions_log):
+            return False
+        
+        # Reconnect to the database
+        if not self.db.connect():
+            self.logger.error("Failed to connect to database")
+            return False
+        
+        # Create a LinkedIn campaign
+        campaign_id = self.db.create_linkedin_campaign(
+            f"LinkedIn Campaign {self.timestamp}",
+            "Automated LinkedIn campaign",
+            "Active"
+        )
+        
+        if campaign_id:
+            # Add templates
+            connection_template_id = self.db.add_linkedin_template(
+                campaign_id,
+                'connection_request',
+                "Connection request template"
+            )
+            
+            followup_template_id = self.db.add_linkedin_template(
+                campaign_id,
+                'follow_up',
+                "Follow-up message template"
+            )
+            
+            # Reconcile the journaled actions with the leads they were sent to; slots
+            # queued by earlier runs carry their own company and contact ids
+            for action in linkedin.actions_log.query(action_type='connection_request', status='sent'):
+                lead = {'id': action.get('company_id'), 'contact_id': action.get('contact_id')}
+                if not lead['id'] or not lead['contact_id']:
+                    continue
+                
+                # Record the connection request
+                self.db.record_linkedin_connection_sent(
+                    lead['contact_id'],
+                    connection_template_id,
+                    campaign_id
+                )
+                
+                # Update lead status
+                self.db.update_lead_status(
+                    lead['id'],
+                    'Connection Requested',
+                    next_action='Check Connection Status',
+                    next_action_date=(datetime.now() + timedelta(days=5)).strftime("%Y-%m-%d")
+                )
+            
+            for action in linkedin.actions_log.query(action_type='follow_up_message', status='sent'):
+                lead = {'id': action.get('company_id'), 'contact_id': action.get('contact_id')}
+                if not lead['id'] or not lead['contact_id']:
+                    continue
+                
+                # Record the interaction
+                self.db.record_interaction(
+                    lead['id'],
+                    lead['contact_id'],
+                    'LinkedIn Message',
+                    'LinkedIn',
+                    f"Follow-up message sent: {action['notes']}"
+                )
+                
+                # Update lead status
+                self.db.update_lead_status(
+                    lead['id'],
+                    'Message Sent',
+                    next_action='Check Response',
+                    next_action_date=(datetime.now() + timedelta(days=7)).strftime("%Y-%m-%d")
+                )
+        
+        self.db.conn.commit()
+        self.logger.info(f"Updated database with LinkedIn actions")
+        
+        # Close the database connection
+        self.db.close()
+        
+        return True
+    
+    def score_leads(self):
+        """Rescore queued leads so outreach picks the highest scoring ones first"""
+        stats = LeadScorer(self.db).score_changed()
+        if stats['scored']:
+            self.logger.info(f"Rescored {stats['scored']} leads ({stats['changed']} changed) in {stats['elapsed']}s")
+        return stats
     
     def run_email_outreach(self):
         """Run the email outreach component"""
@@ -543,77 +604,41 @@ class LeadGenerationAutomation:
         
         try:
             # Initialize the email template generator
-            email_generator = EmailTemplateGenerator()
+            email_generator = EmailTemplateGenerator(self.config.get('industry_classification', {}).get('rules_file'))
             
             # Connect to the database
             if not self.db.connect():
                 self.logger.error("Failed to connect to database")
                 return False
             
+            # Classify any companies that don't have a cached industry bucket yet
+            self.db.update_industry_buckets(email_generator.classifier.classify, email_generator.classifier.version)
+            
+            # Rescore the leads whose scoring inputs changed since the last run
+            self.score_leads()
+            
             # Get leads from database
             emails_per_day = self.config.get('email_outreach', {}).get('emails_per_day', 50)
             follow_up_days = self.config.get('email_outreach', {}).get('follow_up_days', 3)
             max_follow_ups = self.config.get('email_outreach', {}).get('max_follow_ups', 2)
             
-            self.logger.info(f"Loading leads from database for email outreach")
-            
-            # Get leads with status 'New' or 'Contacted' and valid email addresses
-            leads = []
-            self.db.cursor.execute('''
-            SELECT c.id, c.company_name, c.website, c.industry, c.company_size, 
-                   c.current_chatbot, c.address, c.city, c.state, c.zipcode, 
-                   c.country, ct.id as contact_id, ct.first_name, ct.last_name, ct.email, ct.phone,
-                   ct.position, ls.status, ls.last_contacted,
-                   (SELECT COUNT(*) FROM interactions i WHERE i.company_id = c.id AND i.interaction_type = 'Email Sent') as email_count
-            FROM companies c
-            LEFT JOIN contacts ct ON c.id = ct.company_id
-            LEFT JOIN lead_status ls ON c.id = ls.company_id
-            WHERE ls.status IN ('New', 'Contacted')
-            AND ct.email IS NOT NULL
-            AND ct.email != ''
-            AND ct.email != 'N/A'
-            ''')
-            
-            columns = [column[0] for column in self.db.cursor.description]
-            
-            for row in self.db.cursor.fetchall():
-                lead = dict(zip(columns, row))
-                leads.append(lead)
-            
-            self.logger.info(f"Loaded {len(leads)} leads from database")
-            
-            # Filter leads for initial outreach and follow-ups
-            initial_outreach_leads = []
-            follow_up_leads = []
-            
-            for lead in leads:
-                email_count = int(lead.get('email_count', 0))
-                
-                if email_count == 0:
-                    # No emails sent yet, add to initial outreach
-                    initial_outreach_leads.append(lead)
-                elif email_count <= max_follow_ups:
-                    # Check if it's time for a follow-up
-                    last_contacted = lead.get('last_contacted')
-                    if last_contacted:
-                        last_contacted_date = datetime.strptime(last_contacted, "%Y-%m-%d %H:%M:%S")
-                        days_since_contact = (datetime.now() - last_contacted_date).days
-                        
-                        if days_since_contact >= follow_up_days:
-                            follow_up_leads.append(lead)
-            
-            self.logger.info(f"Found {len(initial_outreach_leads)} leads for initial outreach")
-            self.logger.info(f"Found {len(follow_up_leads)} leads for follow-up")
+            self.logger.info(f"Selecting leads from database for email outreach")
             
-            # Limit the number of emails to send
-            total_emails = min(emails_per_day, len(initial_outreach_leads) + len(follow_up_leads))
+            # Pick the best leads with status 'New' or 'Contacted', follow-ups first
+            selector = OutreachSelector(self.db)
+            follow_up_cutoff = (datetime.now() - timedelta(days=follow_up_days)).strftime("%Y-%m-%d %H:%M:%S")
+            follow_up_leads = selector.select(
+                'email', ['New', 'Contacted'], emails_per_day,
+                "COALESCE(ls.emails_sent, 0) BETWEEN 1 AND ? AND ls.last_contacted <= ?",
+                (max_follow_ups, follow_up_cutoff)
+            )
+            initial_outreach_leads = selector.select(
+                'email', ['New', 'Contacted'], emails_per_day - len(follow_up_leads),
+                "COALESCE(ls.emails_sent, 0) = 0"
+            )
             
-            # Allocate emails between initial outreach and follow-ups (prioritize follow-ups)
-            follow_up_count = min(len(follow_up_leads), total_emails)
-            initial_count = min(len(initial_outreach_leads), total_emails - follow_up_count)
-            
-            follow_up_leads = follow_up_leads[:follow_up_count]
-            initial_outreach_leads = initial_outreach_leads[:initial_count]
+            follow_up_count = len(follow_up_leads)
+            initial_count = len(initial_outreach_leads)
             
             self.logger.info(f"Will send {initial_count} initial outreach emails and {follow_up_count} follow-up emails")
             
@@ -635,29 +660,21 @@ class LeadGenerationAutomation:
                 if initial_outreach_leads:
                     self.logger.info("Processing initial outreach emails")
                     
-                    for lead in initial_outreach_leads:
-                        # Determine the industry
-                        industry = lead.get('industry', '').lower()
-                        template_industry = 'smes'  # Default
+                    for index, lead in enumerate(initial_outreach_leads):
+                        self.check_cancelled()
+                        self.report_progress(index, initial_count + follow_up_count, "Sending initial outreach emails")
                         
-                        if 'market' in industry or 'digital' in industry or 'agency' in industry:
-                            template_industry = 'digital_marketing'
-                        elif 'saas' in industry or 'software' in industry or 'tech' in industry:
-                            template_industry = 'saas_companies'
-                        elif 'enterprise' in industry or 'it' in industry or 'information technology' in industry:
-                            template_industry = 'enterprise_it'
-                        elif 'service' in industry or 'plumb' in industry or 'electric' in industry:
-                            template_industry = 'service_businesses'
+                        # Determine the industry from the cached bucket
+                        template_industry = email_generator.classifier.classify_lead(lead)
                         
                         # Generate personalized template
                         template = email_generator.generate_personalized_template(lead, 'initial_outreach', template_industry)
                         
-                        # Add template to campaign
-                        template_id = self.db.add_email_template(
-                            campaign_id,
+                        # Store the base template once and record only the variables per send
+                        template_id = self.db.get_or_create_email_template(
                             'initial_outreach',
-                            template['subject'],
-                            template['body']
+                            template['template']['subject'],
+                            template['template']['body']
                         )
                         
                         if template_id:
@@ -665,7 +682,8 @@ class LeadGenerationAutomation:
                             self.db.record_email_sent(
                                 lead['contact_id'],
                                 template_id,
-                                campaign_id
+                                campaign_id,
+                                template['variables']
                             )
                             
                             self.logger.info(f"Recorded initial outreach email to {lead.get('first_name', '')} {lead.get('last_name', '')} at {lead.get('company_name', '')}")
@@ -674,19 +692,12 @@ class LeadGenerationAutomation:
                 if follow_up_leads:
                     self.logger.info("Processing follow-up emails")
                     
-                    for lead in follow_up_leads:
-                        # Determine the industry
-                        industry = lead.get('industry', '').lower()
-                        template_industry = 'smes'  # Default
+                    for index, lead in enumerate(follow_up_leads):
+                        self.check_cancelled()
+                        self.report_progress(initial_count + index, initial_count + follow_up_count, "Sending follow-up emails")
                         
-                        if 'market' in industry or 'digital' in industry or 'agency' in industry:
-                            template_industry = 'digital_marketing'
-                        elif 'saas' in industry or 'software' in industry or 'tech' in industry:
-                            template_industry = 'saas_companies'
-                        elif 'enterprise' in industry or 'it' in industry or 'information technology' in industry:
-                            template_industry = 'enterprise_it'
-                        elif 'service' in industry or 'plumb' in industry or 'electric' in industry:
-                            template_industry = 'service_businesses'
+                        # Determine the industry from the cached bucket
+                        template_industry = email_generator.classifier.classify_lead(lead)
                         
                         # Determine which follow-up template to use
                         email_count = int(lead.get('email_count', 0))
@@ -698,12 +709,11 @@ class LeadGenerationAutomation:
                         # Generate personalized template
                         template = email_generator.generate_personalized_template(lead, template_type, template_industry)
                         
-                        # Add template to campaign
-                        template_id = self.db.add_email_template(
-                            campaign_id,
+                        # Store the base template once and record only the variables per send
+                        template_id = self.db.get_or_create_email_template(
                             template_type,
-                            template['subject'],
-                            template['body']
+                            template['template']['subject'],
+                            template['template']['body']
                         )
                         
                         if template_id:
@@ -711,7 +721,8 @@ class LeadGenerationAutomation:
                             self.db.record_email_sent(
                                 lead['contact_id'],
                                 template_id,
-                                campaign_id
+                                campaign_id,
+                                template['variables']
                             )
                             
                             self.logger.info(f"Recorded {template_type} email to {lead.get('first_name', '')} {lead.get('last_name', '')} at {lead.get('company_name', '')}")
@@ -723,6 +734,9 @@ class LeadGenerationAutomation:
             self.db.close()
             
             return True
+        except JobCancelled:
+            self.logger.info("Cancelled email outreach process")
+            raise
         except Exception as e:
             self.logger.error(f"Error in email outreach process: {e}")
             return False
@@ -737,135 +751,25 @@ class LeadGenerationAutomation:
                 self.logger.error("Failed to connect to database")
                 return False
             
-            # Get lead statistics
-            lead_count = self.db.get_lead_count()
-            leads_by_status = self.db.get_leads_by_status_count()
-            leads_by_industry = self.db.get_leads_by_industry_count()
-            
-            # Get leads for follow-up
-            follow_up_leads = self.db.get_leads_for_follow_up(7)  # Next 7 days
-            
-            # Create the report
+            reporting = self.config.get('reporting', {})
             report_dir = '/home/ubuntu/lead_generation/automation/reports'
             report_file = f"{report_dir}/lead_generation_report_{self.timestamp}.html"
             
-            with open(report_file, 'w', encoding='utf-8') as f:
-                f.write(f"""<!DOCTYPE html>
-<html>
-<head>
-    <title>Lead Generation Report - {datetime.now().strftime('%Y-%m-%d')}</title>
-    <style>
-        body {{ font-family: Arial, sans-serif; margin: 20px; }}
-        h1, h2 {{ color: #333; }}
-        table {{ border-collapse: collapse; width: 100%; margin-bottom: 20px; }}
-        th, td {{ border: 1px solid #ddd; padding: 8px; text-align: left; }}
-        th {{ background-color: #f2f2f2; }}
-        tr:nth-child(even) {{ background-color: #f9f9f9; }}
-        .summary {{ display: flex; justify-content: space-between; margin-bottom: 20px; }}
-        .summary-box {{ background-color: #f2f2f2; padding: 15px; border-radius: 5px; width: 30%; }}
-        .chart {{ margin-bottom: 20px; }}
-    </style>
-</head>
-<body>
-    <h1>Lead Generation Report</h1>
-    <p>Generated on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
-    
-    <div class="summary">
-        <div class="summary-box">
-            <h3>Total Leads</h3>
-            <p style="font-size: 24px;">{lead_count}</p>
-        </div>
-        <div class="summary-box">
-            <h3>Leads by Status</h3>
-            <p>{', '.join([f"{status}: {count}" for status, count in leads_by_status])}</p>
-        </div>
-        <div class="summary-box">
-            <h3>Top Industries</h3>
-            <p>{', '.join([f"{industry}: {count}" for industry, count in leads_by_industry[:3]])}</p>
-        </div>
-    </div>
-    
-    <h2>Lead Status Breakdown</h2>
-    <table>
-        <tr>
-            <th>Status</th>
-            <th>Count</th>
-            <th>Percentage</th>
-        </tr>
-""")
-                
-                for status, count in leads_by_status:
-                    percentage = (count / lead_count) * 100 if lead_count > 0 else 0
-                    f.write(f"""        <tr>
-            <td>{status}</td>
-            <td>{count}</td>
-            <td>{percentage:.1f}%</td>
-        </tr>
-""")
-                
-                f.write(f"""    </table>
-    
-    <h2>Industry Breakdown</h2>
-    <table>
-        <tr>
-            <th>Industry</th>
-            <th>Count</th>
-            <th>Percentage</th>
-        </tr>
-""")
-                
-                for industry, count in leads_by_industry:
-                    percentage = (count / lead_count) * 100 if lead_count > 0 else 0
-                    f.write(f"""        <tr>
-            <td>{industry}</td>
-            <td>{count}</td>
-            <td>{percentage:.1f}%</td>
-        </tr>
-""")
-                
-                f.write(f"""    </table>
-    
-    <h2>Upcoming Follow-ups ({len(follow_up_leads)})</h2>
-    <table>
-        <tr>
-            <th>Company</th>
-            <th>Contact</th>
-            <th>Status</th>
-            <th>Next Action</th>
-            <th>Next Action Date</th>
-        </tr>
-""")
-                
-                for lead in follow_up_leads:
-                    f.write(f"""        <tr>
-            <td>{lead['company_name']}</td>
-            <td>{lead.get('first_name', '')} {lead.get('last_name', '')}</td>
-            <td>{lead['status']}</td>
-            <td>{lead['next_action']}</td>
-            <td>{lead['next_action_date']}</td>
-        </tr>
-""")
-                
-                f.write(f"""    </table>
-    
-    <h2>Recent Activity</h2>
-    <p>The following actions were performed in the last automation run:</p>
-    <ul>
-        <li>Web scraping: {self.config.get('web_scraping', {}).get('enabled', True)}</li>
-        <li>LinkedIn profile finder: {self.config.get('linkedin_automation', {}).get('profile_finder_enabled', True)}</li>
-        <li>LinkedIn automation: {self.config.get('linkedin_automation', {}).get('enabled', True)}</li>
-        <li>Email outreach: {self.config.get('email_outreach', {}).get('enabled', True)}</li>
-    </ul>
-    
-    <p>For more detailed information, please check the log file: {self.log_file}</p>
-</body>
-</html>""")
+            # Sections come from the rollup tables and are only re-rendered when their inputs change
+            engine = ReportEngine(
+                self.db,
+                report_dir,
+                max_rows=reporting.get('max_table_rows', 100),
+                follow_up_days=reporting.get('follow_up_days', 7)
+            )
+            rendered = engine.generate(report_file, self.config, self.log_file)
             
-            self.logger.info(f"Report generated: {report_file}")
+            self.logger.info(f"Report generated: {report_file} (re-rendered sections: {', '.join(rendered) or 'none'})")
             
-            # Export leads to CSV
-            export_file = f"{report_dir}/leads_export_{self.timestamp}.csv"
-            self.db.export_to_csv(export_file)
+            # Exporting every lead is slow on large databases, so it is opt-in
+            if reporting.get('export_csv', False):
+                export_file = f"{report_dir}/leads_export_{self.timestamp}.csv"
+                self.db.export_to_csv(export_file)
             
             # Close the database connection
             self.db.close()
@@ -897,6 +801,9 @@ class LeadGenerationAutomation:
         web_scraping_result = self.run_web_scraping()
         self.logger.info(f"Web scraping completed: {web_scraping_result}")
         
+        entity_resolution_result = self.run_entity_resolution()
+        self.logger.info(f"Entity resolution completed: {entity_resolution_result}")
+        
         linkedin_profile_finder_result = self.run_linkedin_profile_finder()
         self.logger.info(f"LinkedIn profile finder completed: {linkedin_profile_finder_result}")
         
@@ -913,6 +820,7 @@ class LeadGenerationAutomation:
         
         return {
             'web_scraping': web_scraping_result,
+            'entity_resolution': entity_resolution_result,
             'linkedin_profile_finder': linkedin_profile_finder_result,
             'linkedin_automation': linkedin_automation_result,
             'email_outreach': email_outreach_result,
@@ -938,6 +846,9 @@ def parse_arguments():
     parser.add_argument('--report-only', action='store_true',
                         help='Generate only the report')
     
+    parser.add_argument('--export-csv', action='store_true',
+                        help='Also export all leads to CSV when generating the report')
+    
     parser.add_argument('--setup-database', action='store_true',
                         help='Set up the database with sample data')
     
@@ -956,6 +867,9 @@ def main():
     # Initialize the automation
     automation = LeadGenerationAutomation(args.config)
     
+    if args.export_csv:
+        automation.config['reporting']['export_csv'] = True
+    
     # Set up the database with sample data if requested
     if args.setup_database:
         print("Setting up database with sample data")
@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+Lead Generation Report Engine
+This script renders the HTML lead generation report from the analytics rollups, reusing unchanged sections
+"""
+
+import os
+import sys
+import json
+import html
+import hashlib
+import argparse
+from datetime import datetime, timedelta
+
+# Add the database module to the path
+sys.path.append('/home/ubuntu/lead_generation/database')
+
+from lead_database import LeadDatabase
+
+# Bump when the section markup changes so cached sections are re-rendered
+TEMPLATE_VERSION = 1
+
+# Rows shown in a table before the rest is summarized
+MAX_TABLE_ROWS = 100
+
+SECTIONS = ['summary', 'status', 'industry', 'activity', 'follow_ups', 'automation']
+
+PAGE_HEADER = """<!DOCTYPE html>
+<html>
+<head>
+    <title>Lead Generation Report - {date}</title>
+    <style>
+        body {{ font-family: Arial, sans-serif; margin: 20px; }}
+        h1, h2 {{ color: #333; }}
+        table {{ border-collapse: collapse; width: 100%; margin-bottom: 20px; }}
+        th, td {{ border: 1px solid #ddd; padding: 8px; text-align: left; }}
+        th {{ background-color: #f2f2f2; }}
+        tr:nth-child(even) {{ background-color: #f9f9f9; }}
+        .summary {{ display: flex; justify-content: space-between; margin-bottom: 20px; }}
+        .summary-box {{ background-color: #f2f2f2; padding: 15px; border-radius: 5px; width: 30%; }}
+        .chart {{ margin-bottom: 20px; }}
+        .note {{ color: #666; font-style: italic; }}
+    </style>
+</head>
+<body>
+    <h1>Lead Generation Report</h1>
+    <p>Generated on {generated}</p>
+"""
+
+PAGE_FOOTER = """
+    <p>For more detailed information, please check the log file: {log_file}</p>
+</body>
+</html>"""
+
+def escape(value):
+    """Return a value as HTML-safe text"""
+    return html.escape('' if value is None else str(value))
+
+def render_table(headers, rows):
+    """Render a table from a header list and rows of cell values"""
+    lines = ['    <table>', '        <tr>' + ''.join(f"<th>{escape(header)}</th>" for header in headers) + '</tr>']
+    for row in rows:
+        lines.append('        <tr>' + ''.join(f"<td>{escape(cell)}</td>" for cell in row) + '</tr>')
+    lines.append('    </table>')
+    return '\n'.join(lines) + '\n'
+
+def percentage(count, total):
+    """Format a count as a share of a total"""
+    return f"{(count / total) * 100 if total else 0:.1f}%"
+
+class ReportEngine:
+    """Renders report sections from cheap queries, re-rendering only sections whose inputs changed"""
+
+    def __init__(self, db, report_dir, max_rows=MAX_TABLE_ROWS, follow_up_days=7, cache_file=None):
+        """Initialize the engine with a connected LeadDatabase"""
+        self.db = db
+        self.report_dir = report_dir
+        self.max_rows = max_rows
+        self.follow_up_days = follow_up_days
+        self.cache_file = cache_file or os.path.join(report_dir, 'report_cache.json')
+        self.cache = self.load_cache()
+
+    def load_cache(self):
+        """Load the rendered sections of the previous report"""
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+            if cache.get('version') == TEMPLATE_VERSION:
+                return cache
+        except (OSError, ValueError):
+            pass
+        return {'version': TEMPLATE_VERSION, 'sections': {}}
+
+    def save_cache(self):
+        """Write the rendered sections for the next report, atomically"""
+        temp_file = f"{self.cache_file}.tmp"
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(self.cache, f)
+        os.replace(temp_file, self.cache_file)
+
+    def totals(self):
+        """Return lead_totals grouped by dimension as [(value, count)] sorted by count"""
+        totals = {'all': [], 'status': [], 'industry': []}
+        self.db.cursor.execute('''
+        SELECT dimension, NULLIF(value, '') AS value, count
+        FROM lead_totals
+        WHERE dimension IN ('all', 'status', 'industry') AND count > 0
+        ORDER BY dimension, count DESC, value
+        ''')
+        for dimension, value, count in self.db.cursor.fetchall():
+            totals[dimension].append((value, count))
+        return totals
+
+    def section_inputs(self, config):
+        """Collect the data each section is rendered from
+
+        Every input is bounded: counts come from the rollup tables and row
+        lists are capped, so collecting them stays fast on large databases.
+        """
+        totals = self.totals()
+        lead_count = totals['all'][0][1] if totals['all'] else 0
+
+        start = (datetime.now() - timedelta(days=13)).strftime("%Y-%m-%d")
+        activity = {}
+        rollups = (self.db.get_activity_rollups('day', dimension='channel', start=start) +
+                   self.db.get_activity_rollups('day', metric='leads_created', dimension='source', start=start))
+        for period_start, _, _, metric, count in rollups:
+            day = activity.setdefault(period_start, {})
+            day[metric] = day.get(metric, 0) + count
+
+        follow_up_count = self.db.count_leads_for_follow_up(self.follow_up_days)
+        follow_ups = self.follow_up_rows()
+
+        return {
+            'summary': {'lead_count': lead_count, 'status': totals['status'], 'industry': totals['industry'][:3]},
+            'status': {'lead_count': lead_count, 'rows': totals['status']},
+            'industry': {'lead_count': lead_count, 'rows': totals['industry']},
+            'activity': {'start': start, 'days': activity},
+            'follow_ups': {'count': follow_up_count, 'rows': follow_ups},
+            'automation': {
+                'web_scraping': config.get('web_scraping', {}).get('enabled', True),
+                'profile_finder': config.get('linkedin_automation', {}).get('profile_finder_enabled', True),
+                'linkedin': config.get('linkedin_automation', {}).get('enabled', True),
+                'email': config.get('email_outreach', {}).get('enabled', True)
+            }
+        }
+
+    def follow_up_rows(self):
+        """Return the first follow-ups due, each with its first contact's name"""
+        leads = self.db.get_leads_for_follow_up(self.follow_up_days, limit=self.max_rows)
+        if not leads:
+            return []
+
+        company_ids = [lead['id'] for lead in leads]
+        self.db.cursor.execute(f'''
+        SELECT company_id, COALESCE(first_name, '') || ' ' || COALESCE(last_name, '')
+        FROM contacts
+        WHERE id IN (SELECT MIN(id) FROM contacts WHERE company_id IN ({','.join('?' * len(company_ids))}) GROUP BY company_id)
+        ''', company_ids)
+        contacts = dict(self.db.cursor.fetchall())
+
+        return [
+            [lead['company_name'], contacts.get(lead['id'], '').strip(), lead['status'], lead['next_action'], lead['next_action_date']]
+            for lead in leads
+        ]
+
+    def render_summary(self, data):
+        """Render the headline numbers"""
+        statuses = ', '.join(f"{escape(status)}: {count}" for status, count in data['status'])
+        industries = ', '.join(f"{escape(industry)}: {count}" for industry, count in data['industry'])
+        return f"""
+    <div class="summary">
+        <div class="summary-box">
+            <h3>Total Leads</h3>
+            <p style="font-size: 24px;">{data['lead_count']}</p>
+        </div>
+        <div class="summary-box">
+            <h3>Leads by Status</h3>
+            <p>{statuses}</p>
+        </div>
+        <div class="summary-box">
+            <h3>Top Industries</h3>
+            <p>{industries}</p>
+        </div>
+    </div>
+"""
+
+    def render_breakdown(self, title, label, data):
+        """Render a count table with percentages, folding rows past the cap into one"""
+        rows = data['rows'][:self.max_rows]
+        table = [[value, count, percentage(count, data['lead_count'])] for value, count in rows]
+
+        rest = data['rows'][self.max_rows:]
+        if rest:
+            count = sum(count for _, count in rest)
+            table.append([f"{len(rest)} more", count, percentage(count, data['lead_count'])])
+
+        return f"\n    <h2>{title}</h2>\n" + render_table([label, 'Count', 'Percentage'], table)
+
+    def render_status(self, data):
+        """Render the status breakdown"""
+        return self.render_breakdown('Lead Status Breakdown', 'Status', data)
+
+    def render_industry(self, data):
+        """Render the industry breakdown"""
+        return self.render_breakdown('Industry Breakdown', 'Industry', data)
+
+    def render_activity(self, data):
+        """Render daily activity counters for the last two weeks"""
+        days = data['days']
+        metrics = sorted({metric for counts in days.values() for metric in counts})
+        if not metrics:
+            return "\n    <h2>Activity (Last 14 Days)</h2>\n    <p class=\"note\">No activity recorded.</p>\n"
+
+        rows = [[day] + [days[day].get(metric, 0) for metric in metrics] for day in sorted(days, reverse=True)]
+        return "\n    <h2>Activity (Last 14 Days)</h2>\n" + render_table(['Date'] + metrics, rows)
+
+    def render_follow_ups(self, data):
+        """Render the follow-ups due, capped at max_rows"""
+        section = f"\n    <h2>Upcoming Follow-ups ({data['count']})</h2>\n"
+        section += render_table(['Company', 'Contact', 'Status', 'Next Action', 'Next Action Date'], data['rows'])
+        if data['count'] > len(data['rows']):
+            section += (f"    <p class=\"note\">Showing the first {len(data['rows'])} of {data['count']} follow-ups; "
+                        f"use the leads export or the API for the full list.</p>\n")
+        return section
+
+    def render_automation(self, data):
+        """Render which automation components are enabled"""
+        return f"""
+    <h2>Recent Activity</h2>
+    <p>The following actions were performed in the last automation run:</p>
+    <ul>
+        <li>Web scraping: {data['web_scraping']}</li>
+        <li>LinkedIn profile finder: {data['profile_finder']}</li>
+        <li>LinkedIn automation: {data['linkedin']}</li>
+        <li>Email outreach: {data['email']}</li>
+    </ul>
+"""
+
+    def generate(self, report_file, config=None, log_file=''):
+        """Write the report and return the names of the sections that were re-rendered"""
+        inputs = self.section_inputs(config or {})
+        cached = self.cache['sections']
+        rendered = []
+
+        for name in SECTIONS:
+            fingerprint = hashlib.sha1(json.dumps(inputs[name], sort_keys=True, default=str).encode('utf-8')).hexdigest()
+            if cached.get(name, {}).get('fingerprint') != fingerprint:
+                cached[name] = {'fingerprint': fingerprint, 'html': getattr(self, f"render_{name}")(inputs[name])}
+                rendered.append(name)
+
+        now = datetime.now()
+        temp_file = f"{report_file}.tmp"
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            f.write(PAGE_HEADER.format(date=now.strftime('%Y-%m-%d'), generated=now.strftime('%Y-%m-%d %H:%M:%S')))
+            f.write(''.join(cached[name]['html'] for name in SECTIONS))
+            f.write(PAGE_FOOTER.format(log_file=escape(log_file)))
+        os.replace(temp_file, report_file)
+
+        if rendered:
+            self.save_cache()
+        return rendered
+
+def parse_arguments():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Lead Generation Report Engine')
+
+    parser.add_argument('--db-path', type=str,
+                        default='/home/ubuntu/lead_generation/database/leads.db',
+                        help='Path to the SQLite database')
+
+    parser.add_argument('--report-dir', type=str,
+                        default='/home/ubuntu/lead_generation/automation/reports',
+                        help='Directory for reports and the section cache')
+
+    parser.add_argument('--max-rows', type=int, default=MAX_TABLE_ROWS,
+                        help=f"Rows shown per table (default: {MAX_TABLE_ROWS})")
+
+    parser.add_argument('--force', action='store_true',
+                        help='Re-render every section, ignoring the cache')
+
+    parser.add_argument('--export-csv', action='store_true',
+                        help='Also export all leads to CSV')
+
+    return parser.parse_args()
+
+def main():
+    """Main function to run the report engine"""
+    args = parse_arguments()
+
+    db = LeadDatabase(args.db_path)
+    if not db.connect():
+        return 1
+
+    os.makedirs(args.report_dir, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+    engine = ReportEngine(db, args.report_dir, args.max_rows)
+    if args.force:
+        engine.cache['sections'] = {}
+
+    report_file = os.path.join(args.report_dir, f"lead_generation_report_{timestamp}.html")
+    rendered = engine.generate(report_file)
+    print(f"Report generated: {report_file} (re-rendered: {', '.join(rendered) or 'none'})")
+
+    if args.export_csv:
+        db.export_to_csv(os.path.join(args.report_dir, f"leads_export_{timestamp}.csv"))
+
+    db.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,445 @@
+#!/usr/bin/env python3
+"""
+Company Entity Resolution
+This script finds duplicate companies through a blocking index and merges them into one surviving record
+"""
+
+import re
+import sys
+import time
+import argparse
+from urllib.parse import urlparse
+
+# Add the web scraping module to the path
+sys.path.append('/home/ubuntu/lead_generation/web_scraping')
+
+from utils import normalize_company_name
+from lead_importer import COMPANY_FIELDS, MAX_PARAMETERS, contact_key, batches
+
+# Minimum Dice similarity of name trigrams for a fuzzy match
+NAME_SIMILARITY = 0.85
+
+# Blocks larger than this are too generic to compare pairwise and are skipped,
+# which keeps candidate generation close to linear in the number of companies
+MAX_BLOCK_SIZE = 50
+
+# Length of the leading and trailing name q-grams used as blocking keys
+QGRAM_SIZE = 4
+
+# Rows written to the blocking table per statement
+KEY_BATCH_SIZE = 10000
+
+# Duplicate clusters merged per transaction
+MERGE_BATCH_SIZE = 200
+
+# Hosts shared by many companies, such as directory profiles, which say nothing about identity
+SHARED_DOMAINS = {
+    'clutch.co', 'goodfirms.co', 'g2.com', 'linkedin.com', 'facebook.com', 'twitter.com', 'x.com',
+    'instagram.com', 'youtube.com', 'google.com', 'sites.google.com', 'wix.com', 'wixsite.com',
+    'wordpress.com', 'squarespace.com', 'github.io', 'medium.com', 'yelp.com', 'crunchbase.com'
+}
+
+DOMAIN_PATTERN = re.compile(r'^[a-z0-9-]+(\.[a-z0-9-]+)+$')
+
+SOUNDEX_CODES = {
+    **dict.fromkeys('bfpv', '1'), **dict.fromkeys('cgjkqsxz', '2'), **dict.fromkeys('dt', '3'),
+    'l': '4', **dict.fromkeys('mn', '5'), 'r': '6'
+}
+
+def canonical_domain(website):
+    """Return a website's registrable host in lowercase without scheme, www, port or path"""
+    website = (website or '').strip().lower()
+    if not website or website == 'n/a':
+        return ''
+    if '://' not in website:
+        website = f"http://{website}"
+    try:
+        host = urlparse(website).hostname or ''
+    except ValueError:
+        return ''
+    host = host.rstrip('.')
+    if host.startswith('www.'):
+        host = host[4:]
+    return host if DOMAIN_PATTERN.match(host) else ''
+
+def company_domain(name, website):
+    """Return a company's identifying domain: its website's, or its name's when the name is a bare domain"""
+    domain = canonical_domain(website)
+    if not domain and name and ' ' not in name.strip() and '.' in name:
+        domain = canonical_domain(name)
+    return '' if domain in SHARED_DOMAINS else domain
+
+def name_key(name):
+    """Return a company name reduced to lowercase words, without legal suffixes or a domain's TLD"""
+    name = (name or '').strip()
+    if not name or name.upper() == 'N/A':
+        return ''
+
+    # Names scraped as a bare domain, such as "acme.com/", reduce to their first label
+    domain = canonical_domain(name) if ' ' not in name and '.' in name else ''
+    if domain:
+        name = domain.split('.')[0]
+
+    name = normalize_company_name(name).lower().replace('&', ' and ')
+    return ' '.join(re.findall(r'[a-z0-9]+', name))
+
+def soundex(word):
+    """Return the Soundex code of a word"""
+    code = word[0].upper()
+    last = SOUNDEX_CODES.get(word[0], '')
+    for letter in word[1:]:
+        digit = SOUNDEX_CODES.get(letter, '')
+        if digit and digit != last:
+            code += digit
+        if letter not in 'hw':
+            last = digit
+    return (code + '000')[:4]
+
+def phonetic_key(key):
+    """Return the Soundex codes of the first two words of a name key"""
+    words = [word for word in key.split() if word.isalpha()][:2]
+    return ''.join(soundex(word) for word in words)
+
+def trigrams(key):
+    """Return the set of character trigrams of a name key"""
+    compact = f" {key.replace(' ', '')} "
+    return {compact[i:i + 3] for i in range(len(compact) - 2)}
+
+def similarity(left, right):
+    """Return the Dice coefficient of two trigram sets"""
+    if not left or not right:
+        return 0.0
+    return 2 * len(left & right) / (len(left) + len(right))
+
+def blocking_keys(key, domain):
+    """Return the blocking keys of a company: its domain, name, phonetic key and edge q-grams"""
+    keys = []
+    if domain:
+        keys.append(f"d:{domain}")
+    compact = key.replace(' ', '')
+    if len(compact) >= 2:
+        keys.append(f"n:{compact}")
+        phonetic = phonetic_key(key)
+        if phonetic:
+            keys.append(f"p:{phonetic}")
+        if len(compact) > QGRAM_SIZE:
+            keys.append(f"q:<{compact[:QGRAM_SIZE]}")
+            keys.append(f"q:>{compact[-QGRAM_SIZE:]}")
+    return keys
+
+class Clusters:
+    """Union-find over company ids that never joins records with different domains"""
+
+    def __init__(self):
+        self.parent = {}
+        self.domain = {}
+
+    def find(self, company_id):
+        """Return the root of a company's cluster"""
+        root = company_id
+        while self.parent.get(root, root) != root:
+            root = self.parent[root]
+        while company_id != root:
+            self.parent[company_id], company_id = root, self.parent[company_id]
+        return root
+
+    def union(self, left, right, left_domain='', right_domain=''):
+        """Join two companies' clusters unless their domains conflict; return whether they are joined"""
+        left, right = self.find(left), self.find(right)
+        if left == right:
+            return True
+
+        left_domain = self.domain.get(left) or left_domain
+        right_domain = self.domain.get(right) or right_domain
+        if left_domain and right_domain and left_domain != right_domain:
+            return False
+
+        # The oldest record is the root, and survives the merge
+        if right < left:
+            left, right = right, left
+        self.parent[right] = left
+        self.parent.setdefault(left, left)
+        self.domain[left] = left_domain or right_domain
+        self.domain.pop(right, None)
+        return True
+
+    def groups(self):
+        """Return the clusters with more than one company as lists of ids, oldest first"""
+        groups = {}
+        for company_id in self.parent:
+            groups.setdefault(self.find(company_id), []).append(company_id)
+        return [sorted(ids) for ids in groups.values() if len(ids) > 1]
+
+class EntityResolver:
+    """Finds duplicate companies with a blocking index and merges each cluster into its oldest record"""
+
+    def __init__(self, db, threshold=NAME_SIMILARITY, max_block_size=MAX_BLOCK_SIZE):
+        """Initialize the resolver with a connected LeadDatabase"""
+        self.db = db
+        self.threshold = threshold
+        self.max_block_size = max_block_size
+        self.stats = {}
+
+        self.cursor = db.conn.cursor()
+        self.cursor.row_factory = None
+
+    def build_blocks(self):
+        """Fill the blocking table with (key, company) rows for every company"""
+        self.cursor.execute('''
+        CREATE TEMP TABLE IF NOT EXISTS er_blocks (
+            key TEXT,
+            company_id INTEGER,
+            name_key TEXT,
+            domain TEXT
+        )
+        ''')
+        self.cursor.execute("DELETE FROM er_blocks")
+
+        reader = self.db.conn.cursor()
+        reader.row_factory = None
+        reader.execute("SELECT id, company_name, website FROM companies")
+
+        rows = []
+        for company_id, company_name, website in reader:
+            self.stats['companies'] += 1
+            key = name_key(company_name)
+            domain = company_domain(company_name, website)
+            rows.extend((block, company_id, key, domain) for block in blocking_keys(key, domain))
+            if len(rows) >= KEY_BATCH_SIZE:
+                self.cursor.executemany("INSERT INTO er_blocks VALUES (?, ?, ?, ?)", rows)
+                rows = []
+        if rows:
+            self.cursor.executemany("INSERT INTO er_blocks VALUES (?, ?, ?, ?)", rows)
+
+    def blocks(self):
+        """Yield (key, members) for each block with more than one company"""
+        self.cursor.execute("SELECT key, company_id, name_key, domain FROM er_blocks ORDER BY key")
+        key, members = None, []
+        for row in self.cursor:
+            if row[0] != key:
+                if len(members) > 1:
+                    yield key, members
+                key, members = row[0], []
+            members.append(row[1:])
+        if len(members) > 1:
+            yield key, members
+
+    def find_clusters(self):
+        """Return the duplicate clusters as lists of company ids, oldest first"""
+        self.build_blocks()
+        clusters = Clusters()
+        grams = {}
+
+        for key, members in self.blocks():
+            self.stats['blocks'] += 1
+
+            # Companies sharing a domain are the same company
+            if key.startswith('d:'):
+                first = members[0]
+                for member in members[1:]:
+                    clusters.union(first[0], member[0], first[2], member[2])
+                continue
+
+            if len(members) > self.max_block_size:
+                self.stats['skipped_blocks'] += 1
+                continue
+
+            # The same name is the same company unless the records name different websites
+            if key.startswith('n:'):
+                if len({domain for _, _, domain in members if domain}) <= 1:
+                    first = members[0]
+                    for member in members[1:]:
+                        clusters.union(first[0], member[0], first[2], member[2])
+                continue
+
+            for index, (left_id, left_key, left_domain) in enumerate(members):
+                left_grams = grams.get(left_key) or grams.setdefault(left_key, trigrams(left_key))
+                for right_id, right_key, right_domain in members[index + 1:]:
+                    if left_key == right_key or (left_domain and right_domain and left_domain != right_domain):
+                        continue
+                    self.stats['comparisons'] += 1
+                    right_grams = grams.get(right_key) or grams.setdefault(right_key, trigrams(right_key))
+                    if similarity(left_grams, right_grams) >= self.threshold:
+                        clusters.union(left_id, right_id, left_domain, right_domain)
+
+        self.cursor.execute("DELETE FROM er_blocks")
+        self.db.conn.commit()
+        return clusters.groups()
+
+    def merge(self, company_ids):
+        """Merge a cluster of companies into its first, oldest record"""
+        survivor, duplicates = company_ids[0], company_ids[1:]
+        placeholders = ','.join('?' * len(duplicates))
+
+        # Fill the survivor's empty fields from the duplicates, oldest first
+        fields = [field for field in COMPANY_FIELDS if field != 'company_name']
+        self.cursor.execute(
+            f"SELECT id, {', '.join(fields)} FROM companies WHERE id IN ({','.join('?' * len(company_ids))}) ORDER BY id",
+            company_ids
+        )
+        records = self.cursor.fetchall()
+        if not records or records[0][0] != survivor:
+            return False
+        values = dict(zip(fields, records[0][1:]))
+        updates = {}
+        for record in records[1:]:
+            for field, value in zip(fields, record[1:]):
+                if value not in (None, '', 'N/A', 'Unknown') and values[field] in (None, '', 'N/A', 'Unknown') \
+                        and field not in updates:
+                    updates[field] = value
+        if updates:
+            self.cursor.execute(
+                f"UPDATE companies SET {', '.join(f'{field} = ?' for field in updates)}, "
+                f"updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+                list(updates.values()) + [survivor]
+            )
+
+        self.merge_contacts(survivor, duplicates)
+
+        self.cursor.execute(f"UPDATE interactions SET company_id = ? WHERE company_id IN ({placeholders})",
+                            [survivor] + duplicates)
+        self.cursor.execute(f"UPDATE OR IGNORE company_tags SET company_id = ? WHERE company_id IN ({placeholders})",
+                            [survivor] + duplicates)
+        self.cursor.execute(f"DELETE FROM company_tags WHERE company_id IN ({placeholders})", duplicates)
+
+        self.merge_status(survivor, duplicates)
+
+        self.cursor.execute(f"DELETE FROM lead_score_queue WHERE company_id IN ({placeholders})", duplicates)
+        self.cursor.execute("INSERT OR IGNORE INTO lead_score_queue (company_id) VALUES (?)", (survivor,))
+        self.cursor.execute(f"DELETE FROM companies WHERE id IN ({placeholders})", duplicates)
+
+        self.stats['merged'] += len(duplicates)
+        return True
+
+    def merge_contacts(self, survivor, duplicates):
+        """Move the duplicates' contacts to the survivor, folding contacts that are the same person"""
+        company_ids = [survivor] + duplicates
+        self.cursor.execute(f'''
+        SELECT id, company_id, COALESCE(first_name, ''), COALESCE(last_name, ''), COALESCE(email, ''), COALESCE(phone, '')
+        FROM contacts
+        WHERE company_id IN ({','.join('?' * len(company_ids))})
+        ORDER BY company_id != ?, id
+        ''', company_ids + [survivor])
+
+        kept = {}
+        folded = []
+        for contact_id, company_id, first_name, last_name, email, phone in self.cursor.fetchall():
+            key = contact_key({'first_name': first_name, 'last_name': last_name, 'email': email, 'phone': phone})
+            if key in kept:
+                folded.append((kept[key], contact_id))
+            else:
+                kept[key] = contact_id
+
+        # Tracking and interactions follow the contact that is kept
+        for table in ('email_tracking', 'linkedin_tracking', 'interactions'):
+            self.cursor.executemany(f"UPDATE {table} SET contact_id = ? WHERE contact_id = ?", folded)
+        for batch in batches([contact_id for _, contact_id in folded], MAX_PARAMETERS):
+            self.cursor.execute(f"DELETE FROM contacts WHERE id IN ({','.join('?' * len(batch))})", batch)
+
+        self.cursor.execute(f"UPDATE contacts SET company_id = ? WHERE company_id IN ({','.join('?' * len(duplicates))})",
+                            [survivor] + duplicates)
+        self.stats['contacts_folded'] += len(folded)
+
+    def merge_status(self, survivor, duplicates):
+        """Keep one lead status: the most recently updated one past 'New', with the outreach counters combined"""
+        company_ids = [survivor] + duplicates
+        placeholders = ','.join('?' * len(company_ids))
+        self.cursor.execute(f'''
+        SELECT id FROM lead_status
+        WHERE company_id IN ({placeholders})
+        ORDER BY status = 'New', updated_at DESC, company_id != ?, id
+        LIMIT 1
+        ''', company_ids + [survivor])
+        row = self.cursor.fetchone()
+        if not row:
+            return
+
+        self.cursor.execute(f'''
+        SELECT COALESCE(SUM(emails_sent), 0), COALESCE(SUM(linkedin_actions), 0),
+               MAX(last_contacted), MAX(last_email_at), MAX(last_linkedin_at)
+        FROM lead_status WHERE company_id IN ({placeholders})
+        ''', company_ids)
+        emails_sent, linkedin_actions, last_contacted, last_email_at, last_linkedin_at = self.cursor.fetchone()
+
+        self.cursor.execute(f"DELETE FROM lead_status WHERE company_id IN ({placeholders}) AND id != ?",
+                            company_ids + [row[0]])
+        self.cursor.execute('''
+        UPDATE lead_status SET company_id = ?, emails_sent = ?, linkedin_actions = ?,
+            last_contacted = ?, last_email_at = ?, last_linkedin_at = ?
+        WHERE id = ?
+        ''', (survivor, emails_sent, linkedin_actions, last_contacted, last_email_at, last_linkedin_at, row[0]))
+
+    def run(self, dry_run=False):
+        """Find and merge duplicate companies; return the run stats and the clusters found"""
+        self.stats = {
+            'companies': 0, 'blocks': 0, 'skipped_blocks': 0, 'comparisons': 0,
+            'clusters': 0, 'merged': 0, 'contacts_folded': 0, 'elapsed': 0.0
+        }
+        start = time.time()
+
+        clusters = self.find_clusters()
+        self.stats['clusters'] = len(clusters)
+
+        if not dry_run:
+            try:
+                for offset in range(0, len(clusters), MERGE_BATCH_SIZE):
+                    self.cursor.execute("BEGIN IMMEDIATE")
+                    for company_ids in clusters[offset:offset + MERGE_BATCH_SIZE]:
+                        self.merge(company_ids)
+                    self.db.conn.commit()
+            except Exception:
+                self.db.conn.rollback()
+                raise
+
+        self.stats['elapsed'] = round(time.time() - start, 2)
+        return self.stats, clusters
+
+def parse_arguments():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Company Entity Resolution')
+
+    parser.add_argument('--db-path', type=str,
+                        default='/home/ubuntu/lead_generation/database/leads.db',
+                        help='Path to the SQLite database file')
+
+    parser.add_argument('--threshold', type=float, default=NAME_SIMILARITY,
+                        help=f"Minimum name similarity for a fuzzy match (default: {NAME_SIMILARITY})")
+
+    parser.add_argument('--dry-run', action='store_true',
+                        help='List the duplicate clusters without merging them')
+
+    return parser.parse_args()
+
+def main():
+    """Main function to run entity resolution"""
+    args = parse_arguments()
+
+    from lead_database import LeadDatabase
+
+    db = LeadDatabase(args.db_path)
+    if not db.connect():
+        return 1
+    db.create_tables()
+
+    resolver = EntityResolver(db, args.threshold)
+    stats, clusters = resolver.run(args.dry_run)
+
+    if args.dry_run:
+        for company_ids in clusters[:50]:
+            resolver.cursor.execute(
+                f"SELECT id, company_name, website FROM companies WHERE id IN ({','.join('?' * len(company_ids))}) ORDER BY id",
+                company_ids
+            )
+            print(' | '.join(f"{company_id}: {name} ({website or '-'})" for company_id, name, website in resolver.cursor.fetchall()))
+        if len(clusters) > 50:
+            print(f"... and {len(clusters) - 50} more clusters")
+
+    print(f"Found {stats['clusters']} duplicate clusters among {stats['companies']} companies "
+          f"({stats['comparisons']} comparisons, {stats['skipped_blocks']} oversized blocks skipped); "
+          f"merged {stats['merged']} companies and folded {stats['contacts_folded']} contacts in {stats['elapsed']}s")
+
+    db.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
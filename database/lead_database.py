@@ -9,9 +9,159 @@ import sys
 import sqlite3
 import csv
 import json
+import hashlib
 from datetime import datetime, timedelta
 import argparse
 import random
+import re
+
+from lead_importer import LeadImporter
+
+SEARCH_TOKEN_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+# Contact names and emails of a company, flattened into one searchable column
+SEARCH_CONTACTS_SQL = '''
+(SELECT group_concat(COALESCE(first_name, '') || ' ' || COALESCE(last_name, '') || ' ' || COALESCE(email, ''), ' ')
+ FROM contacts WHERE company_id = {company_id})
+'''
+
+# Outreach counters recomputed from the interaction and tracking history of {company_id}
+OUTREACH_COUNTERS_SQL = '''
+emails_sent = (
+    SELECT COUNT(*) FROM interactions i
+    WHERE i.company_id = {company_id}
+    AND i.interaction_type = 'Email Sent'
+),
+linkedin_actions = (
+    SELECT COUNT(*) FROM interactions i
+    WHERE i.company_id = {company_id}
+    AND i.channel = 'LinkedIn'
+),
+last_email_at = (
+    SELECT MAX(sent_at) FROM (
+        SELECT i.interaction_date AS sent_at FROM interactions i
+        WHERE i.company_id = {company_id}
+        AND i.interaction_type = 'Email Sent'
+        UNION ALL
+        SELECT et.sent_date FROM email_tracking et
+        JOIN contacts ct ON et.contact_id = ct.id
+        WHERE ct.company_id = {company_id}
+    )
+),
+last_linkedin_at = (
+    SELECT MAX(sent_at) FROM (
+        SELECT i.interaction_date AS sent_at FROM interactions i
+        WHERE i.company_id = {company_id}
+        AND i.channel = 'LinkedIn'
+        UNION ALL
+        SELECT COALESCE(lt.message_sent_date, lt.connection_sent_date) FROM linkedin_tracking lt
+        JOIN contacts ct ON lt.contact_id = ct.id
+        WHERE ct.company_id = {company_id}
+    )
+)
+'''
+
+# Bucket expressions for the activity rollups; weeks start on Monday. Every
+# bucket is in local time, the clock the event dates are written in.
+ROLLUP_PERIODS = {
+    'day': "COALESCE(date({date}), date('now', 'localtime'))",
+    'week': "COALESCE(date({date}, 'weekday 0', '-6 days'), date('now', 'localtime', 'weekday 0', '-6 days'))"
+}
+
+# Activity counted per period: table -> (date, dimension, value, metric, condition).
+# {row} is NEW inside triggers and the table itself when rebuilding. A row is
+# counted on insert when its condition holds, and on update when its condition
+# starts to hold, so tracking flags are counted once when they are set.
+ROLLUP_SOURCES = {
+    'companies': [
+        # created_at defaults to CURRENT_TIMESTAMP, which is UTC
+        ("datetime({row}.created_at, 'localtime')", 'industry', '{row}.industry', "'leads_created'", '1'),
+        ("datetime({row}.created_at, 'localtime')", 'source', '{row}.source', "'leads_created'", '1')
+    ],
+    'interactions': [
+        ('{row}.interaction_date', 'channel', '{row}.channel', '{row}.interaction_type', '1'),
+        ('{row}.interaction_date', 'industry',
+         '(SELECT industry FROM companies WHERE id = {row}.company_id)', '{row}.interaction_type', '1'),
+        ('{row}.interaction_date', 'source',
+         '(SELECT source FROM companies WHERE id = {row}.company_id)', '{row}.interaction_type', '1')
+    ],
+    'email_tracking': [
+        ('{row}.sent_date', 'email_campaign', '{row}.campaign_id', "'email_sent'", '{row}.sent_date IS NOT NULL'),
+        ('{row}.opened_date', 'email_campaign', '{row}.campaign_id', "'email_opened'", 'COALESCE({row}.opened, 0)'),
+        ('{row}.clicked_date', 'email_campaign', '{row}.campaign_id', "'email_clicked'", 'COALESCE({row}.clicked, 0)'),
+        ('{row}.replied_date', 'email_campaign', '{row}.campaign_id', "'email_replied'", 'COALESCE({row}.replied, 0)')
+    ],
+    'linkedin_tracking': [
+        ('{row}.connection_sent_date', 'linkedin_campaign', '{row}.campaign_id', "'connection_sent'",
+         'COALESCE({row}.connection_sent, 0)'),
+        ('{row}.connection_accepted_date', 'linkedin_campaign', '{row}.campaign_id', "'connection_accepted'",
+         'COALESCE({row}.connection_accepted, 0)'),
+        ('{row}.message_sent_date', 'linkedin_campaign', '{row}.campaign_id', "'message_sent'",
+         'COALESCE({row}.message_sent, 0)'),
+        ('{row}.replied_date', 'linkedin_campaign', '{row}.campaign_id', "'linkedin_replied'",
+         'COALESCE({row}.replied, 0)')
+    ]
+}
+
+# Snapshot totals: table -> (dimension, value) counted once per row
+TOTAL_SOURCES = {
+    'companies': [('all', "''"), ('industry', '{row}.industry'), ('source', '{row}.source')],
+    'lead_status': [('status', '{row}.status')]
+}
+
+def rollup_upsert_sql(period, date, dimension, value, metric, condition='1', delta=1):
+    """Return a statement adding delta to one activity rollup counter"""
+    return f'''
+    INSERT INTO activity_rollups (period, period_start, dimension, value, metric, count)
+    SELECT '{period}', {ROLLUP_PERIODS[period].format(date=date)}, '{dimension}',
+           COALESCE(CAST({value} AS TEXT), ''), {metric}, {delta}
+    WHERE {condition}
+    ON CONFLICT (period, period_start, dimension, value, metric)
+    DO UPDATE SET count = count + excluded.count;
+    '''
+
+def activity_rollups_query(period='day', metric=None, dimension=None, start=None, end=None, limit=None):
+    """Return the SQL and parameters selecting activity counters, optionally filtered and limited"""
+    query = '''
+    SELECT period_start, dimension, NULLIF(value, '') AS value, metric, count
+    FROM activity_rollups
+    WHERE period = ?
+    '''
+    params = [period]
+
+    for column, value, operator in [
+        ('metric', metric, '='),
+        ('dimension', dimension, '='),
+        ('period_start', start, '>='),
+        ('period_start', end, '<=')
+    ]:
+        if value:
+            query += f" AND {column} {operator} ?"
+            params.append(value)
+
+    query += " ORDER BY period_start, dimension, value, metric"
+    if limit:
+        query += " LIMIT ?"
+        params.append(limit)
+
+    return query, params
+
+def total_upsert_sql(dimension, value, delta):
+    """Return a statement adding delta to one snapshot total"""
+    return f'''
+    INSERT INTO lead_totals (dimension, value, count)
+    VALUES ('{dimension}', COALESCE(CAST({value} AS TEXT), ''), {delta})
+    ON CONFLICT (dimension, value) DO UPDATE SET count = count + excluded.count;
+    '''
+
+def fts_query(text, column=None):
+    """Turn free text into an FTS5 query matching every word as a prefix"""
+    tokens = SEARCH_TOKEN_PATTERN.findall(text or '')
+    if not tokens:
+        return None
+
+    query = ' '.join(f'"{token}"*' for token in tokens)
+    return f"{column} : ({query})" if column else query
 
 class LeadDatabase:
     def __init__(self, db_path=None):
@@ -23,6 +173,9 @@ class LeadDatabase:
         self.conn = None
         self.cursor = None
         
+        # Cache of base email template IDs keyed by content hash
+        self.template_ids = {}
+        
         # Ensure the directory exists
         os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
     
@@ -108,6 +261,10 @@ class LeadDatabase:
                 next_action TEXT,
                 next_action_date TIMESTAMP,
                 assigned_to TEXT,
+                emails_sent INTEGER DEFAULT 0,
+                linkedin_actions INTEGER DEFAULT 0,
+                last_email_at TIMESTAMP,
+                last_linkedin_at TIMESTAMP,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 FOREIGN KEY (company_id) REFERENCES companies (id)
@@ -238,69 +395,587 @@ class LeadDatabase:
             self.cursor.execute('CREATE INDEX IF NOT EXISTS idx_companies_industry ON companies (industry)')
             self.cursor.execute('CREATE INDEX IF NOT EXISTS idx_contacts_company_id ON contacts (company_id)')
             self.cursor.execute('CREATE INDEX IF NOT EXISTS idx_lead_status_company_id ON lead_status (company_id)')
-            self.cursor.execute('CREATE INDEX IF NOT EXISTS idx_lead_status_status ON lead_status (status)')
+            # Outreach selection streams each status in score order; the index also serves plain status lookups
+            self.cursor.execute('DROP INDEX IF EXISTS idx_lead_status_status')
+            # Legacy rows have NULL scores, which rank as 0; rebuild an index made on the bare column
+            self.cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'index' AND name = 'idx_lead_status_priority'")
+            row = self.cursor.fetchone()
+            if row and 'COALESCE' not in row[0]:
+                self.cursor.execute('DROP INDEX idx_lead_status_priority')
+            self.cursor.execute('CREATE INDEX IF NOT EXISTS idx_lead_status_priority ON lead_status (status, COALESCE(score, 0) DESC, next_action_date)')
             self.cursor.execute('CREATE INDEX IF NOT EXISTS idx_interactions_company_id ON interactions (company_id)')
             self.cursor.execute('CREATE INDEX IF NOT EXISTS idx_interactions_contact_id ON interactions (contact_id)')
-            
+
+            # Keyset pagination orders by (column, id) for the API's sortable columns
+            self.cursor.execute('CREATE INDEX IF NOT EXISTS idx_companies_company_name ON companies (company_name, id)')
+            self.cursor.execute('CREATE INDEX IF NOT EXISTS idx_companies_created_at ON companies (created_at, id)')
+
+            # Due follow-ups are read soonest first by the report
+            self.cursor.execute('CREATE INDEX IF NOT EXISTS idx_lead_status_next_action_date ON lead_status (next_action_date)')
+
+            # Add outreach counter columns to databases created before they existed
+            counters_added = False
+            for column, definition in [
+                ('emails_sent', 'INTEGER DEFAULT 0'),
+                ('linkedin_actions', 'INTEGER DEFAULT 0'),
+                ('last_email_at', 'TIMESTAMP'),
+                ('last_linkedin_at', 'TIMESTAMP')
+            ]:
+                if self.add_column_if_missing('lead_status', column, definition):
+                    counters_added = True
+
+            # Content-addressed base templates and compact per-send variables
+            self.add_column_if_missing('email_templates', 'content_hash', 'TEXT')
+            self.add_column_if_missing('email_tracking', 'variables', 'TEXT')
+            self.cursor.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_email_templates_content_hash ON email_templates (content_hash)')
+
+            # Cached template industry bucket, filled in by update_industry_buckets
+            self.add_column_if_missing('companies', 'industry_bucket', 'TEXT')
+            self.cursor.execute('CREATE INDEX IF NOT EXISTS idx_companies_industry_bucket ON companies (industry_bucket)')
+
+            # Detected website technologies, a lead scoring feature
+            self.add_column_if_missing('companies', 'technologies', 'TEXT')
+
+            # How a contact's email was obtained; 'pattern' marks an address guessed from the domain's pattern
+            self.add_column_if_missing('contacts', 'email_source', 'TEXT')
+            # 'email' marks a name taken from a first.last address rather than given
+            self.add_column_if_missing('contacts', 'name_source', 'TEXT')
+            self.cursor.execute('CREATE INDEX IF NOT EXISTS idx_email_tracking_contact_id ON email_tracking (contact_id)')
+
+            self.create_outreach_triggers()
+
+            # Leads whose score inputs changed, queued for lead_scoring
+            self.create_score_queue()
+
+            # Full-text index for lead search, backfilled when it is first created
+            search_index_created = self.create_search_index()
+
+            # Dashboard rollups, likewise backfilled when they are first created
+            rollups_created = self.create_rollup_tables()
+
             self.conn.commit()
+
+            if search_index_created:
+                self.rebuild_search_index()
+
+            if rollups_created:
+                self.rebuild_rollups()
+
+            # Backfill the counters from history when they were just added
+            if counters_added:
+                self.rebuild_outreach_counters()
+
             print("Database tables created successfully")
             return True
         except sqlite3.Error as e:
             print(f"Error creating tables: {e}")
             return False
+
+    def add_column_if_missing(self, table, column, definition):
+        """Add a column to an existing table, returning True if it was added"""
+        self.cursor.execute(f"PRAGMA table_info({table})")
+        existing_columns = [row[1] for row in self.cursor.fetchall()]
+
+        if column in existing_columns:
+            return False
+
+        self.cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+        return True
+
+    def create_outreach_triggers(self):
+        """Create the triggers that keep the lead_status outreach counters up to date"""
+        # Counters are driven by the interactions table, which every outreach path
+        # writes to. The tracking tables only refresh the last-contact timestamps so
+        # that a send recorded in both places is not counted twice.
+        triggers = {
+            'trg_interactions_outreach_counters': '''
+            CREATE TRIGGER trg_interactions_outreach_counters
+            AFTER INSERT ON interactions
+            WHEN NEW.interaction_type = 'Email Sent' OR NEW.channel = 'LinkedIn'
+            BEGIN
+                UPDATE lead_status SET
+                    emails_sent = COALESCE(emails_sent, 0)
+                        + (NEW.interaction_type = 'Email Sent'),
+                    linkedin_actions = COALESCE(linkedin_actions, 0)
+                        + (NEW.channel = 'LinkedIn'),
+                    last_email_at = CASE
+                        WHEN NEW.interaction_type = 'Email Sent'
+                             AND (last_email_at IS NULL OR NEW.interaction_date > last_email_at)
+                        THEN NEW.interaction_date ELSE last_email_at END,
+                    last_linkedin_at = CASE
+                        WHEN NEW.channel = 'LinkedIn'
+                             AND (last_linkedin_at IS NULL OR NEW.interaction_date > last_linkedin_at)
+                        THEN NEW.interaction_date ELSE last_linkedin_at END
+                WHERE company_id = NEW.company_id;
+            END
+            ''',
+            # A lead status created after its first interactions, as bulk writers
+            # do, starts from the history the interaction trigger could not reach
+            'trg_lead_status_outreach_counters': f'''
+            CREATE TRIGGER trg_lead_status_outreach_counters
+            AFTER INSERT ON lead_status
+            BEGIN
+                UPDATE lead_status SET
+                {OUTREACH_COUNTERS_SQL.format(company_id='NEW.company_id')}
+                WHERE id = NEW.id;
+            END
+            ''',
+            'trg_email_tracking_outreach_counters': '''
+            CREATE TRIGGER trg_email_tracking_outreach_counters
+            AFTER INSERT ON email_tracking
+            WHEN NEW.sent_date IS NOT NULL
+            BEGIN
+                UPDATE lead_status SET
+                    last_email_at = NEW.sent_date
+                WHERE company_id = (SELECT company_id FROM contacts WHERE id = NEW.contact_id)
+                AND (last_email_at IS NULL OR NEW.sent_date > last_email_at);
+            END
+            ''',
+            'trg_linkedin_tracking_outreach_counters': '''
+            CREATE TRIGGER trg_linkedin_tracking_outreach_counters
+            AFTER INSERT ON linkedin_tracking
+            WHEN NEW.connection_sent_date IS NOT NULL OR NEW.message_sent_date IS NOT NULL
+            BEGIN
+                UPDATE lead_status SET
+                    last_linkedin_at = COALESCE(NEW.message_sent_date, NEW.connection_sent_date)
+                WHERE company_id = (SELECT company_id FROM contacts WHERE id = NEW.contact_id)
+                AND (last_linkedin_at IS NULL
+                     OR COALESCE(NEW.message_sent_date, NEW.connection_sent_date) > last_linkedin_at);
+            END
+            ''',
+            'trg_companies_industry_bucket_reset': '''
+            CREATE TRIGGER trg_companies_industry_bucket_reset
+            AFTER UPDATE OF industry ON companies
+            WHEN NEW.industry IS NOT OLD.industry
+            BEGIN
+                UPDATE companies SET industry_bucket = NULL WHERE id = NEW.id;
+            END
+            '''
+        }
+
+        # Recreate the triggers so that existing databases pick up definition changes
+        for name, sql in triggers.items():
+            self.cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+            self.cursor.execute(sql)
+
+    def create_score_queue(self):
+        """Create the queue of leads to rescore and the triggers that fill it
+
+        When the queue is first created every lead is queued, so existing
+        databases get their initial scores on the next scoring run.
+        """
+        self.cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'lead_score_queue'")
+        created = self.cursor.fetchone() is None
+
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS lead_score_queue (
+            company_id INTEGER PRIMARY KEY
+        )
+        ''')
+
+        contact_company = '(SELECT company_id FROM contacts WHERE id = NEW.contact_id)'
+        triggers = {
+            'trg_lead_status_score_queue': ('AFTER INSERT ON lead_status', 'NEW.company_id'),
+            'trg_companies_score_queue': (
+                'AFTER UPDATE OF company_size, current_chatbot, technologies, industry_bucket ON companies', 'NEW.id'
+            ),
+            'trg_interactions_score_queue': ('AFTER INSERT ON interactions', 'NEW.company_id'),
+            'trg_email_tracking_score_queue': ('AFTER INSERT ON email_tracking', contact_company),
+            'trg_email_tracking_engagement_score_queue': (
+                'AFTER UPDATE OF opened, clicked, replied ON email_tracking', contact_company
+            )
+        }
+
+        for name, (event, company_id) in triggers.items():
+            self.cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+            self.cursor.execute(f'''
+            CREATE TRIGGER {name}
+            {event}
+            BEGIN
+                INSERT OR IGNORE INTO lead_score_queue (company_id) SELECT {company_id} WHERE {company_id} IS NOT NULL;
+            END
+            ''')
+
+        if created:
+            self.cursor.execute("INSERT OR IGNORE INTO lead_score_queue (company_id) SELECT company_id FROM lead_status")
+
+        return created
+
+    def create_search_index(self):
+        """Create the leads_fts full-text table and the triggers that keep it in sync
+
+        Each row is keyed by company id and holds the company's searchable fields
+        plus the names and emails of its contacts. Returns True if the table was
+        just created and needs a backfill.
+        """
+        self.cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'leads_fts'")
+        created = self.cursor.fetchone() is None
+
+        self.cursor.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS leads_fts USING fts5(
+            company_name, description, industry, city, contacts,
+            prefix = '2 3',
+            tokenize = 'unicode61 remove_diacritics 2'
+        )
+        ''')
+
+        company_values = f'''
+        NEW.id, NEW.company_name, NEW.description, NEW.industry, NEW.city,
+        {SEARCH_CONTACTS_SQL.format(company_id='NEW.id')}
+        '''
+
+        triggers = {
+            'trg_companies_search_insert': f'''
+            CREATE TRIGGER trg_companies_search_insert
+            AFTER INSERT ON companies
+            BEGIN
+                INSERT INTO leads_fts (rowid, company_name, description, industry, city, contacts)
+                VALUES ({company_values});
+            END
+            ''',
+            'trg_companies_search_update': f'''
+            CREATE TRIGGER trg_companies_search_update
+            AFTER UPDATE OF company_name, description, industry, city ON companies
+            BEGIN
+                DELETE FROM leads_fts WHERE rowid = OLD.id;
+                INSERT INTO leads_fts (rowid, company_name, description, industry, city, contacts)
+                VALUES ({company_values});
+            END
+            ''',
+            'trg_companies_search_delete': '''
+            CREATE TRIGGER trg_companies_search_delete
+            AFTER DELETE ON companies
+            BEGIN
+                DELETE FROM leads_fts WHERE rowid = OLD.id;
+            END
+            ''',
+            'trg_contacts_search_insert': f'''
+            CREATE TRIGGER trg_contacts_search_insert
+            AFTER INSERT ON contacts
+            BEGIN
+                UPDATE leads_fts SET contacts = {SEARCH_CONTACTS_SQL.format(company_id='NEW.company_id')}
+                WHERE rowid = NEW.company_id;
+            END
+            ''',
+            'trg_contacts_search_update': f'''
+            CREATE TRIGGER trg_contacts_search_update
+            AFTER UPDATE OF company_id, first_name, last_name, email ON contacts
+            BEGIN
+                UPDATE leads_fts SET contacts = {SEARCH_CONTACTS_SQL.format(company_id='OLD.company_id')}
+                WHERE rowid = OLD.company_id;
+                UPDATE leads_fts SET contacts = {SEARCH_CONTACTS_SQL.format(company_id='NEW.company_id')}
+                WHERE rowid = NEW.company_id AND NEW.company_id IS NOT OLD.company_id;
+            END
+            ''',
+            'trg_contacts_search_delete': f'''
+            CREATE TRIGGER trg_contacts_search_delete
+            AFTER DELETE ON contacts
+            BEGIN
+                UPDATE leads_fts SET contacts = {SEARCH_CONTACTS_SQL.format(company_id='OLD.company_id')}
+                WHERE rowid = OLD.company_id;
+            END
+            '''
+        }
+
+        for name, sql in triggers.items():
+            self.cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+            self.cursor.execute(sql)
+
+        return created
+
+    def rebuild_search_index(self):
+        """Repopulate leads_fts from the companies and contacts tables"""
+        try:
+            self.cursor.execute("DELETE FROM leads_fts")
+            self.cursor.execute(f'''
+            INSERT INTO leads_fts (rowid, company_name, description, industry, city, contacts)
+            SELECT c.id, c.company_name, c.description, c.industry, c.city,
+                   {SEARCH_CONTACTS_SQL.format(company_id='c.id')}
+            FROM companies c
+            ''')
+            self.cursor.execute("INSERT INTO leads_fts (leads_fts) VALUES ('optimize')")
+            self.conn.commit()
+
+            self.cursor.execute("SELECT COUNT(*) FROM leads_fts")
+            count = self.cursor.fetchone()[0]
+            print(f"Rebuilt search index for {count} leads")
+            return count
+        except sqlite3.Error as e:
+            print(f"Error rebuilding search index: {e}")
+            return 0
+
+    def create_rollup_tables(self):
+        """Create the analytics rollup tables and the triggers that keep them current
+
+        lead_totals holds the current number of leads per status, industry and
+        source. activity_rollups holds daily and weekly counters of new leads,
+        interactions, status changes and campaign events, attributed to the
+        industry and source a lead had when the event happened. Returns True if
+        the tables were just created, or the counting triggers changed, and
+        need a backfill.
+        """
+        self.cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'lead_totals'")
+        created = self.cursor.fetchone() is None
+
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS lead_totals (
+            dimension TEXT NOT NULL,
+            value TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (dimension, value)
+        )
+        ''')
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS activity_rollups (
+            period TEXT NOT NULL,
+            period_start TEXT NOT NULL,
+            dimension TEXT NOT NULL,
+            value TEXT NOT NULL,
+            metric TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (period, period_start, dimension, value, metric)
+        )
+        ''')
+        self.cursor.execute('CREATE INDEX IF NOT EXISTS idx_activity_rollups_metric ON activity_rollups (metric, period, period_start)')
+
+        triggers = {}
+
+        for table in set(ROLLUP_SOURCES) | set(TOTAL_SOURCES):
+            activity = ROLLUP_SOURCES.get(table, [])
+            totals = TOTAL_SOURCES.get(table, [])
+
+            statements = [
+                rollup_upsert_sql(period, date.format(row='NEW'), dimension, value.format(row='NEW'),
+                                  metric.format(row='NEW'), condition.format(row='NEW'))
+                for date, dimension, value, metric, condition in activity
+                for period in ROLLUP_PERIODS
+            ]
+            statements += [total_upsert_sql(dimension, value.format(row='NEW'), 1) for dimension, value in totals]
+            triggers[f'trg_{table}_rollup_insert'] = f'''
+            CREATE TRIGGER trg_{table}_rollup_insert
+            AFTER INSERT ON {table}
+            BEGIN
+                {''.join(statements)}
+            END
+            '''
+
+            # Events that become true on update, such as an email being opened
+            statements = [
+                rollup_upsert_sql(period, date.format(row='NEW'), dimension, value.format(row='NEW'),
+                                  metric.format(row='NEW'),
+                                  f"({condition.format(row='NEW')}) AND NOT ({condition.format(row='OLD')})")
+                for date, dimension, value, metric, condition in activity
+                if condition != '1'
+                for period in ROLLUP_PERIODS
+            ]
+            # Moves between totals, such as a lead changing industry
+            statements += [
+                total_upsert_sql(dimension, value.format(row='OLD'), -1) + total_upsert_sql(dimension, value.format(row='NEW'), 1)
+                for dimension, value in totals
+                if dimension != 'all'
+            ]
+            # Without activity events the trigger only moves totals, so it can
+            # skip updates that leave every total's value unchanged
+            when = ''
+            if statements and not any(condition != '1' for *_, condition in activity):
+                when = 'WHEN ' + ' OR '.join(
+                    f"{value.format(row='NEW')} IS NOT {value.format(row='OLD')}"
+                    for dimension, value in totals
+                    if dimension != 'all'
+                )
+
+            if statements:
+                triggers[f'trg_{table}_rollup_update'] = f'''
+                CREATE TRIGGER trg_{table}_rollup_update
+                AFTER UPDATE ON {table}
+                {when}
+                BEGIN
+                    {''.join(statements)}
+                END
+                '''
+
+            if totals:
+                triggers[f'trg_{table}_rollup_delete'] = f'''
+                CREATE TRIGGER trg_{table}_rollup_delete
+                AFTER DELETE ON {table}
+                BEGIN
+                    {''.join(total_upsert_sql(dimension, value.format(row='OLD'), -1) for dimension, value in totals)}
+                END
+                '''
+
+        # Status changes have no history table, so they are only counted as they happen
+        triggers['trg_lead_status_rollup_status_change'] = f'''
+        CREATE TRIGGER trg_lead_status_rollup_status_change
+        AFTER UPDATE OF status ON lead_status
+        WHEN NEW.status IS NOT OLD.status
+        BEGIN
+            {''.join(rollup_upsert_sql(period, "datetime('now', 'localtime')", 'status', 'NEW.status', "'status_changed'")
+                     for period in ROLLUP_PERIODS)}
+        END
+        '''
+
+        # Counters kept by older insert triggers may be bucketed differently
+        changed = False
+        for name, sql in triggers.items():
+            if name.endswith('_rollup_insert'):
+                self.cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = ?", (name,))
+                row = self.cursor.fetchone()
+                changed = changed or (row is not None and row[0].strip() != sql.strip())
+
+            self.cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+            self.cursor.execute(sql)
+
+        return created or changed
+
+    def rebuild_rollups(self):
+        """Recompute the lead totals and activity rollups from the base tables
+
+        Activity is attributed to each lead's current industry and source.
+        Status change counters cannot be recomputed and are kept as they are.
+        """
+        try:
+            self.cursor.execute("DELETE FROM lead_totals")
+            for table, totals in TOTAL_SOURCES.items():
+                for dimension, value in totals:
+                    self.cursor.execute(f'''
+                    INSERT INTO lead_totals (dimension, value, count)
+                    SELECT '{dimension}', COALESCE(CAST({value.format(row=table)} AS TEXT), ''), COUNT(*)
+                    FROM {table}
+                    GROUP BY 2
+                    ''')
+
+            self.cursor.execute("DELETE FROM activity_rollups WHERE metric != 'status_changed'")
+            for table, activity in ROLLUP_SOURCES.items():
+                for date, dimension, value, metric, condition in activity:
+                    for period, bucket in ROLLUP_PERIODS.items():
+                        self.cursor.execute(f'''
+                        INSERT INTO activity_rollups (period, period_start, dimension, value, metric, count)
+                        SELECT '{period}', {bucket.format(date=date.format(row=table))}, '{dimension}',
+                               COALESCE(CAST({value.format(row=table)} AS TEXT), ''), {metric.format(row=table)}, COUNT(*)
+                        FROM {table}
+                        WHERE {condition.format(row=table)}
+                        GROUP BY 2, 4, 5
+                        ''')
+
+            self.conn.commit()
+
+            self.cursor.execute("SELECT COUNT(*) FROM activity_rollups")
+            count = self.cursor.fetchone()[0]
+            print(f"Rebuilt analytics rollups ({count} activity counters)")
+            return count
+        except sqlite3.Error as e:
+            print(f"Error rebuilding analytics rollups: {e}")
+            return 0
+
+    def get_activity_rollups(self, period='day', metric=None, dimension=None, start=None, end=None, limit=None):
+        """Get activity counters per period, optionally filtered by metric, dimension and date range"""
+        try:
+            self.cursor.execute(*activity_rollups_query(period, metric, dimension, start, end, limit))
+            return self.cursor.fetchall()
+        except sqlite3.Error as e:
+            print(f"Error getting activity rollups: {e}")
+            return []
+
+    def rebuild_outreach_counters(self):
+        """Recompute the lead_status outreach counters from the full interaction history"""
+        try:
+            self.cursor.execute(f'''
+            UPDATE lead_status SET
+            {OUTREACH_COUNTERS_SQL.format(company_id='lead_status.company_id')}
+            ''')
+
+            updated = self.cursor.rowcount
+            self.conn.commit()
+            print(f"Rebuilt outreach counters for {updated} leads")
+            return updated
+        except sqlite3.Error as e:
+            print(f"Error rebuilding outreach counters: {e}")
+            return 0
     
-    def import_from_csv(self, csv_file):
-        """Import leads from a CSV file"""
+    def update_industry_buckets(self, classify, rules_version=None):
+        """Classify each distinct industry once and cache the bucket on its companies
+
+        When rules_version differs from the version the cached buckets were
+        computed with, every industry is classified again and only the
+        companies whose bucket changes are updated.
+        """
         try:
-            with open(csv_file, 'r', encoding='utf-8') as file:
-                csv_reader = csv.DictReader(file)
-                leads_imported = 0
-                
-                for row in csv_reader:
-                    # Insert into companies table
-                    company_id = self.insert_company(row)
-                    
-                    # If we have contact information, insert into contacts table
-                    if company_id and (row.get('first_name') or row.get('email') or row.get('phone')):
-                        self.insert_contact(company_id, row)
-                    
-                    # Create initial lead status
-                    if company_id:
-                        self.insert_lead_status(company_id)
-                        leads_imported += 1
-                
-                self.conn.commit()
-                print(f"Imported {leads_imported} leads from {csv_file}")
-                return leads_imported
-        except Exception as e:
-            print(f"Error importing from CSV: {e}")
+            # Version of the classifier rules the cached buckets were computed with
+            self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS industry_bucket_rules (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                version TEXT
+            )
+            ''')
+            
+            self.cursor.execute("SELECT version FROM industry_bucket_rules WHERE id = 1")
+            row = self.cursor.fetchone()
+            stale = rules_version is not None and (row is None or row[0] != rules_version)
+            
+            self.cursor.execute(
+                f"SELECT DISTINCT industry FROM companies {'' if stale else 'WHERE industry_bucket IS NULL'}"
+            )
+            industries = [row[0] for row in self.cursor.fetchall()]
+            
+            self.cursor.executemany(
+                f"UPDATE companies SET industry_bucket = ? WHERE industry IS ? AND "
+                f"{'industry_bucket IS NOT ?' if stale else 'industry_bucket IS NULL'}",
+                [
+                    (bucket, industry, bucket) if stale else (bucket, industry)
+                    for industry, bucket in ((industry, classify(industry or '')) for industry in industries)
+                ]
+            )
+            
+            if rules_version is not None:
+                self.cursor.execute(
+                    "INSERT OR REPLACE INTO industry_bucket_rules (id, version) VALUES (1, ?)", (rules_version,)
+                )
+            
+            self.conn.commit()
+            return len(industries)
+        except sqlite3.Error as e:
+            print(f"Error updating industry buckets: {e}")
             return 0
+
+    def optimize(self):
+        """Refresh the query planner statistics used to pick indexes for filtered, sorted queries"""
+        try:
+            self.cursor.execute("SELECT name FROM sqlite_master WHERE name = 'sqlite_stat1'")
+            if self.cursor.fetchone():
+                self.cursor.execute("PRAGMA optimize")
+            else:
+                # Without statistics SQLite guesses filter selectivity and may sort whole tables
+                self.cursor.execute("ANALYZE")
+            
+            # FTS5 plans its own lookups; statistics taken while the index was small
+            # make every later trigger write to it slower as the index grows
+            self.cursor.execute("DELETE FROM sqlite_stat1 WHERE tbl LIKE 'leads_fts%'")
+            self.cursor.execute("ANALYZE sqlite_schema")
+            self.conn.commit()
+            return True
+        except sqlite3.Error as e:
+            print(f"Error optimizing database: {e}")
+            return False
+
+    def import_from_csv(self, csv_file):
+        """Import leads from a CSV file"""
+        return self.import_from_file(csv_file, 'csv')
     
     def import_from_json(self, json_file):
-        """Import leads from a JSON file"""
+        """Import leads from a JSON array or JSON Lines file"""
+        return self.import_from_file(json_file, 'json')
+    
+    def import_from_file(self, path, file_format=None):
+        """Stream a lead file into the database in chunks and return the number of leads imported"""
         try:
-            with open(json_file, 'r', encoding='utf-8') as file:
-                leads = json.load(file)
-                leads_imported = 0
-                
-                for lead in leads:
-                    # Insert into companies table
-                    company_id = self.insert_company(lead)
-                    
-                    # If we have contact information, insert into contacts table
-                    if company_id and (lead.get('first_name') or lead.get('email') or lead.get('phone')):
-                        self.insert_contact(company_id, lead)
-                    
-                    # Create initial lead status
-                    if company_id:
-                        self.insert_lead_status(company_id)
-                        leads_imported += 1
-                
-                self.conn.commit()
-                print(f"Imported {leads_imported} leads from {json_file}")
-                return leads_imported
-        except Exception as e:
-            print(f"Error importing from JSON: {e}")
+            importer = LeadImporter(self)
+            stats = importer.import_file(path, file_format)
+            print(f"Imported {stats['imported']} leads from {path} "
+                  f"({stats['companies_created']} new, {stats['companies_updated']} updated, "
+                  f"{stats['skipped']} skipped, {stats['rows_per_sec']} rows/sec)")
+            return stats['imported']
+        except (OSError, ValueError, sqlite3.Error) as e:
+            print(f"Error importing from {path}: {e}")
             return 0
     
     def insert_company(self, data):
@@ -334,12 +1009,17 @@ class LeadDatabase:
             if existing:
                 return existing[0]
             
+            # Scraped technologies may arrive as a list
+            technologies = data.get('technologies', '')
+            if isinstance(technologies, (list, tuple, set)):
+                technologies = ', '.join(technologies)
+            
             # Insert new company
             self.cursor.execute('''
             INSERT INTO companies (
                 company_name, website, industry, company_size, current_chatbot, 
-                description, address, city, state, zipcode, country, source, scraped_date
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                description, address, city, state, zipcode, country, source, scraped_date, technologies
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             ''', (
                 data.get('company_name', ''),
                 data.get('website', ''),
@@ -353,7 +1033,8 @@ class LeadDatabase:
                 zipcode,
                 country,
                 data.get('source', ''),
-                data.get('scraped_date', datetime.now().strftime("%Y-%m-%d"))
+                data.get('scraped_date', datetime.now().strftime("%Y-%m-%d")),
+                technologies
             ))
             
             return self.cursor.lastrowid
@@ -368,6 +1049,7 @@ class LeadDatabase:
             email = data.get('email', '')
             first_name = data.get('first_name', '')
             last_name = data.get('last_name', '')
+            name_source = None
             
             if not first_name and not last_name and '@' in email:
                 # Try to extract name from email
@@ -377,11 +1059,12 @@ class LeadDatabase:
                     if len(parts) >= 2:
                         first_name = parts[0].capitalize()
                         last_name = parts[1].capitalize()
+                        name_source = 'email'
             
             self.cursor.execute('''
             INSERT INTO contacts (
-                company_id, first_name, last_name, position, email, phone, linkedin_url, notes
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                company_id, first_name, last_name, position, email, phone, linkedin_url, notes, name_source
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
             ''', (
                 company_id,
                 first_name,
@@ -390,7 +1073,8 @@ class LeadDatabase:
                 email,
                 data.get('phone', ''),
                 data.get('linkedin_url', ''),
-                data.get('notes', '')
+                data.get('notes', ''),
+                name_source
             ))
             
             return self.cursor.lastrowid
@@ -531,18 +1215,85 @@ class LeadDatabase:
             print(f"Error adding email template: {e}")
             return None
     
-    def record_email_sent(self, contact_id, template_id, campaign_id):
+    def get_or_create_email_template(self, template_type, subject, body):
+        """Return the ID of a base email template, storing it once by content hash"""
+        content_hash = hashlib.sha1(
+            '\0'.join([template_type, subject, body]).encode('utf-8')
+        ).hexdigest()
+        
+        if content_hash in self.template_ids:
+            return self.template_ids[content_hash]
+        
+        try:
+            self.cursor.execute(
+                "SELECT id FROM email_templates WHERE content_hash = ?",
+                (content_hash,)
+            )
+            existing = self.cursor.fetchone()
+            
+            if existing:
+                template_id = existing[0]
+            else:
+                # Base templates are shared by every campaign, so no campaign_id is stored
+                self.cursor.execute('''
+                INSERT INTO email_templates (
+                    template_type, subject, body, content_hash
+                ) VALUES (?, ?, ?, ?)
+                ''', (
+                    template_type,
+                    subject,
+                    body,
+                    content_hash
+                ))
+                template_id = self.cursor.lastrowid
+            
+            self.template_ids[content_hash] = template_id
+            return template_id
+        except sqlite3.Error as e:
+            print(f"Error getting email template: {e}")
+            return None
+    
+    def render_sent_email(self, tracking_id):
+        """Rebuild the subject and body of a sent email from its template and variables"""
+        try:
+            self.cursor.execute('''
+            SELECT et.subject, et.body, t.variables
+            FROM email_tracking t
+            JOIN email_templates et ON t.template_id = et.id
+            WHERE t.id = ?
+            ''', (tracking_id,))
+            
+            row = self.cursor.fetchone()
+            
+            if not row:
+                return None
+            
+            # Rows written before variables were recorded hold the rendered text
+            if not row['variables']:
+                return {'subject': row['subject'], 'body': row['body']}
+            
+            variables = json.loads(row['variables'])
+            return {
+                'subject': row['subject'].format(**variables),
+                'body': row['body'].format(**variables)
+            }
+        except (sqlite3.Error, ValueError, KeyError) as e:
+            print(f"Error rendering sent email: {e}")
+            return None
+    
+    def record_email_sent(self, contact_id, template_id, campaign_id, variables=None):
         """Record that an email was sent to a contact"""
         try:
             self.cursor.execute('''
             INSERT INTO email_tracking (
-                contact_id, template_id, campaign_id, sent_date
-            ) VALUES (?, ?, ?, ?)
+                contact_id, template_id, campaign_id, sent_date, variables
+            ) VALUES (?, ?, ?, ?, ?)
             ''', (
                 contact_id,
                 template_id,
                 campaign_id,
-                datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                json.dumps(variables, separators=(',', ':')) if variables else None
             ))
             
             tracking_id = self.cursor.lastrowid
@@ -735,38 +1486,87 @@ class LeadDatabase:
             return []
     
     def get_leads_by_industry(self, industry):
-        """Get all leads in a specific industry"""
+        """Get all leads whose industry contains words starting with the given ones"""
+        query = fts_query(industry, 'industry')
+        if not query:
+            return []
+
         try:
             self.cursor.execute('''
             SELECT c.*, ls.status, ls.score, ls.next_action, ls.next_action_date, ls.assigned_to
-            FROM companies c
+            FROM leads_fts
+            JOIN companies c ON c.id = leads_fts.rowid
             JOIN lead_status ls ON c.id = ls.company_id
-            WHERE c.industry LIKE ?
-            ''', (f'%{industry}%',))
+            WHERE leads_fts MATCH ?
+            ''', (query,))
             
             return self.cursor.fetchall()
         except sqlite3.Error as e:
             print(f"Error getting leads by industry: {e}")
             return []
     
-    def get_leads_for_follow_up(self, days=3):
-        """Get all leads that need follow-up within the specified number of days"""
+    def search_leads(self, text, limit=50):
+        """Full-text search over companies and their contacts, best matches first
+
+        Every word in text must match the start of a word in the company name,
+        description, industry, city or a contact's name or email.
+        """
+        query = fts_query(text)
+        if not query:
+            return []
+
+        try:
+            # Column weights: company_name, description, industry, city, contacts
+            self.cursor.execute('''
+            SELECT c.*, ls.status, ls.score, ls.next_action, ls.next_action_date, ls.assigned_to,
+                   bm25(leads_fts, 10.0, 1.0, 4.0, 2.0, 5.0) AS rank
+            FROM leads_fts
+            JOIN companies c ON c.id = leads_fts.rowid
+            LEFT JOIN lead_status ls ON c.id = ls.company_id
+            WHERE leads_fts MATCH ?
+            ORDER BY rank
+            LIMIT ?
+            ''', (query, limit))
+            
+            return self.cursor.fetchall()
+        except sqlite3.Error as e:
+            print(f"Error searching leads: {e}")
+            return []
+    
+    def get_leads_for_follow_up(self, days=3, limit=None):
+        """Get the leads that need follow-up within the specified number of days, soonest first"""
         try:
             cutoff_date = (datetime.now() + timedelta(days=days)).strftime("%Y-%m-%d")
             
-            self.cursor.execute('''
+            query = '''
             SELECT c.*, ls.status, ls.score, ls.next_action, ls.next_action_date, ls.assigned_to
-            FROM companies c
-            JOIN lead_status ls ON c.id = ls.company_id
+            FROM lead_status ls
+            JOIN companies c ON c.id = ls.company_id
             WHERE ls.next_action_date <= ?
             ORDER BY ls.next_action_date ASC
-            ''', (cutoff_date,))
+            '''
+            params = [cutoff_date]
+            
+            if limit:
+                query += " LIMIT ?"
+                params.append(limit)
             
+            self.cursor.execute(query, params)
             return self.cursor.fetchall()
         except sqlite3.Error as e:
             print(f"Error getting leads for follow-up: {e}")
             return []
     
+    def count_leads_for_follow_up(self, days=3):
+        """Count the leads that need follow-up within the specified number of days"""
+        try:
+            cutoff_date = (datetime.now() + timedelta(days=days)).strftime("%Y-%m-%d")
+            self.cursor.execute("SELECT COUNT(*) FROM lead_status WHERE next_action_date <= ?", (cutoff_date,))
+            return self.cursor.fetchone()[0]
+        except sqlite3.Error as e:
+            print(f"Error counting leads for follow-up: {e}")
+            return 0
+    
     def get_company_with_contacts(self, company_id):
         """Get a company and all its contacts"""
         try:
@@ -825,8 +1625,9 @@ class LeadDatabase:
     def get_lead_count(self):
         """Get the total number of leads in the database"""
         try:
-            self.cursor.execute("SELECT COUNT(*) FROM companies")
-            return self.cursor.fetchone()[0]
+            self.cursor.execute("SELECT count FROM lead_totals WHERE dimension = 'all'")
+            row = self.cursor.fetchone()
+            return row[0] if row else 0
         except sqlite3.Error as e:
             print(f"Error getting lead count: {e}")
             return 0
@@ -835,9 +1636,9 @@ class LeadDatabase:
         """Get lead counts grouped by status"""
         try:
             self.cursor.execute('''
-            SELECT ls.status, COUNT(*) as count 
-            FROM lead_status ls
-            GROUP BY ls.status
+            SELECT NULLIF(value, '') AS status, count
+            FROM lead_totals
+            WHERE dimension = 'status' AND count > 0
             ORDER BY count DESC
             ''')
             return self.cursor.fetchall()
@@ -849,9 +1650,9 @@ class LeadDatabase:
         """Get lead counts grouped by industry"""
         try:
             self.cursor.execute('''
-            SELECT industry, COUNT(*) as count 
-            FROM companies 
-            GROUP BY industry
+            SELECT NULLIF(value, '') AS industry, count
+            FROM lead_totals
+            WHERE dimension = 'industry' AND count > 0
             ORDER BY count DESC
             ''')
             return self.cursor.fetchall()
@@ -868,18 +1669,24 @@ class LeadDatabase:
             LEFT JOIN lead_status ls ON c.id = ls.company_id
             ''')
             
-            rows = self.cursor.fetchall()
-            
             # Get column names
             column_names = [description[0] for description in self.cursor.description]
+            exported = 0
             
+            # Stream the rows in batches so large databases are never held in memory
             with open(output_file, 'w', newline='', encoding='utf-8') as csvfile:
                 writer = csv.writer(csvfile)
                 writer.writerow(column_names)
-                writer.writerows([tuple(row) for row in rows])
-            
-            print(f"Exported {len(rows)} leads to {output_file}")
-            return len(rows)
+                
+                while True:
+                    rows = self.cursor.fetchmany(5000)
+                    if not rows:
+                        break
+                    writer.writerows(tuple(row) for row in rows)
+                    exported += len(rows)
+            
+            print(f"Exported {exported} leads to {output_file}")
+            return exported
         except Exception as e:
             print(f"Error exporting to CSV: {e}")
             return 0
@@ -1111,6 +1918,18 @@ def parse_arguments():
     parser.add_argument('--sample-size', type=int, default=50,
                         help='Number of sample companies to generate')
     
+    parser.add_argument('--rebuild-counters', action='store_true',
+                        help='Recompute the per-lead outreach counters from the interaction history')
+    
+    parser.add_argument('--rebuild-rollups', action='store_true',
+                        help='Recompute the analytics rollup tables from the base tables')
+    
+    parser.add_argument('--rebuild-search-index', action='store_true',
+                        help='Repopulate the full-text lead search index')
+    
+    parser.add_argument('--search', type=str, default=None,
+                        help='Print the leads best matching a free-text search')
+    
     return parser.parse_args()
 
 def main():
@@ -1139,6 +1958,22 @@ def main():
     if args.generate_sample:
         db.generate_sample_data(args.sample_size)
     
+    # Backfill the outreach counters if requested
+    if args.rebuild_counters:
+        db.rebuild_outreach_counters()
+    
+    if args.rebuild_rollups:
+        db.rebuild_rollups()
+    
+    if args.rebuild_search_index:
+        db.rebuild_search_index()
+    
+    # Search the leads if requested
+    if args.search:
+        print(f"\nLeads matching '{args.search}':")
+        for lead in db.search_leads(args.search, limit=20):
+            print(f"  {lead['id']}: {lead['company_name']} ({lead['industry']}, {lead['city']})")
+    
     # Export data if requested
     if args.export_csv:
         db.export_to_csv(args.export_csv)
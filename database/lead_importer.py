@@ -0,0 +1,525 @@
+#!/usr/bin/env python3
+"""
+Streaming Lead Importer
+This script imports CSV, JSON and JSON Lines lead files into the lead database in bounded chunks
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import codecs
+import itertools
+import argparse
+from datetime import datetime, timedelta
+
+# Bytes read from a file or upload stream at a time
+READ_SIZE = 64 * 1024
+
+# Leads written per transaction
+CHUNK_SIZE = 2000
+
+# SQLite limits the number of bound parameters per statement
+MAX_PARAMETERS = 500
+
+# Largest single JSON array element in characters, to stop a malformed array from being buffered whole
+MAX_RECORD_SIZE = 16 * 1024 * 1024
+
+# Row errors kept in the import summary; later ones are only counted
+MAX_ERRORS = 50
+
+COMPANY_FIELDS = [
+    'company_name', 'website', 'industry', 'company_size', 'current_chatbot',
+    'description', 'address', 'city', 'state', 'zipcode', 'country', 'source', 'scraped_date', 'technologies'
+]
+
+CONTACT_FIELDS = ['first_name', 'last_name', 'position', 'email', 'phone', 'linkedin_url', 'notes']
+
+FORMATS = {
+    '.csv': 'csv',
+    '.json': 'json',
+    '.jsonl': 'json',
+    '.ndjson': 'json'
+}
+
+def detect_format(filename=None, first_chunk=b''):
+    """Return 'csv' or 'json' from a file name, falling back to the first bytes of the file"""
+    extension = os.path.splitext(filename or '')[1].lower()
+    if extension in FORMATS:
+        return FORMATS[extension]
+
+    start = first_chunk.lstrip(codecs.BOM_UTF8 + b' \t\r\n')[:1]
+    return 'json' if start in (b'{', b'[') else 'csv'
+
+def read_file(path, size=READ_SIZE):
+    """Yield a file's bytes in fixed-size chunks"""
+    with open(path, 'rb') as file:
+        while True:
+            chunk = file.read(size)
+            if not chunk:
+                return
+            yield chunk
+
+def iter_text(chunks):
+    """Decode byte chunks as UTF-8, dropping a leading byte order mark"""
+    decoder = codecs.getincrementaldecoder('utf-8-sig')(errors='replace')
+    for chunk in chunks:
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+
+    text = decoder.decode(b'', final=True)
+    if text:
+        yield text
+
+def iter_lines(texts):
+    """Split decoded text into lines, keeping line endings so the csv module sees quoted newlines"""
+    pending = ''
+    for text in texts:
+        lines = (pending + text).split('\n')
+        pending = lines.pop()
+        for line in lines:
+            yield line + '\n'
+
+    if pending:
+        yield pending
+
+def header_key(name):
+    """Normalize a CSV header such as 'Company Name' to a lead field name"""
+    return '_'.join((name or '').strip().lower().split())
+
+def clean(value):
+    """Return a field value as stripped text"""
+    if value is None:
+        return ''
+    if isinstance(value, list) and not any(isinstance(item, (dict, list)) for item in value):
+        # Lists of names, such as scraped technologies, are stored comma-joined
+        return ', '.join(str(item).strip() for item in value)
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return str(value).strip()
+
+def normalize_lead(row):
+    """Validate one raw row and return (company, contact), or raise ValueError
+
+    Mirrors LeadDatabase.insert_company and insert_contact: a free-form
+    location fills in city, state and country, and a contact without a name
+    takes one from a first.last email address.
+    """
+    data = {header_key(key): clean(value) for key, value in row.items() if key is not None}
+
+    company = {field: data.get(field, '') for field in COMPANY_FIELDS}
+    company['company_name'] = ' '.join(company['company_name'].split())
+    if not company['company_name']:
+        raise ValueError('missing company_name')
+
+    location = data.get('location', '')
+    if location and not (company['city'] or company['state'] or company['country']):
+        parts = [part.strip() for part in location.split(',')]
+        company['city'] = parts[0]
+        if len(parts) >= 2:
+            company['state'] = parts[1]
+        if len(parts) >= 3:
+            company['country'] = parts[2]
+
+    contact = None
+    if data.get('first_name') or data.get('email') or data.get('phone'):
+        contact = {field: data.get(field, '') for field in CONTACT_FIELDS}
+        email = contact['email'].lower()
+
+        # Keep the rest of the contact when only the address is unusable
+        if email and ('@' not in email or ' ' in email):
+            email = ''
+        contact['email'] = email
+        contact['name_source'] = None
+
+        if not contact['first_name'] and not contact['last_name'] and '@' in email:
+            name_part = email.split('@')[0]
+            if '.' in name_part:
+                parts = name_part.split('.')
+                contact['first_name'] = parts[0].capitalize()
+                contact['last_name'] = parts[1].capitalize()
+                contact['name_source'] = 'email'
+
+        # Nothing left to reach the contact by once the unusable address is dropped
+        if not (contact['first_name'] or contact['last_name'] or contact['email'] or contact['phone']):
+            contact = None
+
+    return company, contact
+
+def contact_key(contact):
+    """Identify a contact within its company by email, or by name and phone without one"""
+    if contact['email']:
+        return contact['email'].lower()
+    return (contact['first_name'].lower(), contact['last_name'].lower(), contact['phone'])
+
+def batches(values, size=MAX_PARAMETERS):
+    """Split a list into slices small enough to bind as statement parameters"""
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+class LeadImporter:
+    """Parses lead files incrementally and bulk-upserts them one chunk per transaction"""
+
+    def __init__(self, db, chunk_size=CHUNK_SIZE, progress=None):
+        """Import into a connected LeadDatabase; progress(stats) is called after each chunk"""
+        self.conn = db.conn
+        self.chunk_size = chunk_size
+        self.progress = progress
+        self.stats = None
+        self.started = None
+
+    def reset(self):
+        """Start a fresh set of import counters"""
+        self.started = time.time()
+        self.stats = {
+            'rows': 0,
+            'imported': 0,
+            'companies_created': 0,
+            'companies_updated': 0,
+            'contacts_created': 0,
+            'skipped': 0,
+            'bytes_read': 0,
+            'rows_per_sec': 0.0,
+            'elapsed': 0.0,
+            'errors': []
+        }
+
+    def record_error(self, record, message):
+        """Count a rejected row, keeping the first few messages for the summary"""
+        self.stats['skipped'] += 1
+        if len(self.stats['errors']) < MAX_ERRORS:
+            self.stats['errors'].append({'record': record, 'error': message})
+
+    def count_bytes(self, chunks):
+        """Pass byte chunks through while counting them"""
+        for chunk in chunks:
+            self.stats['bytes_read'] += len(chunk)
+            yield chunk
+
+    def read_csv(self, chunks):
+        """Yield (record number, row) from CSV bytes with a header line"""
+        reader = csv.DictReader(iter_lines(iter_text(chunks)))
+        for row in reader:
+            yield reader.line_num, row
+
+    def read_json(self, chunks):
+        """Yield (record number, row) from a JSON array or from JSON Lines"""
+        texts = iter_text(chunks)
+
+        # The first non-blank character tells an array from JSON Lines
+        for text in texts:
+            stripped = text.lstrip()
+            if not stripped:
+                continue
+
+            if stripped[0] == '[':
+                yield from self.read_json_array(itertools.chain([stripped[1:]], texts))
+            else:
+                yield from self.read_json_lines(itertools.chain([text], texts))
+            return
+
+    def read_json_lines(self, texts):
+        """Yield (record number, row) from JSON Lines, skipping malformed lines"""
+        record = 0
+        for line in iter_lines(texts):
+            if not line.strip():
+                continue
+
+            record += 1
+            try:
+                yield record, json.loads(line)
+            except json.JSONDecodeError as e:
+                self.record_error(record, f"Invalid JSON: {e.msg}")
+
+    def read_json_array(self, texts):
+        """Yield (record number, row) from the body of a JSON array
+
+        Values are decoded one at a time from a rolling buffer, so only the
+        record being parsed and the unread part of one chunk are in memory.
+        A syntax error ends the import, since the next record cannot be
+        found reliably inside a malformed array.
+        """
+        decoder = json.JSONDecoder()
+        buffer = ''
+        position = 0
+        record = 0
+        exhausted = False
+
+        while True:
+            while position < len(buffer) and (buffer[position].isspace() or buffer[position] == ','):
+                position += 1
+
+            if position < len(buffer):
+                if buffer[position] == ']':
+                    return
+
+                try:
+                    value, end = decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError as e:
+                    error = e.msg
+                else:
+                    # A value running to the end of the buffer may continue in the next chunk
+                    if end < len(buffer) or exhausted:
+                        record += 1
+                        position = end
+                        yield record, value
+                        continue
+                    error = None
+
+                if exhausted:
+                    raise ValueError(f"Invalid JSON in record {record + 1}: {error}")
+                if len(buffer) - position > MAX_RECORD_SIZE:
+                    raise ValueError(f"Record {record + 1} is not valid JSON or exceeds {MAX_RECORD_SIZE} characters")
+            elif exhausted:
+                raise ValueError('Unexpected end of file inside a JSON array')
+
+            text = next(texts, None)
+            if text is None:
+                exhausted = True
+            else:
+                buffer = buffer[position:] + text
+                position = 0
+
+    def import_stream(self, chunks, file_format=None, filename=None):
+        """Import leads from an iterable of byte chunks and return the import summary"""
+        self.reset()
+        chunks = iter(chunks)
+
+        if file_format is None:
+            first = next(chunks, b'')
+            file_format = detect_format(filename, first)
+            chunks = self.prepend(first, chunks)
+
+        chunks = self.count_bytes(chunks)
+        records = self.read_csv(chunks) if file_format == 'csv' else self.read_json(chunks)
+
+        leads = []
+        for record, row in records:
+            self.stats['rows'] += 1
+
+            if not isinstance(row, dict):
+                self.record_error(record, 'Record is not an object')
+                continue
+
+            try:
+                leads.append(normalize_lead(row))
+            except ValueError as e:
+                self.record_error(record, str(e))
+                continue
+
+            if len(leads) >= self.chunk_size:
+                self.write_chunk(leads)
+                leads = []
+
+        if leads:
+            self.write_chunk(leads)
+
+        self.update_rate()
+        return self.stats
+
+    def import_file(self, path, file_format=None):
+        """Import leads from a CSV, JSON or JSON Lines file"""
+        return self.import_stream(read_file(path), file_format, path)
+
+    def prepend(self, first, chunks):
+        """Yield a chunk that was read ahead, then the rest of the stream"""
+        if first:
+            yield first
+        yield from chunks
+
+    def update_rate(self):
+        """Refresh the elapsed time and throughput counters"""
+        self.stats['elapsed'] = round(time.time() - self.started, 3)
+        self.stats['rows_per_sec'] = round(self.stats['rows'] / self.stats['elapsed'], 1) if self.stats['elapsed'] else 0.0
+
+    def write_chunk(self, leads):
+        """Upsert one chunk of normalized leads in a single transaction
+
+        Companies are matched on (company_name, website) like insert_company.
+        New companies are inserted with their initial lead status, existing
+        ones get any non-empty imported fields, and contacts are added unless
+        the company already has one with the same email (or name and phone).
+        """
+        cursor = self.conn.cursor()
+
+        if self.conn.in_transaction:
+            self.conn.commit()
+
+        # Taking the write lock up front keeps new company ids contiguous
+        cursor.execute('BEGIN IMMEDIATE')
+        try:
+            # Merge repeated companies within the chunk, later non-empty values winning
+            companies = {}
+            contacts = []
+            for company, contact in leads:
+                key = (company['company_name'], company['website'])
+                if key in companies:
+                    merged = companies[key]
+                    merged.update({field: value for field, value in company.items() if value})
+                else:
+                    companies[key] = dict(company)
+                if contact:
+                    contacts.append((key, contact))
+
+            # Only fields that are imported non-empty and differ are written, so
+            # re-importing a file does not touch unchanged rows or their triggers
+            company_ids = {}
+            changes = []
+            names = list({name for name, _ in companies})
+            for batch in batches(names):
+                cursor.execute(
+                    f"SELECT id, {', '.join(COMPANY_FIELDS)} FROM companies WHERE company_name IN ({','.join('?' * len(batch))})",
+                    batch
+                )
+                for row in cursor.fetchall():
+                    current = dict(zip(COMPANY_FIELDS, row[1:]))
+                    key = (current['company_name'], current['website'] or '')
+                    if key not in companies or key in company_ids:
+                        continue
+
+                    company_ids[key] = row[0]
+                    changed = {field: value for field, value in companies[key].items()
+                               if value and value != (current[field] or '')}
+                    if changed:
+                        changes.append((row[0], changed))
+
+            existing = [key for key in companies if key in company_ids]
+            for company_id, changed in changes:
+                assignments = ', '.join(f"{field} = ?" for field in changed)
+                cursor.execute(
+                    f"UPDATE companies SET {assignments}, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+                    list(changed.values()) + [company_id]
+                )
+
+            created = [key for key in companies if key not in company_ids]
+            if created:
+                today = datetime.now().strftime("%Y-%m-%d")
+                for key in created:
+                    companies[key]['scraped_date'] = companies[key]['scraped_date'] or today
+
+                cursor.execute('SELECT COALESCE(MAX(id), 0) FROM companies')
+                last_id = cursor.fetchone()[0]
+
+                cursor.executemany(
+                    f"INSERT INTO companies ({', '.join(COMPANY_FIELDS)}) VALUES ({', '.join('?' * len(COMPANY_FIELDS))})",
+                    [[companies[key][field] for field in COMPANY_FIELDS] for key in created]
+                )
+
+                cursor.execute('SELECT id FROM companies WHERE id > ? ORDER BY id', (last_id,))
+                new_ids = [row[0] for row in cursor.fetchall()]
+                company_ids.update(zip(created, new_ids))
+
+                next_action_date = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
+                cursor.executemany('''
+                INSERT INTO lead_status (company_id, status, score, next_action, next_action_date)
+                VALUES (?, 'New', 0, 'Initial Outreach', ?)
+                ''', [(company_id, next_action_date) for company_id in new_ids])
+
+            # Contacts already on file for the companies that existed before this chunk
+            known = set()
+            existing_ids = [company_ids[key] for key in existing]
+            for batch in batches(existing_ids):
+                cursor.execute(
+                    f"""SELECT company_id, COALESCE(email, ''), COALESCE(first_name, ''), COALESCE(last_name, ''), COALESCE(phone, '')
+                    FROM contacts WHERE company_id IN ({','.join('?' * len(batch))})""",
+                    batch
+                )
+                for company_id, email, first_name, last_name, phone in cursor.fetchall():
+                    known.add((company_id, contact_key({
+                        'email': email, 'first_name': first_name, 'last_name': last_name, 'phone': phone
+                    })))
+
+            new_contacts = []
+            for key, contact in contacts:
+                company_id = company_ids[key]
+                identity = (company_id, contact_key(contact))
+                if identity in known:
+                    continue
+                known.add(identity)
+                new_contacts.append([company_id] + [contact[field] for field in CONTACT_FIELDS] + [contact['name_source']])
+
+            if new_contacts:
+                cursor.executemany(
+                    f"INSERT INTO contacts (company_id, {', '.join(CONTACT_FIELDS)}, name_source) "
+                    f"VALUES ({', '.join('?' * (len(CONTACT_FIELDS) + 2))})",
+                    new_contacts
+                )
+
+            self.conn.commit()
+        except BaseException:
+            self.conn.rollback()
+            raise
+
+        self.stats['imported'] += len(leads)
+        self.stats['companies_created'] += len(created)
+        self.stats['companies_updated'] += len(changes)
+        self.stats['contacts_created'] += len(new_contacts)
+        self.update_rate()
+
+        if self.progress:
+            self.progress(dict(self.stats, errors=list(self.stats['errors'])))
+
+def parse_arguments():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Streaming Lead Importer')
+
+    parser.add_argument('files', nargs='+',
+                        help='CSV, JSON or JSON Lines files to import')
+
+    parser.add_argument('--db-path', type=str,
+                        default='/home/ubuntu/lead_generation/database/leads.db',
+                        help='Path to the SQLite database file')
+
+    parser.add_argument('--format', choices=['csv', 'json'], default=None,
+                        help='File format (default: detected from the file)')
+
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE,
+                        help=f"Leads written per transaction (default: {CHUNK_SIZE})")
+
+    return parser.parse_args()
+
+def main():
+    """Main function to run the lead importer"""
+    args = parse_arguments()
+
+    from lead_database import LeadDatabase
+
+    db = LeadDatabase(args.db_path)
+    if not db.connect():
+        return 1
+    db.create_tables()
+
+    def report(stats):
+        print(f"  {stats['rows']} rows, {stats['imported']} imported, {stats['skipped']} skipped "
+              f"({stats['rows_per_sec']} rows/sec)")
+
+    importer = LeadImporter(db, args.chunk_size, report)
+    status = 0
+
+    for path in args.files:
+        if not os.path.exists(path):
+            print(f"File not found: {path}")
+            status = 1
+            continue
+
+        print(f"Importing {path}")
+        try:
+            stats = importer.import_file(path, args.format)
+        except ValueError as e:
+            print(f"Error importing {path}: {e}")
+            status = 1
+            continue
+
+        print(f"Imported {stats['imported']} leads from {path}: {stats['companies_created']} new companies, "
+              f"{stats['companies_updated']} updated, {stats['contacts_created']} new contacts, "
+              f"{stats['skipped']} rows skipped in {stats['elapsed']}s")
+        for error in stats['errors']:
+            print(f"  record {error['record']}: {error['error']}")
+
+    db.close()
+    return status
+
+if __name__ == "__main__":
+    sys.exit(main())
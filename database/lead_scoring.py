@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Lead Scoring Engine
+This script scores leads in vectorized batches and writes back only the scores that changed
+"""
+
+import sys
+import time
+import argparse
+
+import numpy as np
+
+# Leads scored per batch and transaction
+BATCH_SIZE = 50000
+
+# Points by company size; the first keyword found in the size text wins
+SIZE_POINTS = [('medium', 25), ('large', 20), ('small', 15), ('enterprise', 10)]
+UNKNOWN_SIZE_POINTS = 5
+
+# Companies without a chatbot are the best prospects, existing platforms the worst
+NO_CHATBOT_POINTS = 20
+UNKNOWN_CHATBOT_POINTS = 10
+CUSTOM_CHATBOT_POINTS = 8
+OTHER_CHATBOT_POINTS = 5
+
+# Points per detected technology, signalling an investment in web tooling
+TECHNOLOGY_POINTS = {
+    'hubspot': 5, 'marketo': 5, 'mailchimp': 3, 'intercom': 3,
+    'google analytics': 3, 'hotjar': 3, 'mixpanel': 3, 'segment': 3,
+    'shopify': 4, 'wordpress': 2, 'squarespace': 2, 'wix': 2, 'drupal': 2, 'joomla': 2,
+    'react': 2, 'angular': 2, 'vue': 2
+}
+MAX_TECHNOLOGY_POINTS = 15
+
+# Points by cached template industry bucket
+BUCKET_POINTS = {
+    'saas_companies': 15,
+    'digital_marketing': 15,
+    'service_businesses': 12,
+    'smes': 10,
+    'enterprise_it': 8
+}
+UNKNOWN_BUCKET_POINTS = 5
+
+# Interaction points grow logarithmically up to a cap
+INTERACTION_POINTS = 4
+MAX_INTERACTION_POINTS = 15
+
+# Points for any of a lead's emails being opened, clicked or replied to
+ENGAGEMENT_POINTS = {'opened': 5, 'clicked': 10, 'replied': 20}
+
+MAX_SCORE = 100
+
+def size_points(size):
+    """Return the points for a company size"""
+    size = (size or '').lower()
+    for keyword, points in SIZE_POINTS:
+        if keyword in size:
+            return points
+    return UNKNOWN_SIZE_POINTS
+
+def chatbot_points(chatbot):
+    """Return the points for a company's current chatbot"""
+    chatbot = (chatbot or '').strip().lower()
+    if chatbot in ('none', 'none detected', 'no'):
+        return NO_CHATBOT_POINTS
+    if chatbot in ('', 'unknown', 'n/a'):
+        return UNKNOWN_CHATBOT_POINTS
+    if 'custom' in chatbot:
+        return CUSTOM_CHATBOT_POINTS
+    return OTHER_CHATBOT_POINTS
+
+def technology_points(technologies):
+    """Return the capped points for a comma separated technology list"""
+    names = {name.strip().lower() for name in (technologies or '').split(',')}
+    return min(MAX_TECHNOLOGY_POINTS, sum(TECHNOLOGY_POINTS.get(name, 0) for name in names))
+
+def bucket_points(bucket):
+    """Return the points for an industry bucket"""
+    return BUCKET_POINTS.get(bucket, UNKNOWN_BUCKET_POINTS)
+
+class LeadScorer:
+    """Computes lead scores for batches of leads with NumPy array operations"""
+
+    def __init__(self, db, batch_size=BATCH_SIZE):
+        """Initialize the scorer with a connected LeadDatabase"""
+        self.db = db
+        self.batch_size = batch_size
+        # Points per distinct categorical value, so each value is weighed once
+        self.points_cache = {size_points: {}, chatbot_points: {}, technology_points: {}, bucket_points: {}}
+
+        self.cursor = db.conn.cursor()
+        # Plain tuples are much cheaper than sqlite3.Row on large batches
+        self.cursor.row_factory = None
+        self.cursor.execute("CREATE TEMP TABLE IF NOT EXISTS score_batch (company_id INTEGER PRIMARY KEY)")
+
+    def category_points(self, values, weigh):
+        """Map a column of categorical values to an array of points"""
+        cache = self.points_cache[weigh]
+        for value in set(values) - cache.keys():
+            cache[value] = weigh(value)
+        return np.fromiter(map(cache.__getitem__, values), dtype=np.float64, count=len(values))
+
+    def counts(self, company_ids, sql):
+        """Run a per-company aggregate over the batch and align its columns with company_ids
+
+        company_ids is sorted and repeats a company that has several lead_status
+        rows; each repeat gets the company's counts.
+        """
+        self.cursor.execute(sql)
+        rows = self.cursor.fetchall()
+        if not rows:
+            return np.zeros((0, len(company_ids)))
+
+        unique_ids, inverse = np.unique(company_ids, return_inverse=True)
+        found = np.array(rows, dtype=np.int64)
+        positions = np.searchsorted(unique_ids, found[:, 0])
+        columns = np.zeros((found.shape[1] - 1, len(unique_ids)))
+        columns[:, positions] = found[:, 1:].T
+        return columns[:, inverse]
+
+    def compute(self, features, interactions, engagement):
+        """Return integer scores from feature columns and aligned count arrays"""
+        scores = self.category_points(features['company_size'], size_points)
+        scores += self.category_points(features['current_chatbot'], chatbot_points)
+        scores += self.category_points(features['technologies'], technology_points)
+        scores += self.category_points(features['industry_bucket'], bucket_points)
+
+        if len(interactions):
+            scores += np.minimum(MAX_INTERACTION_POINTS, INTERACTION_POINTS * np.log1p(interactions[0]))
+
+        if len(engagement):
+            for flags, points in zip(engagement, ENGAGEMENT_POINTS.values()):
+                scores += (flags > 0) * points
+
+        return np.clip(np.rint(scores), 0, MAX_SCORE).astype(np.int64)
+
+    def score_batch(self):
+        """Score the leads in the score_batch table and write changed scores; return (scored, changed)"""
+        self.cursor.execute('''
+        SELECT b.company_id, ls.id, c.company_size, c.current_chatbot, c.technologies, c.industry_bucket, ls.score
+        FROM score_batch b
+        JOIN companies c ON c.id = b.company_id
+        JOIN lead_status ls ON ls.company_id = b.company_id
+        ORDER BY b.company_id, ls.id
+        ''')
+        rows = self.cursor.fetchall()
+        if not rows:
+            return 0, 0
+
+        ids, status_ids, sizes, chatbots, technologies, buckets, current = zip(*rows)
+        company_ids = np.array(ids, dtype=np.int64)
+
+        interactions = self.counts(company_ids, '''
+        SELECT i.company_id, COUNT(*)
+        FROM score_batch b
+        JOIN interactions i ON i.company_id = b.company_id
+        GROUP BY i.company_id
+        ORDER BY i.company_id
+        ''')
+        engagement = self.counts(company_ids, '''
+        SELECT ct.company_id, MAX(COALESCE(et.opened, 0)), MAX(COALESCE(et.clicked, 0)), MAX(COALESCE(et.replied, 0))
+        FROM score_batch b
+        JOIN contacts ct ON ct.company_id = b.company_id
+        JOIN email_tracking et ON et.contact_id = ct.id
+        GROUP BY ct.company_id
+        ORDER BY ct.company_id
+        ''')
+
+        features = {
+            'company_size': sizes,
+            'current_chatbot': chatbots,
+            'technologies': technologies,
+            'industry_bucket': buckets
+        }
+        scores = self.compute(features, interactions, engagement)
+
+        current = np.array([-1 if score is None else score for score in current], dtype=np.int64)
+        changed = scores != current
+        self.cursor.executemany(
+            "UPDATE lead_status SET score = ? WHERE id = ?",
+            zip(scores[changed].tolist(), np.array(status_ids, dtype=np.int64)[changed].tolist())
+        )
+        return len(rows), int(changed.sum())
+
+    def run(self, next_batch, finish_batch=None):
+        """Score batches until next_batch fills score_batch with no ids, committing each batch"""
+        stats = {'scored': 0, 'changed': 0, 'elapsed': 0.0, 'rows_per_sec': 0}
+        start = time.time()
+
+        try:
+            while True:
+                self.cursor.execute("DELETE FROM score_batch")
+                if not next_batch():
+                    break
+
+                scored, changed = self.score_batch()
+                if finish_batch:
+                    finish_batch()
+                self.db.conn.commit()
+
+                stats['scored'] += scored
+                stats['changed'] += changed
+        except Exception:
+            self.db.conn.rollback()
+            raise
+        finally:
+            self.cursor.execute("DELETE FROM score_batch")
+
+        stats['elapsed'] = round(time.time() - start, 2)
+        stats['rows_per_sec'] = int(stats['scored'] / stats['elapsed']) if stats['elapsed'] else stats['scored']
+        return stats
+
+    def score_all(self):
+        """Rescore every lead in company id order; return the run stats"""
+        last_id = [0]
+
+        def next_batch():
+            self.cursor.execute('''
+            INSERT INTO score_batch (company_id)
+            SELECT DISTINCT company_id FROM lead_status WHERE company_id > ? ORDER BY company_id LIMIT ?
+            ''', (last_id[0], self.batch_size))
+            if not self.cursor.rowcount:
+                return False
+            self.cursor.execute("SELECT MAX(company_id) FROM score_batch")
+            last_id[0] = self.cursor.fetchone()[0]
+            return True
+
+        # Every queued lead is about to be rescored
+        self.cursor.execute("DELETE FROM lead_score_queue")
+        return self.run(next_batch)
+
+    def score_changed(self):
+        """Rescore the leads queued because their scoring inputs changed; return the run stats"""
+        def next_batch():
+            self.cursor.execute('''
+            INSERT INTO score_batch (company_id)
+            SELECT company_id FROM lead_score_queue ORDER BY company_id LIMIT ?
+            ''', (self.batch_size,))
+            return self.cursor.rowcount > 0
+
+        def finish_batch():
+            self.cursor.execute("DELETE FROM lead_score_queue WHERE company_id IN (SELECT company_id FROM score_batch)")
+
+        return self.run(next_batch, finish_batch)
+
+    def distribution(self, width=10):
+        """Return [(low, high, count)] of current scores in bands of width points"""
+        self.cursor.execute('''
+        SELECT COALESCE(score, 0) / ? AS band, COUNT(*) FROM lead_status GROUP BY band ORDER BY band
+        ''', (width,))
+        return [(band * width, min(MAX_SCORE, band * width + width - 1), count) for band, count in self.cursor.fetchall()]
+
+def parse_arguments():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Lead Scoring Engine')
+
+    parser.add_argument('--db-path', type=str,
+                        default='/home/ubuntu/lead_generation/database/leads.db',
+                        help='Path to the SQLite database file')
+
+    parser.add_argument('--full', action='store_true',
+                        help='Rescore every lead instead of only the queued ones')
+
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                        help=f"Leads scored per batch (default: {BATCH_SIZE})")
+
+    return parser.parse_args()
+
+def main():
+    """Main function to run the lead scoring engine"""
+    args = parse_arguments()
+
+    from lead_database import LeadDatabase
+
+    db = LeadDatabase(args.db_path)
+    if not db.connect():
+        return 1
+    db.create_tables()
+
+    scorer = LeadScorer(db, args.batch_size)
+    stats = scorer.score_all() if args.full else scorer.score_changed()
+    print(f"Scored {stats['scored']} leads, {stats['changed']} changed, in {stats['elapsed']}s "
+          f"({stats['rows_per_sec']} leads/sec)")
+
+    for low, high, count in scorer.distribution():
+        print(f"  {low:3d}-{high:3d}: {count}")
+
+    db.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
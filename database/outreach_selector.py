@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Outreach Selector
+This script picks each day's outreach leads by score, follow-up urgency and channel fairness
+"""
+
+import sys
+import heapq
+import argparse
+from datetime import datetime, timedelta
+
+# Priority bonus per day a lead's next action is overdue, and its cap. The cap
+# bounds how far a lower score can climb, which lets selection stop early.
+URGENCY_POINTS_PER_DAY = 2
+MAX_URGENCY_POINTS = 20
+
+# Leads touched on another channel this recently are held back, so one lead
+# does not get an email and a LinkedIn action on the same days
+FAIRNESS_DAYS = 2
+FAIRNESS_PENALTY = 15
+
+# Contact filters and the other channel's last touch column, per channel
+CHANNELS = {
+    'email': {
+        'contact_condition': "ct.email IS NOT NULL AND ct.email != '' AND ct.email != 'N/A'",
+        'other_channel_column': 'last_linkedin_at'
+    },
+    'linkedin': {
+        'contact_condition': "ct.linkedin_url IS NOT NULL AND ct.linkedin_url != ''",
+        'other_channel_column': 'last_email_at'
+    }
+}
+
+LEAD_COLUMNS = '''
+c.id, c.company_name, c.website, c.industry, c.industry_bucket, c.company_size,
+c.current_chatbot, c.address, c.city, c.state, c.zipcode, c.country,
+ct.id AS contact_id, ct.first_name, ct.last_name, ct.email, ct.phone, ct.position, ct.linkedin_url,
+ls.status, COALESCE(ls.score, 0) AS score, ls.last_contacted, ls.next_action_date,
+COALESCE(ls.emails_sent, 0) AS email_count, ls.last_email_at, ls.last_linkedin_at
+'''
+
+def parse_date(value):
+    """Parse a stored date or timestamp, returning None when it is missing or malformed"""
+    if not value:
+        return None
+    try:
+        return datetime.strptime(str(value)[:10], "%Y-%m-%d")
+    except ValueError:
+        return None
+
+class OutreachSelector:
+    """Selects the top leads for an outreach quota from index-ordered candidate streams
+
+    Each status is streamed in (score DESC, next_action_date) order through
+    idx_lead_status_priority into a heap holding the best K leads so far; a
+    NULL score ranks as 0, as in the API's score sort.
+    Urgency can add at most MAX_URGENCY_POINTS and fairness only subtracts,
+    so a stream stops once no later lead can beat the worst lead in the heap,
+    and seeks to the next lower score once the rest of a score cannot.
+    """
+
+    def __init__(self, db, now=None):
+        """Initialize the selector with a connected LeadDatabase"""
+        self.db = db
+        self.now = now or datetime.now()
+        self.today = self.now.replace(hour=0, minute=0, second=0, microsecond=0)
+        self.fairness_cutoff = (self.now - timedelta(days=FAIRNESS_DAYS)).strftime("%Y-%m-%d %H:%M:%S")
+        # Companies selected for any channel during this run
+        self.selected = set()
+        self.stats = {}
+
+    def priority(self, lead, channel):
+        """Return a lead's priority: its score plus urgency, minus the fairness penalty"""
+        priority = lead['score'] + self.urgency(lead)
+
+        other_touch = lead[CHANNELS[channel]['other_channel_column']]
+        if other_touch and str(other_touch) >= self.fairness_cutoff:
+            priority -= FAIRNESS_PENALTY
+
+        return priority
+
+    def urgency(self, lead):
+        """Return the priority bonus for a lead whose next action is due"""
+        due = parse_date(lead['next_action_date'])
+        if due and due <= self.today:
+            return min(MAX_URGENCY_POINTS, URGENCY_POINTS_PER_DAY * ((self.today - due).days + 1))
+        return 0
+
+    def candidates(self, channel, status, condition, params, below=None):
+        """Stream the leads of one status in (score DESC, next_action_date) order, optionally below a score"""
+        cursor = self.db.conn.cursor()
+        cursor.row_factory = None
+        cursor.execute(f'''
+        SELECT {LEAD_COLUMNS}
+        FROM lead_status ls INDEXED BY idx_lead_status_priority
+        JOIN companies c ON c.id = ls.company_id
+        JOIN contacts ct ON ct.company_id = ls.company_id
+        WHERE ls.status = ?
+        {'' if below is None else 'AND COALESCE(ls.score, 0) < ?'}
+        AND {CHANNELS[channel]['contact_condition']}
+        AND ({condition})
+        ORDER BY COALESCE(ls.score, 0) DESC, ls.next_action_date
+        ''', (status,) + (() if below is None else (below,)) + tuple(params))
+
+        columns = [column[0] for column in cursor.description]
+        try:
+            for row in cursor:
+                yield dict(zip(columns, row))
+        finally:
+            cursor.close()
+
+    def select(self, channel, statuses, limit, condition='1', params=()):
+        """Return up to limit leads for a channel, best first
+
+        condition is an extra SQL filter over the ls, c and ct aliases with
+        its own params. A company is selected at most once per run, across
+        channels and calls.
+        """
+        self.stats = {'channel': channel, 'scanned': 0, 'seeks': 0, 'selected': 0}
+        if limit <= 0:
+            return []
+
+        heap = []
+        seen = set()
+        sequence = 0
+
+        for status in statuses:
+            below = None
+            while True:
+                self.stats['seeks'] += 1
+                stream = self.candidates(channel, status, condition, params, below)
+                below = None
+                try:
+                    for lead in stream:
+                        self.stats['scanned'] += 1
+                        sequence += 1
+                        if len(heap) == limit:
+                            # Lower scores can gain at most MAX_URGENCY_POINTS
+                            if lead['score'] + MAX_URGENCY_POINTS <= heap[0][0]:
+                                break
+                            # Within a score, later leads are due no sooner and gain no more urgency,
+                            # so the rest of the score is skipped with a new index seek
+                            if lead['next_action_date'] and lead['score'] + self.urgency(lead) <= heap[0][0]:
+                                below = lead['score']
+                                break
+
+                        # A company is contacted through one contact per run; its first
+                        # streamed contact ranks at least as high as the others
+                        if lead['id'] in self.selected or lead['id'] in seen:
+                            continue
+                        seen.add(lead['id'])
+
+                        # Ties go to the lead streamed first: higher score, then earlier due date
+                        entry = (self.priority(lead, channel), -sequence, lead)
+                        if len(heap) < limit:
+                            heapq.heappush(heap, entry)
+                        elif entry[:2] > heap[0][:2]:
+                            heapq.heapreplace(heap, entry)
+                finally:
+                    stream.close()
+
+                if below is None:
+                    break
+
+        leads = [lead for _, _, lead in sorted(heap, key=lambda entry: entry[:2], reverse=True)]
+        self.selected.update(lead['id'] for lead in leads)
+
+        self.stats['selected'] = len(leads)
+        return leads
+
+def parse_arguments():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Outreach Selector')
+
+    parser.add_argument('--db-path', type=str,
+                        default='/home/ubuntu/lead_generation/database/leads.db',
+                        help='Path to the SQLite database file')
+
+    parser.add_argument('--channel', choices=list(CHANNELS), default='email',
+                        help='Outreach channel to select leads for (default: email)')
+
+    parser.add_argument('--status', nargs='+', default=['New'],
+                        help='Lead statuses to select from (default: New)')
+
+    parser.add_argument('--limit', type=int, default=50,
+                        help='Number of leads to select (default: 50)')
+
+    return parser.parse_args()
+
+def main():
+    """Main function to preview an outreach selection"""
+    args = parse_arguments()
+
+    from lead_database import LeadDatabase
+
+    db = LeadDatabase(args.db_path)
+    if not db.connect():
+        return 1
+    db.create_tables()
+
+    selector = OutreachSelector(db)
+    leads = selector.select(args.channel, args.status, args.limit)
+    for lead in leads:
+        print(f"{lead['score']:3d}  {lead['status']:<22} {lead['next_action_date'] or '':<12} {lead['company_name']}")
+    print(f"Selected {selector.stats['selected']} of {selector.stats['scanned']} leads scanned "
+          f"in {selector.stats['seeks']} index seeks")
+
+    db.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
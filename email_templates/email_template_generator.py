@@ -10,16 +10,29 @@ import json
 import csv
 from datetime import datetime
 import argparse
-import random
+import gzip
+import itertools
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from template_renderer import TemplateRenderer
+from industry_classifier import get_classifier
 
 # Create necessary directories
 os.makedirs('/home/ubuntu/lead_generation/email_templates/output', exist_ok=True)
 
+# Columns of the personalized email output
+PERSONALIZED_FIELDNAMES = ['id', 'company_name', 'first_name', 'last_name', 'email', 'industry', 
+                           'initial_subject', 'initial_body', 'followup_subject', 'followup_body', 
+                           'final_subject', 'final_body']
+
 class EmailTemplateGenerator:
-    def __init__(self):
+    def __init__(self, rules_file=None):
         """Initialize the email template generator"""
         self.timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         
+        # Shared, memoized mapping from raw industry strings to template industries
+        self.classifier = get_classifier(rules_file)
+        
         # Base templates for different industries and stages
         self.templates = {
             'initial_outreach': {
@@ -763,6 +776,9 @@ Best regards,
                 'client satisfaction'
             ]
         }
+        
+        # Templates are compiled into literal and placeholder segments on first use
+        self.renderer = TemplateRenderer(self.templates, self.industry_specifics)
     
     def generate_templates(self, output_dir=None):
         """Generate and save all templates"""
@@ -813,41 +829,44 @@ Best regards,
         
         return output_dir
     
-    def generate_personalized_template(self, lead, stage, industry):
+    def generate_personalized_template(self, lead, stage, industry, rng=None):
         """Generate a personalized template for a specific lead"""
-        if industry not in self.templates[stage]:
-            industry = list(self.templates[stage].keys())[0]  # Use the first industry as fallback
-        
-        templates = self.templates[stage][industry]
-        template = random.choice(templates)  # Randomly select a template
-        
-        # Format the template with lead information
-        first_name = lead.get('first_name', 'there')
-        if first_name == 'N/A' or not first_name:
-            first_name = 'there'
-        
-        company = lead.get('company_name', 'your company')
-        if company == 'N/A' or not company:
-            company = 'your company'
-        
-        # Select a random industry-specific detail
-        industry_specific = random.choice(self.industry_specifics[industry])
+        # The result also carries the base template and variables so that callers
+        # can store a send without the rendered text. Passing a seeded rng makes
+        # the choice of template variant reproducible.
+        return self.renderer.render(lead, stage, industry, rng)
+    
+    def render_many(self, leads, stage, industry=None):
+        """Lazily generate personalized templates for many leads at one stage
         
-        personalized_subject = template['subject'].format(
-            first_name=first_name,
-            company=company,
-            industry_specific=industry_specific
-        )
+        industry is either a template industry or a callable mapping a lead to one;
+        by default each lead is classified from its industry.
+        """
+        return self.renderer.render_many(leads, stage, industry or self.classifier.classify_lead)
+    
+    def personalized_row(self, lead):
+        """Render all three stages for a lead as one output row"""
+        # Map the industry to one of our template categories
+        template_industry = self.classifier.classify_lead(lead)
         
-        personalized_body = template['body'].format(
-            first_name=first_name,
-            company=company,
-            industry_specific=industry_specific
-        )
+        # Generate personalized templates for each stage
+        initial = self.generate_personalized_template(lead, 'initial_outreach', template_industry)
+        followup = self.generate_personalized_template(lead, 'follow_up', template_industry)
+        final = self.generate_personalized_template(lead, 'final_attempt', template_industry)
         
         return {
-            'subject': personalized_subject,
-            'body': personalized_body
+            'id': lead.get('id', ''),
+            'company_name': lead.get('company_name', ''),
+            'first_name': lead.get('first_name', ''),
+            'last_name': lead.get('last_name', ''),
+            'email': lead.get('email', ''),
+            'industry': (lead.get('industry') or '').lower(),
+            'initial_subject': initial['subject'],
+            'initial_body': initial['body'],
+            'followup_subject': followup['subject'],
+            'followup_body': followup['body'],
+            'final_subject': final['subject'],
+            'final_body': final['body']
         }
     
     def generate_personalized_templates_for_leads(self, leads, output_file=None):
@@ -857,47 +876,12 @@ Best regards,
         
         try:
             with open(output_file, 'w', newline='', encoding='utf-8') as csvfile:
-                fieldnames = ['id', 'company_name', 'first_name', 'last_name', 'email', 'industry', 
-                             'initial_subject', 'initial_body', 'followup_subject', 'followup_body', 
-                             'final_subject', 'final_body']
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+                writer = csv.DictWriter(csvfile, fieldnames=PERSONALIZED_FIELDNAMES)
                 
                 writer.writeheader()
                 
                 for lead in leads:
-                    industry = lead.get('industry', '').lower()
-                    
-                    # Map the industry to one of our template categories
-                    template_industry = 'smes'  # Default to SMEs
-                    
-                    if 'market' in industry or 'digital' in industry or 'agency' in industry:
-                        template_industry = 'digital_marketing'
-                    elif 'saas' in industry or 'software' in industry or 'tech' in industry:
-                        template_industry = 'saas_companies'
-                    elif 'enterprise' in industry or 'it' in industry or 'information technology' in industry:
-                        template_industry = 'enterprise_it'
-                    elif 'service' in industry or 'plumb' in industry or 'electric' in industry:
-                        template_industry = 'service_businesses'
-                    
-                    # Generate personalized templates for each stage
-                    initial = self.generate_personalized_template(lead, 'initial_outreach', template_industry)
-                    followup = self.generate_personalized_template(lead, 'follow_up', template_industry)
-                    final = self.generate_personalized_template(lead, 'final_attempt', template_industry)
-                    
-                    writer.writerow({
-                        'id': lead.get('id', ''),
-                        'company_name': lead.get('company_name', ''),
-                        'first_name': lead.get('first_name', ''),
-                        'last_name': lead.get('last_name', ''),
-                        'email': lead.get('email', ''),
-                        'industry': industry,
-                        'initial_subject': initial['subject'],
-                        'initial_body': initial['body'],
-                        'followup_subject': followup['subject'],
-                        'followup_body': followup['body'],
-                        'final_subject': final['subject'],
-                        'final_body': final['body']
-                    })
+                    writer.writerow(self.personalized_row(lead))
             
             print(f"Saved personalized email templates for {len(leads)} leads to {output_file}")
             return output_file
@@ -905,6 +889,66 @@ Best regards,
             print(f"Error saving personalized email templates: {e}")
             return None
     
+    def generate_personalized_templates_streaming(self, leads, output_dir=None, shard_size=10000,
+                                                  workers=None, output_format='jsonl', compress=True):
+        """Generate personalized templates for a stream of leads into shard files
+        
+        leads may be any iterable of dicts, a csv.DictReader or a DB cursor. Chunks of
+        shard_size leads are rendered and written by a pool of worker processes, and
+        only a bounded number of chunks are in flight at once so memory stays flat.
+        """
+        if not output_dir:
+            output_dir = f"/home/ubuntu/lead_generation/email_templates/output/personalized_emails_{self.timestamp}"
+        
+        if output_format not in ('jsonl', 'csv'):
+            raise ValueError(f"Unsupported output format: {output_format}")
+        
+        os.makedirs(output_dir, exist_ok=True)
+        workers = workers or os.cpu_count() or 1
+        extension = f".{output_format}" + ('.gz' if compress else '')
+        
+        shards = []
+        total_leads = 0
+        
+        try:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_shard_worker,
+                                     initargs=(self.classifier.rules_file,)) as executor:
+                pending = set()
+                chunks = iter_chunks(iter_lead_dicts(leads), shard_size)
+                
+                for shard_number, chunk in enumerate(chunks):
+                    shard_file = os.path.join(output_dir, f"shard_{shard_number:05d}{extension}")
+                    pending.add(executor.submit(_write_shard, shard_file, chunk, output_format, compress))
+                    
+                    # Apply backpressure so unread leads stay in the source iterator
+                    if len(pending) >= workers * 2:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            shards.append(future.result())
+                
+                for future in pending:
+                    shards.append(future.result())
+            
+            shards.sort()
+            total_leads = sum(count for _, count in shards)
+            
+            manifest_file = os.path.join(output_dir, 'manifest.json')
+            with open(manifest_file, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'generated_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                    'format': output_format,
+                    'compressed': compress,
+                    'fieldnames': PERSONALIZED_FIELDNAMES,
+                    'total_leads': total_leads,
+                    'shards': [{'file': os.path.basename(path), 'leads': count} for path, count in shards]
+                }, f, indent=4)
+            
+            print(f"Saved personalized email templates for {total_leads} leads to {len(shards)} shards in {output_dir}")
+            return manifest_file
+        except Exception as e:
+            print(f"Error saving personalized email templates: {e}")
+            return None
+    
     def generate_html_preview(self, lead, output_dir=None):
         """Generate HTML preview files for a specific lead"""
         if not output_dir:
@@ -912,19 +956,8 @@ Best regards,
         
         os.makedirs(output_dir, exist_ok=True)
         
-        industry = lead.get('industry', '').lower()
-        
         # Map the industry to one of our template categories
-        template_industry = 'smes'  # Default to SMEs
-        
-        if 'market' in industry or 'digital' in industry or 'agency' in industry:
-            template_industry = 'digital_marketing'
-        elif 'saas' in industry or 'software' in industry or 'tech' in industry:
-            template_industry = 'saas_companies'
-        elif 'enterprise' in industry or 'it' in industry or 'information technology' in industry:
-            template_industry = 'enterprise_it'
-        elif 'service' in industry or 'plumb' in industry or 'electric' in industry:
-            template_industry = 'service_businesses'
+        template_industry = self.classifier.classify_lead(lead)
         
         # Generate personalized templates for each stage
         stages = {
@@ -960,6 +993,53 @@ Best regards,
         
         return preview_files
 
+def iter_lead_dicts(leads):
+    """Yield leads as dicts from an iterable of dicts, sqlite3.Row objects or a DB cursor"""
+    columns = None
+    if getattr(leads, 'description', None):
+        columns = [column[0] for column in leads.description]
+    
+    for lead in leads:
+        if isinstance(lead, dict):
+            yield lead
+        elif hasattr(lead, 'keys'):
+            yield dict(lead)
+        else:
+            yield dict(zip(columns, lead))
+
+def iter_chunks(iterable, size):
+    """Yield lists of up to size items from an iterable"""
+    while True:
+        chunk = list(itertools.islice(iterable, size))
+        if not chunk:
+            return
+        yield chunk
+
+# Per-process generator used by the shard workers
+_shard_generator = None
+
+def _init_shard_worker(rules_file):
+    """Create the generator once in each worker process"""
+    global _shard_generator
+    _shard_generator = EmailTemplateGenerator(rules_file)
+
+def _write_shard(shard_file, leads, output_format, compress):
+    """Render a chunk of leads and write it to one shard file"""
+    opener = gzip.open if compress else open
+    
+    with opener(shard_file, 'wt', newline='', encoding='utf-8') as f:
+        if output_format == 'csv':
+            writer = csv.DictWriter(f, fieldnames=PERSONALIZED_FIELDNAMES)
+            writer.writeheader()
+            for lead in leads:
+                writer.writerow(_shard_generator.personalized_row(lead))
+        else:
+            for lead in leads:
+                f.write(json.dumps(_shard_generator.personalized_row(lead), ensure_ascii=False))
+                f.write('\n')
+    
+    return shard_file, len(leads)
+
 def parse_arguments():
     """Parse command line arguments"""
     parser = argparse.ArgumentParser(description='Email Template Generator')
@@ -972,11 +1052,29 @@ def parse_arguments():
                         help='Input CSV file with leads data for personalized templates')
     
     parser.add_argument('--output-file', type=str, default=None,
-                        help='Output CSV file for personalized templates')
+                        help='Output CSV file for personalized templates (output directory with --stream)')
     
     parser.add_argument('--preview', action='store_true',
                         help='Generate HTML preview files for leads')
     
+    parser.add_argument('--database', type=str, default=None,
+                        help='SQLite lead database to stream leads from instead of an input CSV')
+    
+    parser.add_argument('--stream', action='store_true',
+                        help='Stream personalized templates into compressed shards using all cores')
+    
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Number of worker processes for streaming generation (default: all cores)')
+    
+    parser.add_argument('--shard-size', type=int, default=10000,
+                        help='Number of leads per shard for streaming generation')
+    
+    parser.add_argument('--format', type=str, choices=['jsonl', 'csv'], default='jsonl',
+                        help='Shard format for streaming generation')
+    
+    parser.add_argument('--no-compress', action='store_true',
+                        help='Write uncompressed shards for streaming generation')
+    
     return parser.parse_args()
 
 def main():
@@ -992,8 +1090,38 @@ def main():
     # Generate and save templates
     template_dir = generator.generate_templates(args.output_dir)
     
+    # Stream personalized templates to shards without loading every lead
+    if args.stream:
+        streaming_options = {
+            'output_dir': args.output_file,
+            'shard_size': args.shard_size,
+            'workers': args.workers,
+            'output_format': args.format,
+            'compress': not args.no_compress
+        }
+        
+        if args.database and os.path.exists(args.database):
+            import sqlite3
+            
+            conn = sqlite3.connect(args.database)
+            cursor = conn.execute('''
+            SELECT c.id, c.company_name, c.industry, ct.first_name, ct.last_name, ct.email
+            FROM companies c
+            LEFT JOIN contacts ct ON c.id = ct.company_id
+            ''')
+            manifest_file = generator.generate_personalized_templates_streaming(cursor, **streaming_options)
+            conn.close()
+        elif args.input and os.path.exists(args.input):
+            with open(args.input, 'r', encoding='utf-8') as file:
+                manifest_file = generator.generate_personalized_templates_streaming(csv.DictReader(file), **streaming_options)
+        else:
+            print("No input data provided. Please specify --input or --database.")
+            return 1
+        
+        print(f"Personalized template shards described in: {manifest_file}")
+    
     # Generate personalized templates if input file is provided
-    if args.input and os.path.exists(args.input):
+    elif args.input and os.path.exists(args.input):
         try:
             with open(args.input, 'r', encoding='utf-8') as file:
                 csv_reader = csv.DictReader(file)
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Industry Classifier for Lead Generation Templates
+This module maps free-text industry strings to the template industry buckets
+"""
+
+import os
+import sys
+import re
+import json
+import hashlib
+import argparse
+
+# Default classification rules, in priority order. Tokens must match a whole word,
+# prefixes match the start of a word and phrases match a run of whole words.
+DEFAULT_RULES = {
+    'default': 'smes',
+    'rules': [
+        {
+            'bucket': 'digital_marketing',
+            'tokens': ['digital', 'agency', 'agencies'],
+            'prefixes': ['market'],
+            'phrases': []
+        },
+        {
+            'bucket': 'saas_companies',
+            'tokens': ['saas'],
+            'prefixes': ['software', 'tech'],
+            'phrases': []
+        },
+        {
+            'bucket': 'enterprise_it',
+            'tokens': ['enterprise', 'it', 'ict'],
+            'prefixes': [],
+            'phrases': ['information technology']
+        },
+        {
+            'bucket': 'service_businesses',
+            'tokens': [],
+            'prefixes': ['service', 'plumb', 'electric'],
+            'phrases': []
+        }
+    ]
+}
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+class IndustryClassifier:
+    def __init__(self, rules_file=None):
+        """Initialize the classifier from a rules file or the default rules"""
+        rules = DEFAULT_RULES
+
+        if rules_file:
+            with open(rules_file, 'r', encoding='utf-8') as f:
+                rules = json.load(f)
+
+        self.rules_file = rules_file
+        # Changes whenever the rules do, so cached buckets can be recomputed
+        self.version = hashlib.sha1(json.dumps(rules, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+        self.default = rules.get('default', 'smes')
+        self.buckets = [rule['bucket'] for rule in rules['rules']]
+
+        # Token index: whole word -> best (lowest) rule rank
+        self.token_index = {}
+        self.prefixes = []
+        self.phrases = []
+
+        for rank, rule in enumerate(rules['rules']):
+            for token in rule.get('tokens', []):
+                self.token_index.setdefault(token.lower(), rank)
+
+            for prefix in rule.get('prefixes', []):
+                self.prefixes.append((prefix.lower(), rank))
+
+            for phrase in rule.get('phrases', []):
+                words = tuple(TOKEN_PATTERN.findall(phrase.lower()))
+                if words:
+                    self.phrases.append((words, rank))
+
+        # Memoized results keyed on the raw industry string and on single words
+        self.cache = {}
+        self.word_ranks = {}
+
+    def word_rank(self, word):
+        """Return the best rule rank matched by a single word, or None"""
+        if word in self.word_ranks:
+            return self.word_ranks[word]
+
+        rank = self.token_index.get(word)
+
+        for prefix, prefix_rank in self.prefixes:
+            if word.startswith(prefix) and (rank is None or prefix_rank < rank):
+                rank = prefix_rank
+
+        self.word_ranks[word] = rank
+        return rank
+
+    def classify(self, industry):
+        """Map a raw industry string to a template industry bucket"""
+        industry = industry or ''
+
+        bucket = self.cache.get(industry)
+        if bucket is not None:
+            return bucket
+
+        words = TOKEN_PATTERN.findall(industry.lower())
+
+        # Phrases are more specific than single words, so they take precedence
+        best = None
+        for phrase, rank in self.phrases:
+            size = len(phrase)
+            if any(tuple(words[i:i + size]) == phrase for i in range(len(words) - size + 1)):
+                if best is None or rank < best:
+                    best = rank
+
+        if best is None:
+            for word in words:
+                rank = self.word_rank(word)
+                if rank is not None and (best is None or rank < best):
+                    best = rank
+
+        bucket = self.buckets[best] if best is not None else self.default
+        self.cache[industry] = bucket
+        return bucket
+
+    def classify_lead(self, lead):
+        """Return the template industry for a lead, preferring a cached bucket"""
+        return lead.get('industry_bucket') or self.classify(lead.get('industry', ''))
+
+# One classifier per rules file, shared by every generator in the process
+_classifiers = {}
+
+def get_classifier(rules_file=None):
+    """Return the shared classifier for a rules file"""
+    if rules_file not in _classifiers:
+        _classifiers[rules_file] = IndustryClassifier(rules_file)
+    return _classifiers[rules_file]
+
+def parse_arguments():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Industry Classifier')
+
+    parser.add_argument('industries', nargs='*',
+                        help='Industry strings to classify')
+
+    parser.add_argument('--rules-file', type=str, default=None,
+                        help='JSON file with classification rules')
+
+    parser.add_argument('--dump-rules', action='store_true',
+                        help='Print the default rules as JSON, as a starting point for a rules file')
+
+    return parser.parse_args()
+
+def main():
+    """Main function to run the industry classifier"""
+    args = parse_arguments()
+
+    if args.dump_rules:
+        print(json.dumps(DEFAULT_RULES, indent=4))
+        return 0
+
+    if args.rules_file and not os.path.exists(args.rules_file):
+        print(f"Rules file not found: {args.rules_file}")
+        return 1
+
+    classifier = get_classifier(args.rules_file)
+    for industry in args.industries:
+        print(f"{industry}: {classifier.classify(industry)}")
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Email Preview Site Builder for AI Chatbot Startup Lead Generation
+This script renders email previews for many leads into a single static site
+"""
+
+import os
+import re
+import sys
+import csv
+import json
+import html
+import random
+import hashlib
+import sqlite3
+import argparse
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from email_template_generator import EmailTemplateGenerator, iter_lead_dicts
+
+STAGES = {
+    'initial_outreach': 'Initial Outreach',
+    'follow_up': 'Follow Up',
+    'final_attempt': 'Final Attempt'
+}
+
+STYLESHEET = """body { font-family: Arial, sans-serif; margin: 20px; }
+h1 { color: #333; }
+.stage { border: 1px solid #ddd; border-radius: 5px; padding: 15px; margin-bottom: 20px; }
+.subject { font-weight: bold; margin-bottom: 10px; }
+.body { white-space: pre-wrap; }
+table { border-collapse: collapse; width: 100%; }
+th, td { border: 1px solid #ddd; padding: 8px; text-align: left; }
+th { background-color: #f2f2f2; }
+tr:nth-child(even) { background-color: #f9f9f9; }
+.pages a { margin-right: 8px; }
+"""
+
+# Bump when render_lead_page's markup changes, so every page is rendered again
+PAGE_VERSION = 1
+
+class PreviewSiteBuilder:
+    def __init__(self, output_dir, generator=None, workers=8, page_size=1000):
+        """Initialize the preview site builder"""
+        self.output_dir = output_dir
+        self.leads_dir = os.path.join(output_dir, 'leads')
+        self.manifest_file = os.path.join(output_dir, 'manifest.json')
+        self.generator = generator or EmailTemplateGenerator()
+        self.workers = workers
+        self.page_size = page_size
+
+        # Everything besides the lead that a page's content depends on
+        self.template_version = hashlib.sha1(json.dumps({
+            'page': PAGE_VERSION,
+            'templates': self.generator.templates,
+            'industry_specifics': self.generator.industry_specifics,
+            'rules': self.generator.classifier.version
+        }, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    def lead_key(self, lead):
+        """Return a stable key and file name for a lead"""
+        company = lead.get('company_name') or 'company'
+        # A company can have several contacts, each of which gets its own page; rows
+        # without a contact id, as in a CSV file, fall back to the email, then the name
+        name = f"{lead.get('first_name') or ''} {lead.get('last_name') or ''}".strip()
+        contact = f"c{lead['contact_id']}" if lead.get('contact_id') else lead.get('email') or name
+        identity = ':'.join(str(part) for part in (lead.get('id'), contact) if part) or company
+        slug = re.sub(r'[^a-z0-9]+', '-', f"{identity}-{company}".lower()).strip('-')
+        return identity, f"{slug[:80]}-{hashlib.sha1(identity.encode('utf-8')).hexdigest()[:8]}.html"
+
+    def input_hash(self, lead):
+        """Hash a lead's fields with the template version, which together determine its page"""
+        data = json.dumps(lead, sort_keys=True, default=str)
+        return hashlib.sha1(f"{self.template_version}\0{data}".encode('utf-8')).hexdigest()
+
+    def render_lead_page(self, lead, key):
+        """Render the preview page for one lead"""
+        # Seeding by lead keeps the chosen variants stable between runs, so an unchanged lead keeps its page
+        rng = random.Random(key)
+        template_industry = self.generator.classifier.classify_lead(lead)
+        company = html.escape(lead.get('company_name') or 'Company')
+
+        sections = []
+        for stage_key, stage_name in STAGES.items():
+            template = self.generator.generate_personalized_template(lead, stage_key, template_industry, rng)
+            sections.append(
+                f"<div class='stage'>\n<h2>{stage_name}</h2>\n"
+                f"<div class='subject'>Subject: {html.escape(template['subject'])}</div>\n"
+                f"<div class='body'>{html.escape(template['body'])}</div>\n</div>\n"
+            )
+
+        return (
+            f"<!DOCTYPE html>\n<html>\n<head>\n<meta charset='utf-8'>\n"
+            f"<title>Email Previews for {company}</title>\n"
+            f"<link rel='stylesheet' href='../styles.css'>\n</head>\n<body>\n"
+            f"<p><a href='../index.html'>All leads</a></p>\n"
+            f"<h1>Email Previews for {company}</h1>\n"
+            + ''.join(sections) +
+            f"</body>\n</html>"
+        )
+
+    def load_manifest(self):
+        """Load the manifest from the previous build, if any"""
+        if not os.path.exists(self.manifest_file):
+            return {}
+
+        try:
+            with open(self.manifest_file, 'r', encoding='utf-8') as f:
+                return json.load(f).get('leads', {})
+        except (OSError, ValueError) as e:
+            print(f"Error loading preview manifest: {e}")
+            return {}
+
+    def write_file(self, path, content):
+        """Write a file in one call"""
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+
+    def write_index(self, entries):
+        """Write the paginated lead index"""
+        pages = [entries[i:i + self.page_size] for i in range(0, len(entries), self.page_size)] or [[]]
+        page_names = ['index.html'] + [f"index_{n}.html" for n in range(2, len(pages) + 1)]
+        page_links = ''.join(f"<a href='{name}'>{n}</a>" for n, name in enumerate(page_names, 1))
+
+        for page_name, page in zip(page_names, pages):
+            rows = ''.join(
+                f"<tr><td><a href='leads/{entry['file']}'>{html.escape(entry['company_name'])}</a></td>"
+                f"<td>{html.escape(entry['contact'])}</td><td>{html.escape(entry['industry'])}</td></tr>\n"
+                for entry in page
+            )
+            self.write_file(os.path.join(self.output_dir, page_name), (
+                f"<!DOCTYPE html>\n<html>\n<head>\n<meta charset='utf-8'>\n"
+                f"<title>Email Previews</title>\n"
+                f"<link rel='stylesheet' href='styles.css'>\n</head>\n<body>\n"
+                f"<h1>Email Previews ({len(entries)} leads)</h1>\n"
+                f"<div class='pages'>{page_links}</div>\n"
+                f"<table>\n<tr><th>Company</th><th>Contact</th><th>Industry</th></tr>\n{rows}</table>\n"
+                f"</body>\n</html>"
+            ))
+
+        return len(pages)
+
+    def remove_orphans(self, previous, manifest):
+        """Delete pages from the previous build that no lead in this build uses"""
+        current = {entry['file'] for entry in manifest.values()}
+        removed = 0
+
+        for entry in previous.values():
+            if entry['file'] in current:
+                continue
+            path = os.path.join(self.leads_dir, entry['file'])
+            if os.path.exists(path):
+                os.remove(path)
+                removed += 1
+            current.add(entry['file'])
+
+        return removed
+
+    def build(self, leads):
+        """Render previews for every lead, rendering and writing only the pages whose inputs changed"""
+        os.makedirs(self.leads_dir, exist_ok=True)
+        self.write_file(os.path.join(self.output_dir, 'styles.css'), STYLESHEET)
+
+        previous = self.load_manifest()
+        manifest = {}
+        written = 0
+        skipped = 0
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            pending = set()
+
+            for lead in iter_lead_dicts(leads):
+                key, file_name = self.lead_key(lead)
+                input_hash = self.input_hash(lead)
+
+                manifest[key] = {
+                    'file': file_name,
+                    'hash': input_hash,
+                    'company_name': lead.get('company_name') or '',
+                    'contact': f"{lead.get('first_name') or ''} {lead.get('last_name') or ''}".strip(),
+                    'industry': lead.get('industry') or ''
+                }
+
+                path = os.path.join(self.leads_dir, file_name)
+                old = previous.get(key)
+                if old and old['hash'] == input_hash and old['file'] == file_name and os.path.exists(path):
+                    skipped += 1
+                    continue
+
+                page = self.render_lead_page(lead, key)
+                pending.add(executor.submit(self.write_file, path, page))
+                written += 1
+
+                # Keep the number of queued pages bounded
+                if len(pending) >= self.workers * 4:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        future.result()
+
+            for future in pending:
+                future.result()
+
+        removed = self.remove_orphans(previous, manifest)
+        pages = self.write_index(list(manifest.values()))
+
+        self.write_file(self.manifest_file, json.dumps({
+            'generated_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'stylesheet': 'styles.css',
+            'index_pages': pages,
+            'leads': manifest
+        }, indent=1))
+
+        print(f"Preview site for {len(manifest)} leads in {self.output_dir}: {written} written, {skipped} unchanged, {removed} removed")
+        return self.manifest_file
+
+def parse_arguments():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Email Preview Site Builder')
+
+    parser.add_argument('--output-dir', type=str,
+                        default='/home/ubuntu/lead_generation/email_templates/output/preview_site',
+                        help='Output directory for the preview site')
+
+    parser.add_argument('--input', type=str, default=None,
+                        help='Input CSV file with leads data')
+
+    parser.add_argument('--database', type=str, default=None,
+                        help='SQLite lead database to read leads from')
+
+    parser.add_argument('--workers', type=int, default=8,
+                        help='Number of writer threads')
+
+    return parser.parse_args()
+
+def main():
+    """Main function to build the preview site"""
+    print(f"Starting preview site builder at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+    args = parse_arguments()
+    builder = PreviewSiteBuilder(args.output_dir, workers=args.workers)
+
+    if args.database and os.path.exists(args.database):
+        conn = sqlite3.connect(args.database)
+        cursor = conn.execute('''
+        SELECT c.id, c.company_name, c.industry, ct.id AS contact_id, ct.first_name, ct.last_name, ct.email
+        FROM companies c
+        LEFT JOIN contacts ct ON c.id = ct.company_id
+        ''')
+        builder.build(cursor)
+        conn.close()
+    elif args.input and os.path.exists(args.input):
+        with open(args.input, 'r', encoding='utf-8') as file:
+            builder.build(csv.DictReader(file))
+    else:
+        print("No input data provided. Please specify --input or --database.")
+        return 1
+
+    print(f"Preview site builder completed at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Precompiled Template Renderer for Lead Generation Messages
+This module compiles message templates into literal and placeholder segments once
+so that personalizing them for many leads avoids re-parsing the template text
+"""
+
+import sys
+import time
+import string
+import random
+import argparse
+
+class CompiledTemplate:
+    """A template pre-split into literal and placeholder segments"""
+    __slots__ = ('source', 'field_names', '_parts', '_slots')
+
+    def __init__(self, source):
+        """Split the template text into segments once"""
+        self.source = source
+        self._parts = []
+        self._slots = []
+
+        for literal, field_name, format_spec, conversion in string.Formatter().parse(source):
+            if literal:
+                self._parts.append(literal)
+
+            if field_name is not None:
+                if format_spec or conversion:
+                    raise ValueError(f"Unsupported placeholder in template: {{{field_name}}}")
+
+                self._slots.append((len(self._parts), field_name))
+                self._parts.append('')
+
+        self.field_names = tuple(sorted({field_name for _, field_name in self._slots}))
+
+    def render(self, values):
+        """Render the template with a mapping of placeholder values
+
+        Values that are not strings are formatted as str.format would:
+
+        >>> CompiledTemplate("Hi {name}, {count} new leads, owner {owner}").render({'name': 'Ann', 'count': 3, 'owner': None})
+        'Hi Ann, 3 new leads, owner None'
+        """
+        parts = self._parts[:]
+        for index, field_name in self._slots:
+            value = values[field_name]
+            parts[index] = value if type(value) is str else format(value)
+        return ''.join(parts)
+
+class TemplateRenderer:
+    """Compiled cache over nested {stage: {industry: [template, ...]}} templates"""
+
+    def __init__(self, templates, industry_specifics=None, randomize=True, seed=None):
+        """Initialize the renderer for a set of templates"""
+        self.templates = templates
+        self.industry_specifics = industry_specifics or {}
+        self.randomize = randomize
+        self.random = random.Random(seed)
+
+        # Compiled templates keyed by (stage, industry), filled in on first use
+        self.compiled = {}
+
+    def compile(self, template):
+        """Compile a single template, which is either a string or a dict of strings"""
+        if isinstance(template, dict):
+            return {key: CompiledTemplate(value) for key, value in template.items()}
+        return CompiledTemplate(template)
+
+    def get_compiled(self, stage, industry):
+        """Return the compiled templates and industry specifics for a stage and industry"""
+        key = (stage, industry)
+        entry = self.compiled.get(key)
+
+        if entry is None:
+            industries = self.templates[stage]
+
+            if industry not in industries:
+                industry = next(iter(industries))  # Use the first industry as fallback
+
+            entry = (
+                [(template, self.compile(template)) for template in industries[industry]],
+                tuple(self.industry_specifics.get(industry, ()))
+            )
+            self.compiled[key] = entry
+
+        return entry
+
+    def clear_cache(self):
+        """Drop the compiled templates, e.g. after editing the template dict"""
+        self.compiled.clear()
+
+    def lead_variables(self, lead):
+        """Extract the placeholder values shared by every template from a lead"""
+        first_name = lead.get('first_name', 'there')
+        if first_name == 'N/A' or not first_name:
+            first_name = 'there'
+
+        company = lead.get('company_name', 'your company')
+        if company == 'N/A' or not company:
+            company = 'your company'
+
+        return {
+            'first_name': first_name,
+            'company': company
+        }
+
+    def render(self, lead, stage, industry, rng=None):
+        """Render one template for a lead, choosing among the industry's variants"""
+        choices, specifics = self.get_compiled(stage, industry)
+        pick = (rng or self.random).random
+
+        if self.randomize:
+            template, compiled = choices[int(pick() * len(choices))]
+        else:
+            template, compiled = choices[0]  # Use the first template by default
+
+        variables = self.lead_variables(lead)
+        if specifics:
+            variables['industry_specific'] = specifics[int(pick() * len(specifics))]
+
+        if isinstance(compiled, dict):
+            rendered = {key: part.render(variables) for key, part in compiled.items()}
+            rendered['template'] = template
+            rendered['variables'] = variables
+            return rendered
+
+        return compiled.render(variables)
+
+    def render_many(self, leads, stage, industry_of):
+        """Lazily render one stage for an iterable of leads
+
+        industry_of is either a fixed template industry or a callable that maps a
+        lead to its template industry.
+        """
+        if not callable(industry_of):
+            fixed_industry = industry_of
+            industry_of = lambda lead: fixed_industry
+
+        render = self.render
+        for lead in leads:
+            yield render(lead, stage, industry_of(lead))
+
+def benchmark(count=100000):
+    """Measure render_many throughput against str.format on the email templates"""
+    from email_template_generator import EmailTemplateGenerator
+
+    generator = EmailTemplateGenerator()
+    industries = list(generator.industry_specifics.keys())
+    leads = [
+        {
+            'first_name': f"Lead{i}",
+            'company_name': f"Company {i}",
+            'template_industry': industries[i % len(industries)]
+        }
+        for i in range(count)
+    ]
+
+    renderer = TemplateRenderer(generator.templates, generator.industry_specifics)
+
+    start = time.perf_counter()
+    for _ in renderer.render_many(leads, 'initial_outreach', lambda lead: lead['template_industry']):
+        pass
+    compiled_rate = count / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for lead in leads:
+        template = random.choice(generator.templates['initial_outreach'][lead['template_industry']])
+        industry_specific = random.choice(generator.industry_specifics[lead['template_industry']])
+        template['subject'].format(first_name=lead['first_name'], company=lead['company_name'], industry_specific=industry_specific)
+        template['body'].format(first_name=lead['first_name'], company=lead['company_name'], industry_specific=industry_specific)
+    format_rate = count / (time.perf_counter() - start)
+
+    print(f"Rendered {count} leads")
+    print(f"  compiled render_many: {compiled_rate:,.0f} leads/sec")
+    print(f"  str.format:           {format_rate:,.0f} leads/sec")
+    return compiled_rate, format_rate
+
+def parse_arguments():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Precompiled Template Renderer')
+
+    parser.add_argument('--benchmark', type=int, default=100000,
+                        help='Number of leads to render in the benchmark')
+
+    return parser.parse_args()
+
+def main():
+    """Main function to run the renderer benchmark"""
+    args = parse_arguments()
+    benchmark(args.benchmark)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -31,6 +31,9 @@ def install_requirements():
         
         # LinkedIn
         'linkedin-api',
+
+        # API server
+        'aiohttp',
     ]
     
     print("Installing required packages...")
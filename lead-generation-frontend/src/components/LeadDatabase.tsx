@@ -206,7 +206,7 @@ const LeadDatabase: React.FC = () => {
             Import
             <input
               type="file"
-              accept=".csv"
+              accept=".csv,.json,.jsonl,.ndjson"
               onChange={handleImport}
               className="hidden"
             />
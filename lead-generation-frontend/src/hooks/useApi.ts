@@ -122,17 +122,18 @@ export function usePaginatedApi<T>(
 
   const loadMore = useCallback(() => {
     if (pagination && pagination.page < pagination.totalPages) {
-      setParams(prev => ({ ...prev, page: prev.page + 1 }));
+      // Keyset cursor from the server; page stays for page-number display
+      setParams(prev => ({ ...prev, page: prev.page + 1, cursor: pagination.next_cursor }));
     }
   }, [pagination]);
 
   const refresh = useCallback(() => {
-    setParams(prev => ({ ...prev, page: 1 }));
+    setParams(prev => ({ ...prev, page: 1, cursor: undefined }));
     setAllData([]);
   }, []);
 
   const updateParams = useCallback((newParams: any) => {
-    setParams(prev => ({ ...prev, ...newParams, page: 1 }));
+    setParams(prev => ({ ...prev, ...newParams, page: 1, cursor: undefined }));
     setAllData([]);
   }, []);
 
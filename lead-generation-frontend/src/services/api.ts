@@ -96,10 +96,16 @@ export const leadApi = {
     search?: string;
     sort?: string;
     order?: 'asc' | 'desc';
+    cursor?: string;
   }) => {
     return apiCall<{ leads: Lead[]; pagination: any }>('GET', '/leads', undefined, params);
   },
 
+  // Full-text search over leads and their contacts, best matches first
+  searchLeads: async (q: string, limit: number = 20) => {
+    return apiCall<{ data: Lead[] }>('GET', '/leads/search', undefined, { q, limit });
+  },
+
   // Get a single lead by ID
   getLead: async (id: number) => {
     return apiCall<Lead>('GET', `/leads/${id}`);
@@ -144,7 +150,7 @@ export const leadApi = {
     return apiCall<{ download_url: string }>('POST', '/leads/export', params);
   },
 
-  // Import leads from CSV
+  // Import leads from a CSV, JSON or JSON Lines file
   importLeads: async (file: File) => {
     const formData = new FormData();
     formData.append('file', file);
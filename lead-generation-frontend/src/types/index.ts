@@ -105,11 +105,12 @@ export interface LinkedInTemplate {
 // Scraping Types
 export interface ScrapingJob {
   id: string;
-  status: 'pending' | 'running' | 'completed' | 'failed';
+  status: 'pending' | 'running' | 'completed' | 'failed' | 'cancelled';
   industries: string[];
   leads_per_industry: number;
   total_leads: number;
   progress: number;
+  message?: string;
   started_at?: string;
   completed_at?: string;
   error_message?: string;
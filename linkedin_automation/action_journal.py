@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Action Journal for LinkedIn Automation
+This module appends automation records to a JSON lines file as they happen
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+import threading
+
+class ActionJournal:
+    """Append-only JSON lines journal with batched fsync
+
+    Every record is written to the file as soon as it is appended, so a crash
+    loses at most the records since the last sync. Syncing to disk happens
+    every sync_every records or sync_interval seconds, whichever comes first.
+    """
+
+    def __init__(self, journal_file, sync_every=50, sync_interval=5.0):
+        """Open the journal for appending"""
+        self.journal_file = journal_file
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+
+        os.makedirs(os.path.dirname(journal_file), exist_ok=True)
+        self.file = open(journal_file, 'a', encoding='utf-8')
+
+        self.count = 0
+        self.pending = 0
+        self.last_sync = time.monotonic()
+        self.lock = threading.Lock()
+
+    def append(self, record):
+        """Write one record to the journal"""
+        line = json.dumps(record, ensure_ascii=False, default=str) + '\n'
+
+        with self.lock:
+            self.file.write(line)
+            self.count += 1
+            self.pending += 1
+
+            if self.pending >= self.sync_every or time.monotonic() - self.last_sync >= self.sync_interval:
+                self._sync()
+
+    def sync(self):
+        """Flush buffered records and fsync the journal file"""
+        with self.lock:
+            self._sync()
+
+    def _sync(self):
+        if self.file.closed:
+            return
+
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.pending = 0
+        self.last_sync = time.monotonic()
+
+    def close(self):
+        """Sync and close the journal"""
+        with self.lock:
+            if not self.file.closed:
+                self._sync()
+                self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        return self.query()
+
+    def query(self, **filters):
+        """Iterate over the records matching every field=value filter"""
+        with self.lock:
+            if not self.file.closed:
+                self.file.flush()
+
+        return iter_records(self.journal_file, **filters)
+
+    def export_csv(self, csv_file, fieldnames):
+        """Write the journal to a CSV file, streaming one record at a time"""
+        with open(csv_file, 'w', newline='', encoding='utf-8') as csvfile:
+            writer = csv.DictWriter(csvfile, fieldnames=fieldnames, extrasaction='ignore')
+            writer.writeheader()
+            for record in self.query():
+                writer.writerow(record)
+
+        return csv_file
+
+def iter_records(journal_file, **filters):
+    """Iterate over the records in a journal file matching every field=value filter"""
+    if not os.path.exists(journal_file):
+        return
+
+    with open(journal_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A crash can leave the last line half written
+                continue
+
+            if all(record.get(field) == value for field, value in filters.items()):
+                yield record
+
+def parse_arguments():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Action Journal Query Tool')
+
+    parser.add_argument('journal_file', type=str,
+                        help='Journal file to read')
+
+    parser.add_argument('--filter', nargs='*', default=[],
+                        help='field=value filters, e.g. action_type=connection_request')
+
+    parser.add_argument('--count', action='store_true',
+                        help='Only print the number of matching records')
+
+    return parser.parse_args()
+
+def main():
+    """Main function to query a journal"""
+    args = parse_arguments()
+
+    filters = {}
+    for item in args.filter:
+        field, _, value = item.partition('=')
+        filters[field] = int(value) if value.isdigit() else value
+
+    matched = 0
+    for record in iter_records(args.journal_file, **filters):
+        matched += 1
+        if not args.count:
+            print(json.dumps(record, ensure_ascii=False))
+
+    if args.count:
+        print(matched)
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
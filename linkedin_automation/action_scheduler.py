@@ -0,0 +1,422 @@
+#!/usr/bin/env python3
+"""
+Action Scheduler for LinkedIn Automation
+This module spreads LinkedIn actions over working hours in persisted time slots
+and drives the due actions of any number of accounts from one asyncio loop
+"""
+
+import os
+import sys
+import json
+import random
+import sqlite3
+import asyncio
+import argparse
+import threading
+from datetime import datetime, timedelta
+
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+DAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+# Slots missed by more than this many seconds, such as while the process was
+# down, are given new slots instead of being run back-to-back on resume
+LATE_AFTER = 900
+
+# Daily limit for re-slotting actions queued before limits were stored
+DEFAULT_DAILY_LIMIT = 20
+
+class ActionScheduler:
+    """Persistent queue of LinkedIn actions, each assigned a time slot in working hours"""
+
+    def __init__(self, db_file, working_hours=None, days_off=None, seed=None, min_gap=0, late_after=LATE_AFTER):
+        """Open the schedule database, creating it if needed
+
+        min_gap is the least number of seconds between two actions of an account.
+        """
+        self.db_file = db_file
+        self.working_hours = working_hours or {'start': 9, 'end': 17}
+        self.days_off = set(days_off if days_off is not None else ['Saturday', 'Sunday'])
+        self.min_gap = min_gap
+        self.late_after = late_after
+        self.random = random.Random(seed)
+
+        os.makedirs(os.path.dirname(db_file), exist_ok=True)
+        self.conn = sqlite3.connect(db_file, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.lock = threading.Lock()
+
+        with self.lock:
+            self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS scheduled_actions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                account TEXT NOT NULL,
+                action_type TEXT NOT NULL,
+                industry TEXT,
+                company_id INTEGER,
+                contact_id INTEGER,
+                lead TEXT,
+                scheduled_at TEXT NOT NULL,
+                daily_limit INTEGER,
+                status TEXT DEFAULT 'pending',
+                attempts INTEGER DEFAULT 0,
+                completed_at TEXT,
+                error TEXT
+            )
+            ''')
+            # Schedules created before daily limits were stored lack the column
+            columns = {row[1] for row in self.conn.execute("PRAGMA table_info(scheduled_actions)")}
+            if 'daily_limit' not in columns:
+                self.conn.execute("ALTER TABLE scheduled_actions ADD COLUMN daily_limit INTEGER")
+            self.conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_scheduled_actions_due
+            ON scheduled_actions(status, scheduled_at)
+            ''')
+            self.conn.commit()
+
+    def window(self, day):
+        """Return the working-hours window for a date, or None on a day off"""
+        if DAY_NAMES[day.weekday()] in self.days_off:
+            return None
+
+        midnight = datetime(day.year, day.month, day.day)
+        return midnight + timedelta(hours=self.working_hours['start']), midnight + timedelta(hours=self.working_hours['end'])
+
+    def in_working_hours(self, moment):
+        """Return True if a moment falls inside a working-hours window"""
+        window = self.window(moment.date())
+        return bool(window) and window[0] <= moment < window[1]
+
+    def next_window_start(self, moment):
+        """Return the start of the next working-hours window at or after a moment"""
+        day = moment.date()
+        for _ in range(8):
+            window = self.window(day)
+            if window and moment < window[1]:
+                return max(window[0], moment)
+            day += timedelta(days=1)
+        return None
+
+    def count_scheduled(self, account, action_type, day):
+        """Count the actions already scheduled for an account on a date"""
+        with self.lock:
+            return self.conn.execute('''
+            SELECT COUNT(*) FROM scheduled_actions
+            WHERE account = ? AND action_type = ? AND scheduled_at >= ? AND scheduled_at < ?
+            AND status != 'cancelled'
+            ''', (account, action_type, day.strftime('%Y-%m-%d'), (day + timedelta(days=1)).strftime('%Y-%m-%d'))).fetchone()[0]
+
+    def pending_contacts(self, account, action_type):
+        """Return the contact ids that already have a pending action of a type"""
+        with self.lock:
+            rows = self.conn.execute('''
+            SELECT contact_id FROM scheduled_actions
+            WHERE account = ? AND action_type = ? AND status = 'pending' AND contact_id IS NOT NULL
+            ''', (account, action_type)).fetchall()
+        return {row[0] for row in rows}
+
+    def contact_accounts(self, contact_ids):
+        """Return the account that most recently had an action for each contact"""
+        contact_ids = [contact_id for contact_id in contact_ids if contact_id is not None]
+        accounts = {}
+
+        with self.lock:
+            # Chunked to stay under SQLite's bound parameter limit
+            for i in range(0, len(contact_ids), 500):
+                chunk = contact_ids[i:i + 500]
+                rows = self.conn.execute(f'''
+                SELECT contact_id, account FROM scheduled_actions
+                WHERE contact_id IN ({','.join('?' * len(chunk))}) AND status != 'cancelled'
+                ORDER BY scheduled_at
+                ''', chunk).fetchall()
+                accounts.update((contact_id, account) for contact_id, account in rows)
+
+        return accounts
+
+    def plan_slots(self, start, end, count):
+        """Spread count slots evenly over a window, with jitter inside each slot"""
+        span = (end - start).total_seconds() / count
+        return [start + timedelta(seconds=span * (i + self.random.random())) for i in range(count)]
+
+    def assign_slots(self, account, action_type, count, daily_limit, now, max_days=60, released=None):
+        """Return up to count slots from now on, at most daily_limit per working day
+
+        Today only gets the share of the daily limit left in its remaining
+        working hours. released maps a date string to the number of that day's
+        scheduled actions being moved, whose capacity is free again.
+        """
+        slots = []
+        day = now.date()
+        for _ in range(max_days):
+            if len(slots) >= count or daily_limit <= 0:
+                break
+
+            window = self.window(day)
+            if window:
+                start, end = window
+                capacity = daily_limit
+
+                if start < now:
+                    # Prorate today's limit by the working time that is left
+                    remaining = max(0.0, (end - now).total_seconds()) / (end - start).total_seconds()
+                    capacity = int(daily_limit * remaining)
+                    start = now
+
+                capacity -= self.count_scheduled(account, action_type, day)
+                capacity += (released or {}).get(day.strftime('%Y-%m-%d'), 0)
+
+                if capacity > 0 and start < end:
+                    slots.extend(self.plan_slots(start, end, min(capacity, count - len(slots))))
+
+            day += timedelta(days=1)
+
+        return slots
+
+    def schedule(self, account, action_type, items, daily_limit, now=None, max_days=60):
+        """Assign time slots to (lead, industry) items, at most daily_limit per working day
+
+        Leads that already have a pending action of this type are skipped.
+        Returns the number of actions scheduled.
+        """
+        now = now or datetime.now()
+        pending = self.pending_contacts(account, action_type)
+        items = [(lead, industry) for lead, industry in items if lead.get('contact_id') is None or lead['contact_id'] not in pending]
+
+        rows = [
+            (
+                account, action_type, industry, lead.get('id'), lead.get('contact_id'),
+                json.dumps(lead, default=str), slot.strftime(TIME_FORMAT), daily_limit
+            )
+            for (lead, industry), slot in zip(items, self.assign_slots(account, action_type, len(items), daily_limit, now, max_days))
+        ]
+
+        with self.lock:
+            self.conn.executemany('''
+            INSERT INTO scheduled_actions (account, action_type, industry, company_id, contact_id, lead, scheduled_at, daily_limit)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
+            self.conn.commit()
+
+        return len(rows)
+
+    def reslot(self, actions, now=None):
+        """Move missed actions to new slots under their daily limits, oldest first
+
+        Actions that find no slot within the scheduling horizon are cancelled.
+        Returns the number of actions moved.
+        """
+        now = now or datetime.now()
+        groups = {}
+        for action in actions:
+            groups.setdefault((action['account'], action['action_type']), []).append(action)
+
+        updates = []
+        cancelled = []
+        for (account, action_type), group in groups.items():
+            released = {}
+            for action in group:
+                released[action['scheduled_at'][:10]] = released.get(action['scheduled_at'][:10], 0) + 1
+
+            daily_limit = group[0]['daily_limit'] or DEFAULT_DAILY_LIMIT
+            slots = self.assign_slots(account, action_type, len(group), daily_limit, now, released=released)
+            updates.extend((slot.strftime(TIME_FORMAT), action['id']) for action, slot in zip(group, slots))
+            cancelled.extend(action['id'] for action in group[len(slots):])
+
+        with self.lock:
+            self.conn.executemany("UPDATE scheduled_actions SET scheduled_at = ? WHERE id = ?", updates)
+            self.conn.executemany(
+                "UPDATE scheduled_actions SET status = 'cancelled', error = 'No slot left to reschedule into' WHERE id = ?",
+                [(action_id,) for action_id in cancelled]
+            )
+            self.conn.commit()
+
+        return len(updates)
+
+    def due(self, accounts=None, now=None, limit=None):
+        """Return the pending actions whose slot has come, oldest first"""
+        now = (now or datetime.now()).strftime(TIME_FORMAT)
+        query = "SELECT * FROM scheduled_actions WHERE status = 'pending' AND scheduled_at <= ?"
+        params = [now]
+
+        if accounts:
+            query += f" AND account IN ({','.join('?' * len(accounts))})"
+            params.extend(accounts)
+
+        query += " ORDER BY scheduled_at"
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit)
+
+        with self.lock:
+            rows = self.conn.execute(query, params).fetchall()
+
+        actions = []
+        for row in rows:
+            action = dict(row)
+            action['lead'] = json.loads(action['lead']) if action['lead'] else {}
+            actions.append(action)
+        return actions
+
+    def next_due_time(self, accounts=None):
+        """Return the time of the next pending action, or None if nothing is pending"""
+        query = "SELECT MIN(scheduled_at) FROM scheduled_actions WHERE status = 'pending'"
+        params = []
+
+        if accounts:
+            query += f" AND account IN ({','.join('?' * len(accounts))})"
+            params.extend(accounts)
+
+        with self.lock:
+            value = self.conn.execute(query, params).fetchone()[0]
+        return datetime.strptime(value, TIME_FORMAT) if value else None
+
+    def count_pending(self, accounts=None, before=None):
+        """Count the pending actions, optionally only those slotted before a moment"""
+        query = "SELECT COUNT(*) FROM scheduled_actions WHERE status = 'pending'"
+        params = []
+
+        if before:
+            query += " AND scheduled_at < ?"
+            params.append(before.strftime(TIME_FORMAT))
+
+        if accounts:
+            query += f" AND account IN ({','.join('?' * len(accounts))})"
+            params.extend(accounts)
+
+        with self.lock:
+            return self.conn.execute(query, params).fetchone()[0]
+
+    def mark(self, action_id, status, error=None):
+        """Record the outcome of an action"""
+        with self.lock:
+            self.conn.execute('''
+            UPDATE scheduled_actions
+            SET status = ?, error = ?, attempts = attempts + 1, completed_at = ?
+            WHERE id = ?
+            ''', (status, error, datetime.now().strftime(TIME_FORMAT), action_id))
+            self.conn.commit()
+
+    def summary(self):
+        """Return action counts per account, action type and status"""
+        with self.lock:
+            return self.conn.execute('''
+            SELECT account, action_type, status, COUNT(*), MIN(scheduled_at), MAX(scheduled_at)
+            FROM scheduled_actions
+            GROUP BY account, action_type, status
+            ORDER BY account, action_type, status
+            ''').fetchall()
+
+    async def perform(self, perform, action):
+        """Run one action in a worker thread and record its outcome"""
+        loop = asyncio.get_running_loop()
+        try:
+            success = await loop.run_in_executor(None, perform, action)
+            self.mark(action['id'], 'done' if success else 'failed')
+            return bool(success)
+        except Exception as e:
+            self.mark(action['id'], 'failed', str(e))
+            return False
+
+    async def drain_account(self, perform, actions):
+        """Run one account's due actions in order, at least min_gap seconds apart"""
+        completed = 0
+        for index, action in enumerate(actions):
+            if index and self.min_gap:
+                await asyncio.sleep(self.min_gap)
+            completed += await self.perform(perform, action)
+        return completed
+
+    async def run_due(self, performers, now=None):
+        """Perform the actions of every account in performers that are due now, once
+
+        Slots missed by more than late_after seconds get new slots instead of
+        running. Returns the number of completed actions and of due actions.
+        """
+        now = now or datetime.now()
+        due = self.due(list(performers), now)
+        late = (now - timedelta(seconds=self.late_after)).strftime(TIME_FORMAT)
+        missed = [action for action in due if action['scheduled_at'] < late]
+        if missed:
+            self.reslot(missed, now)
+
+        by_account = {}
+        for action in due:
+            if action['scheduled_at'] >= late:
+                by_account.setdefault(action['account'], []).append(action)
+
+        results = await asyncio.gather(*(
+            self.drain_account(performers[account], actions)
+            for account, actions in by_account.items()
+        ))
+        return sum(results), len(due)
+
+    async def run(self, performers, until_idle=True, until=None, poll_interval=60, progress=None):
+        """Drive the due actions of every account in performers from one event loop
+
+        performers maps an account name to a callable that performs one action
+        and returns True on success. Accounts run concurrently while each
+        account's actions run in slot order. Between slots the loop sleeps
+        instead of blocking a process. Slots missed by more than late_after
+        seconds get new slots rather than running in a burst. progress, if given, is called with
+        (completed, total) after each round of due actions and may raise to
+        stop the run. Returns the number of completed actions.
+        """
+        accounts = list(performers)
+        completed = 0
+
+        while True:
+            now = datetime.now()
+            if until and now >= until:
+                break
+
+            if self.in_working_hours(now):
+                performed, due = await self.run_due(performers, now)
+                completed += performed
+
+                if progress and due:
+                    progress(completed, completed + self.count_pending(accounts, until))
+
+            next_time = self.next_due_time(accounts)
+            if next_time is None:
+                if until_idle:
+                    break
+                wake = now + timedelta(seconds=poll_interval)
+            else:
+                # Overdue slots wait for the next working-hours window
+                wake = self.next_window_start(max(next_time, datetime.now())) or next_time
+
+            if until:
+                wake = min(wake, until)
+
+            # Never spin: wait at least a moment even when a slot is already overdue
+            await asyncio.sleep(min(max(0.5, (wake - datetime.now()).total_seconds()), poll_interval))
+
+        return completed
+
+    def close(self):
+        """Close the schedule database"""
+        with self.lock:
+            self.conn.close()
+
+def parse_arguments():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='LinkedIn Action Scheduler')
+
+    parser.add_argument('--db-file', type=str,
+                        default='/home/ubuntu/lead_generation/linkedin_automation/data/schedule.db',
+                        help='Schedule database file')
+
+    return parser.parse_args()
+
+def main():
+    """Main function to summarize the schedule"""
+    args = parse_arguments()
+    scheduler = ActionScheduler(args.db_file)
+
+    for account, action_type, status, count, first, last in scheduler.summary():
+        print(f"{account} {action_type} {status}: {count} ({first} - {last})")
+
+    scheduler.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Multi-Account LinkedIn Campaign Runner
+This script shards leads across several LinkedIn sender accounts, each with its
+own quotas, working hours and templates, and drives them all from one asyncio loop
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import threading
+from datetime import datetime
+from collections import defaultdict
+
+from linkedin_automation import LinkedInAutomation
+from action_journal import ActionJournal
+from logging_setup import get_logger, close_logger
+
+# Example account settings; any LinkedInAutomation config key can be overridden per account
+DEFAULT_ACCOUNTS = [
+    {
+        'name': 'sales_1',
+        'weight': 1.0,
+        'connection_limit_per_day': 25,
+        'message_limit_per_day': 20,
+        'working_hours': {'start': 9, 'end': 17},
+        'days_off': ['Saturday', 'Sunday'],
+        'templates': {}
+    },
+    {
+        'name': 'sales_2',
+        'weight': 1.0,
+        'connection_limit_per_day': 15,
+        'message_limit_per_day': 15,
+        'working_hours': {'start': 8, 'end': 16},
+        'days_off': ['Saturday', 'Sunday'],
+        'templates': {}
+    }
+]
+
+ACTION_LIMITS = {
+    'connection': 'connection_limit_per_day',
+    'follow_up': 'message_limit_per_day'
+}
+
+class FakeLinkedInBackend:
+    """In-memory stand-in for LinkedIn that records every action, for testing"""
+
+    def __init__(self, latency=0.0, failure_rate=0.0, seed=None):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.random = random.Random(seed)
+        self.sent = defaultdict(list)
+        self.lock = threading.Lock()
+
+    def send(self, account, action_type, lead, message):
+        """Record an action and report whether it succeeded"""
+        if self.latency:
+            time.sleep(self.latency)
+
+        with self.lock:
+            if self.random.random() < self.failure_rate:
+                return False
+
+            self.sent[account].append({
+                'action_type': action_type,
+                'contact_id': lead.get('contact_id'),
+                'message': message
+            })
+            return True
+
+class CampaignRunner:
+    """Runs LinkedIn campaigns for many sender accounts in one process"""
+
+    def __init__(self, accounts=None, backend=None, schedule_db=None):
+        """Create one automation per account, all sharing one journal and schedule"""
+        self.accounts = {account['name']: account for account in (accounts or DEFAULT_ACCOUNTS)}
+        self.timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.journal = ActionJournal(f"/home/ubuntu/lead_generation/linkedin_automation/logs/actions_{self.timestamp}.jsonl")
+
+        self.automations = {}
+        for name, account in self.accounts.items():
+            automation = LinkedInAutomation(name, journal=self.journal, backend=backend)
+
+            for key, value in account.items():
+                if key == 'templates':
+                    for message_type, templates in value.items():
+                        automation.templates.setdefault(message_type, {}).update(templates)
+                elif key in automation.config:
+                    automation.config[key] = value
+
+            if schedule_db:
+                automation.config['schedule_db'] = schedule_db
+
+            self.automations[name] = automation
+
+        # Each account logs to its own file; the runner's own summary goes to a campaign log
+        self.logger = get_logger(
+            'campaign_runner', f"/home/ubuntu/lead_generation/linkedin_automation/logs/campaign_{self.timestamp}.log"
+        )
+        self.leads = []
+
+    def load_leads(self, db_file, limit=100000):
+        """Load leads once for every account"""
+        loader = next(iter(self.automations.values()))
+        loader.load_leads_from_database(db_file, limit=limit)
+        self.leads, loader.leads = loader.leads, []
+        return len(self.leads)
+
+    def capacity(self, name, action_type):
+        """Return an account's weighted daily capacity for an action type"""
+        account = self.accounts[name]
+        limit = self.automations[name].config[ACTION_LIMITS[action_type]]
+        return max(0.0, limit * account.get('weight', 1.0))
+
+    def shard(self, leads, action_type):
+        """Assign leads to accounts in proportion to their weighted daily capacity
+
+        A contact stays with the account that already contacted it, so follow-ups
+        come from the sender of the connection request. Other leads go to the
+        account with the lowest load relative to its capacity.
+        """
+        scheduler = next(iter(self.automations.values())).get_scheduler()
+        previous = scheduler.contact_accounts([lead.get('contact_id') for lead in leads])
+
+        shards = {name: [] for name in self.automations}
+        capacities = {name: self.capacity(name, action_type) for name in self.automations}
+        loads = {name: 0 for name in self.automations}
+
+        for lead in leads:
+            name = previous.get(lead.get('contact_id'))
+
+            if name not in shards:
+                candidates = [name for name, capacity in capacities.items() if capacity > 0]
+                if not candidates:
+                    break
+                name = min(candidates, key=lambda candidate: (loads[candidate] + 1) / capacities[candidate])
+
+            shards[name].append(lead)
+            loads[name] += 1
+
+        return shards
+
+    def schedule(self, industries=None, action_types=None):
+        """Shard the loaded leads and queue each account's share in its own time slots"""
+        action_types = action_types or ['connection', 'follow_up']
+        total_scheduled = 0
+
+        for action_type in action_types:
+            for name, leads in self.shard(self.leads, action_type).items():
+                automation = self.automations[name]
+                automation.leads = leads
+                total_scheduled += automation.schedule(industries, [action_type])
+                automation.leads = []
+
+        self.logger.info(f"Scheduled {total_scheduled} actions across {len(self.automations)} accounts")
+        return total_scheduled
+
+    async def run_async(self, until_idle=True, until=None):
+        """Drive every account's scheduled actions concurrently on the current event loop"""
+        results = await asyncio.gather(*(
+            automation.get_scheduler().run({name: automation.perform_scheduled}, until_idle=until_idle, until=until)
+            for name, automation in self.automations.items()
+        ))
+
+        self.journal.sync()
+        completed = dict(zip(self.automations, results))
+        self.logger.info(f"Completed actions per account: {completed}")
+        return completed
+
+    def run(self, until_idle=True, until=None):
+        """Drive every account's scheduled actions until none are left"""
+        return asyncio.run(self.run_async(until_idle, until))
+
+    def close(self):
+        """Close every account's schedule and the shared journal"""
+        for automation in self.automations.values():
+            automation.close()
+        self.journal.close()
+        close_logger(self.logger.name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+def load_accounts(accounts_file):
+    """Load account settings from a JSON file"""
+    with open(accounts_file, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def parse_arguments():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Multi-Account LinkedIn Campaign Runner')
+
+    parser.add_argument('--accounts', type=str, default=None,
+                        help='JSON file with account settings')
+
+    parser.add_argument('--dump-accounts', action='store_true',
+                        help='Print the example account settings as JSON, as a starting point for an accounts file')
+
+    parser.add_argument('--database', type=str,
+                        default='/home/ubuntu/lead_generation/data/leads_database.db',
+                        help='SQLite database file with leads data')
+
+    parser.add_argument('--industries', nargs='+', default=None,
+                        help='Industries to target (default: all)')
+
+    parser.add_argument('--actions', nargs='+', choices=['connection', 'follow_up'], default=None,
+                        help='Action types to schedule (default: all)')
+
+    parser.add_argument('--schedule', action='store_true',
+                        help='Shard the leads and queue actions for every account')
+
+    parser.add_argument('--run', action='store_true',
+                        help='Perform queued actions as their time slots come up')
+
+    parser.add_argument('--fake-backend', action='store_true',
+                        help='Send actions to an in-memory fake LinkedIn backend')
+
+    return parser.parse_args()
+
+def run_campaign(runner, args):
+    """Schedule and run the campaign as the arguments ask"""
+    if args.schedule:
+        if not os.path.exists(args.database):
+            print(f"Database not found: {args.database}")
+            return 1
+
+        runner.load_leads(args.database)
+        print(f"Scheduled {runner.schedule(args.industries, args.actions)} actions")
+
+    if args.run:
+        completed = runner.run()
+        print(f"Completed actions per account: {completed}")
+
+    print(f"Campaign runner completed at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    return 0
+
+def main():
+    """Main function to run the campaign runner"""
+    args = parse_arguments()
+
+    if args.dump_accounts:
+        print(json.dumps(DEFAULT_ACCOUNTS, indent=4))
+        return 0
+
+    print(f"Starting campaign runner at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+    accounts = load_accounts(args.accounts) if args.accounts else None
+    backend = FakeLinkedInBackend() if args.fake_backend else None
+    with CampaignRunner(accounts, backend) as runner:
+        return run_campaign(runner, args)
+
+if __name__ == "__main__":
+    sys.exit(main())
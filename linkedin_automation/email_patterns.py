@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Email Pattern Learner for LinkedIn Profile Finder
+This module learns the address pattern each company domain uses from known
+contact emails, so addresses for other contacts can be generated without searching
+"""
+
+import re
+import sys
+import sqlite3
+import argparse
+import threading
+import unicodedata
+from collections import Counter, defaultdict
+
+# Local-part patterns, in the order used to break ties
+PATTERNS = {
+    'first.last': '{first}.{last}',
+    'flast': '{f}{last}',
+    'firstlast': '{first}{last}',
+    'first_last': '{first}_{last}',
+    'f.last': '{f}.{last}',
+    'first': '{first}',
+    'firstl': '{first}{l}',
+    'first.l': '{first}.{l}',
+    'last.first': '{last}.{first}',
+    'lastf': '{last}{f}',
+    'last': '{last}'
+}
+
+# Shared mailbox providers say nothing about a company's own pattern
+FREE_MAIL_DOMAINS = {
+    'gmail.com', 'googlemail.com', 'outlook.com', 'hotmail.com', 'live.com',
+    'yahoo.com', 'icloud.com', 'aol.com', 'protonmail.com', 'gmx.com'
+}
+
+# A pattern needs this many matching addresses, making up at least this share
+# of the domain's addresses, before it is used to generate new ones
+MIN_SUPPORT = 2
+MIN_CONFIDENCE = 0.5
+
+NAME_PART_PATTERN = re.compile(r'[^a-z0-9]')
+
+def name_part(value):
+    """Reduce a name to the lowercase ASCII letters used in addresses"""
+    if not value or value == 'N/A':
+        return ''
+    value = unicodedata.normalize('NFKD', value).encode('ascii', 'ignore').decode('ascii')
+    return NAME_PART_PATTERN.sub('', value.lower())
+
+def website_domain(website):
+    """Extract the bare domain from a website URL"""
+    if not website or website == 'N/A':
+        return ''
+    domain = re.sub(r'^[a-z]+://', '', website.strip().lower()).split('/')[0].split(':')[0]
+    return domain[4:] if domain.startswith('www.') else domain
+
+def add_source_columns(conn):
+    """Add the contacts columns recording how each email and name were obtained, if missing"""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(contacts)")}
+    for column in ('email_source', 'name_source'):
+        if column not in columns:
+            conn.execute(f"ALTER TABLE contacts ADD COLUMN {column} TEXT")
+
+def render_pattern(pattern, first, last):
+    """Render a local part for a pattern name"""
+    return PATTERNS[pattern].format(first=first, last=last, f=first[:1], l=last[:1])
+
+def detect_patterns(first_name, last_name, email):
+    """Return the pattern names that produce an email's local part"""
+    first = name_part(first_name)
+    last = name_part(last_name)
+    if not first or not last or '@' not in (email or ''):
+        return []
+
+    local = email.split('@', 1)[0].lower()
+    return [pattern for pattern in PATTERNS if render_pattern(pattern, first, last) == local]
+
+class EmailPatternLearner:
+    """Learns and applies the dominant email pattern per company domain"""
+
+    def __init__(self, db_file, min_support=MIN_SUPPORT, min_confidence=MIN_CONFIDENCE):
+        """Initialize the learner for a lead database"""
+        self.db_file = db_file
+        self.min_support = min_support
+        self.min_confidence = min_confidence
+
+        # domain -> pattern, and company id -> email domain seen on its contacts
+        self.patterns = {}
+        self.company_domains = {}
+
+        # Addresses found during this run, per domain without a learned pattern
+        self.observed_counts = defaultdict(Counter)
+        self.observed_totals = Counter()
+        self.lock = threading.Lock()
+
+    def create_table(self, conn):
+        """Create the email patterns table, and the contacts source columns, if needed"""
+        add_source_columns(conn)
+        conn.execute('''
+        CREATE TABLE IF NOT EXISTS email_patterns (
+            domain TEXT PRIMARY KEY,
+            pattern TEXT NOT NULL,
+            support INTEGER,
+            total INTEGER,
+            confidence REAL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''')
+
+    def learn(self):
+        """Mine contact emails and store the dominant pattern for every domain
+
+        Addresses guessed from a pattern, and contacts whose names were taken
+        from their address, are left out, so neither counts as evidence for the
+        pattern that produced it.
+        """
+        conn = sqlite3.connect(self.db_file)
+        self.create_table(conn)
+
+        pattern_counts = defaultdict(Counter)
+        domain_totals = Counter()
+        company_domain_counts = defaultdict(Counter)
+
+        cursor = conn.execute('''
+        SELECT company_id, first_name, last_name, email
+        FROM contacts
+        WHERE email LIKE '%_@_%' AND COALESCE(email_source, '') != 'pattern'
+          AND COALESCE(name_source, '') != 'email'
+        ''')
+
+        for company_id, first_name, last_name, email in cursor:
+            domain = email.rsplit('@', 1)[1].strip().lower()
+            if domain in FREE_MAIL_DOMAINS:
+                continue
+
+            company_domain_counts[company_id][domain] += 1
+
+            matches = detect_patterns(first_name, last_name, email)
+            domain_totals[domain] += 1
+            # An address like "j.smith" can fit more than one pattern; credit each
+            for pattern in matches:
+                pattern_counts[domain][pattern] += 1
+
+        rows = []
+        for domain, counts in pattern_counts.items():
+            pattern, support, confidence = self.dominant(counts, domain_totals[domain])
+            if pattern:
+                rows.append((domain, pattern, support, domain_totals[domain], confidence))
+
+        conn.execute("DELETE FROM email_patterns")
+        conn.executemany('''
+        INSERT INTO email_patterns (domain, pattern, support, total, confidence)
+        VALUES (?, ?, ?, ?, ?)
+        ''', rows)
+        conn.commit()
+        conn.close()
+
+        self.patterns = {domain: pattern for domain, pattern, _, _, _ in rows}
+        self.company_domains = {
+            company_id: counts.most_common(1)[0][0]
+            for company_id, counts in company_domain_counts.items()
+        }
+
+        return len(rows)
+
+    def dominant(self, counts, total):
+        """Return (pattern, support, confidence) for the best pattern, or a None pattern below the thresholds"""
+        order = {pattern: rank for rank, pattern in enumerate(PATTERNS)}
+        pattern, support = min(counts.items(), key=lambda item: (-item[1], order[item[0]]))
+        confidence = support / total
+        if support < self.min_support or confidence < self.min_confidence:
+            return None, support, confidence
+        return pattern, support, confidence
+
+    def lead_domain(self, lead):
+        """Return the email domain for a lead's company"""
+        return self.company_domains.get(lead.get('id')) or website_domain(lead.get('website'))
+
+    def guess(self, lead):
+        """Generate an address from the domain's learned pattern, or None if none is known"""
+        domain = self.lead_domain(lead)
+        pattern = self.patterns.get(domain)
+        if not pattern:
+            return None
+
+        first = name_part(lead.get('first_name'))
+        last = name_part(lead.get('last_name'))
+        if not first or not last:
+            return None
+
+        return f"{render_pattern(pattern, first, last)}@{domain}"
+
+    def observe(self, lead, email):
+        """Count an address found during this run towards its domain's pattern, if the domain has none yet
+
+        The pattern is adopted once it meets the same support and confidence
+        thresholds as learned ones.
+        """
+        if not email or '@' not in email:
+            return
+
+        domain = email.rsplit('@', 1)[1].lower()
+        if domain in FREE_MAIL_DOMAINS or domain in self.patterns:
+            return
+
+        matches = detect_patterns(lead.get('first_name'), lead.get('last_name'), email)
+
+        # Enrichment workers observe concurrently
+        with self.lock:
+            self.observed_totals[domain] += 1
+            for pattern in matches:
+                self.observed_counts[domain][pattern] += 1
+
+            counts = self.observed_counts[domain]
+            if counts:
+                pattern, _, _ = self.dominant(counts, self.observed_totals[domain])
+                if pattern:
+                    self.patterns[domain] = pattern
+
+def parse_arguments():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Email Pattern Learner')
+
+    parser.add_argument('--database', type=str,
+                        default='/home/ubuntu/lead_generation/database/leads.db',
+                        help='SQLite database file with contacts')
+
+    parser.add_argument('--min-support', type=int, default=MIN_SUPPORT,
+                        help=f"Minimum number of matching addresses needed to store a pattern (default: {MIN_SUPPORT})")
+
+    parser.add_argument('--min-confidence', type=float, default=MIN_CONFIDENCE,
+                        help=f"Minimum share of a domain's addresses the pattern must match (default: {MIN_CONFIDENCE})")
+
+    return parser.parse_args()
+
+def main():
+    """Main function to learn email patterns"""
+    args = parse_arguments()
+
+    learner = EmailPatternLearner(args.database, args.min_support, args.min_confidence)
+    learned = learner.learn()
+
+    print(f"Learned email patterns for {learned} domains")
+    for pattern, count in Counter(learner.patterns.values()).most_common():
+        print(f"  {pattern}: {count}")
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
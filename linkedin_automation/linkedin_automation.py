@@ -6,12 +6,20 @@ This script automates LinkedIn interactions to generate leads
 
 import os
 import sys
-import time
-import random
 import json
 import csv
 from datetime import datetime
 import argparse
+import asyncio
+
+from logging_setup import get_logger, close_logger
+from action_journal import ActionJournal
+from action_scheduler import ActionScheduler
+
+# Add the shared industry classifier to the path
+sys.path.append('/home/ubuntu/lead_generation/email_templates')
+
+from industry_classifier import get_classifier
 
 # Create necessary directories
 os.makedirs('/home/ubuntu/lead_generation/linkedin_automation/data', exist_ok=True)
@@ -19,12 +27,28 @@ os.makedirs('/home/ubuntu/lead_generation/linkedin_automation/templates', exist_
 os.makedirs('/home/ubuntu/lead_generation/linkedin_automation/logs', exist_ok=True)
 
 class LinkedInAutomation:
-    def __init__(self):
-        """Initialize the LinkedIn automation tool"""
+    def __init__(self, account='default', journal=None, backend=None, rules_file=None):
+        """Initialize the LinkedIn automation tool
+
+        journal lets several accounts share one action journal, and backend is
+        an object whose send(account, action_type, lead, message) performs the
+        action; without one, actions are only simulated.
+        """
+        self.account = account
+        self.backend = backend
         self.timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        self.log_file = f"/home/ubuntu/lead_generation/linkedin_automation/logs/linkedin_{self.timestamp}.log"
+        # Accounts built together by the campaign runner each get their own log file
+        log_name = 'linkedin' if account == 'default' else f"linkedin_{account}"
+        self.log_file = f"/home/ubuntu/lead_generation/linkedin_automation/logs/{log_name}_{self.timestamp}.log"
         self.setup_logging()
         
+        # Actions are journaled to disk as they happen
+        self.journal_file = f"/home/ubuntu/lead_generation/linkedin_automation/logs/actions_{self.timestamp}.jsonl"
+        self.actions_log = journal or ActionJournal(self.journal_file)
+        self.owns_journal = journal is None
+        if journal:
+            self.journal_file = journal.journal_file
+        
         # Configuration settings
         self.config = {
             'connection_limit_per_day': 25,
@@ -35,6 +59,7 @@ class LinkedInAutomation:
                 'end': 17    # 5 PM
             },
             'days_off': ['Saturday', 'Sunday'],
+            'schedule_db': '/home/ubuntu/lead_generation/linkedin_automation/data/schedule.db',
             'search_filters': {
                 'digital_marketing': [
                     'Marketing Director',
@@ -88,48 +113,50 @@ class LinkedInAutomation:
             }
         }
         
+        # Shared, memoized mapping from raw industry strings to template industries
+        self.classifier = get_classifier(rules_file)
+        
         # Initialize data storage
         self.leads = []
-        self.actions_log = []
+        self.scheduler = None
     
     def setup_logging(self):
         """Set up logging for the script"""
-        # Redirect stdout and stderr to the log file
-        sys.stdout = open(self.log_file, 'w')
-        sys.stderr = open(self.log_file, 'a')
+        # Records are queued and written as JSON lines by a background thread,
+        # leaving the caller's stdout and stderr untouched
+        self.logger = get_logger(f"linkedin_automation.{self.account}", self.log_file)
         
-        print(f"LinkedIn automation logging started at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        print(f"Log file: {self.log_file}")
+        self.logger.info(f"LinkedIn automation logging started at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        self.logger.info(f"Log file: {self.log_file}")
     
-    def log_action(self, action_type, target, status, notes=""):
-        """Log an action to the actions log"""
+    def log_action(self, action_type, target, status, notes="", lead=None):
+        """Log an action to the actions journal"""
         action = {
             'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
             'action_type': action_type,
             'target': target,
             'status': status,
-            'notes': notes
+            'notes': notes,
+            'account': self.account,
+            'company_id': lead.get('id') if lead else None,
+            'contact_id': lead.get('contact_id') if lead else None
         }
         
         self.actions_log.append(action)
-        print(f"[{action['timestamp']}] {action_type}: {target} - {status} {notes}")
+        self.logger.info(f"{action_type}: {target} - {status}", extra={'fields': action})
     
-    def save_actions_log(self):
-        """Save the actions log to a CSV file"""
-        log_file = f"/home/ubuntu/lead_generation/linkedin_automation/logs/actions_log_{self.timestamp}.csv"
-        
+    def save_actions_log(self, csv_file=None):
+        """Sync the actions journal to disk, optionally exporting it to a CSV file"""
         try:
-            with open(log_file, 'w', newline='', encoding='utf-8') as csvfile:
-                fieldnames = ['timestamp', 'action_type', 'target', 'status', 'notes']
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                
-                writer.writeheader()
-                for action in self.actions_log:
-                    writer.writerow(action)
+            self.actions_log.sync()
+            self.logger.info(f"Journaled {len(self.actions_log)} actions to {self.journal_file}")
             
-            print(f"Saved {len(self.actions_log)} actions to {log_file}")
+            if csv_file:
+                fieldnames = ['timestamp', 'action_type', 'target', 'status', 'notes', 'company_id', 'contact_id']
+                self.actions_log.export_csv(csv_file, fieldnames)
+                self.logger.info(f"Exported actions to {csv_file}")
         except Exception as e:
-            print(f"Error saving actions log: {e}")
+            self.logger.error(f"Error saving actions log: {e}")
     
     def load_leads_from_csv(self, csv_file):
         """Load leads from a CSV file"""
@@ -138,54 +165,78 @@ class LinkedInAutomation:
                 csv_reader = csv.DictReader(file)
                 leads_loaded = 0
                 
+                classify = self.classifier.classify
                 for row in csv_reader:
+                    row['industry_bucket'] = row.get('industry_bucket') or classify(row.get('industry'))
                     self.leads.append(row)
                     leads_loaded += 1
                 
-                print(f"Loaded {leads_loaded} leads from {csv_file}")
+                self.lead_index = None
+                
+                self.logger.info(f"Loaded {leads_loaded} leads from {csv_file}")
                 return leads_loaded
         except Exception as e:
-            print(f"Error loading leads from CSV: {e}")
+            self.logger.error(f"Error loading leads from CSV: {e}")
             return 0
     
     def load_leads_from_database(self, db_file, industry=None, limit=100):
-        """Load leads from the SQLite database"""
+        """Load leads from the SQLite database, optionally only those of one template industry"""
         try:
             import sqlite3
             
             conn = sqlite3.connect(db_file)
             cursor = conn.cursor()
             
-            query = """
-            SELECT c.id, c.company_name, c.website, c.industry, c.company_size, 
-                   c.current_chatbot, c.address, c.city, c.state, c.zipcode, 
-                   c.country, ct.first_name, ct.last_name, ct.email, ct.phone
+            # Databases created before industry buckets were cached lack the column
+            company_columns = {row[1] for row in cursor.execute("PRAGMA table_info(companies)")}
+            has_bucket = 'industry_bucket' in company_columns
+            
+            query = f"""
+            SELECT c.id, c.company_name, c.website, c.industry, {'c.industry_bucket' if has_bucket else 'NULL AS industry_bucket'},
+                   c.company_size, c.current_chatbot, c.address, c.city, c.state, c.zipcode, 
+                   c.country, ct.id as contact_id, ct.first_name, ct.last_name, ct.email, ct.phone
             FROM companies c
             LEFT JOIN contacts ct ON c.id = ct.company_id
             LEFT JOIN lead_status ls ON c.id = ls.company_id
             WHERE ls.status = 'New'
             """
+            params = []
+            by_bucket = bool(industry) and has_bucket and (industry in self.classifier.buckets or industry == self.classifier.default)
             
             if industry:
-                query += f" AND c.industry LIKE '%{industry}%'"
+                if by_bucket:
+                    # Companies not bucketed yet are classified in memory below
+                    query += " AND (c.industry_bucket = ? OR c.industry_bucket IS NULL)"
+                    params.append(industry)
+                else:
+                    query += " AND c.industry LIKE ?"
+                    params.append(f"%{industry}%")
             
-            query += f" LIMIT {limit}"
+            query += " LIMIT ?"
+            params.append(limit)
             
-            cursor.execute(query)
+            cursor.execute(query, params)
             columns = [column[0] for column in cursor.description]
             leads = []
             
+            # The loader only reads; companies the orchestrator has not bucketed yet
+            # are classified in memory
+            classify = self.classifier.classify
             for row in cursor.fetchall():
                 lead = dict(zip(columns, row))
+                lead['industry_bucket'] = lead['industry_bucket'] or classify(lead['industry'])
+                if by_bucket and lead['industry_bucket'] != industry:
+                    continue
                 leads.append(lead)
             
             self.leads.extend(leads)
-            print(f"Loaded {len(leads)} leads from database")
+            self.lead_index = None
+            self.logger.info(f"Loaded {len(leads)} leads from database")
             
             conn.close()
             return len(leads)
         except Exception as e:
-            print(f"Error loading leads from database: {e}")
+            self.logger.error(f"Error loading leads from database: {e}")
             return 0
     
     def generate_search_url(self, industry, title):
@@ -226,18 +277,18 @@ class LinkedInAutomation:
             industry=industry
         )
         
-        # Simulate the action
-        time.sleep(random.uniform(*self.config['delay_between_actions']))
+        sent = self.backend.send(self.account, "connection_request", lead, message) if self.backend else True
         
         # Log the action
         self.log_action(
             action_type="connection_request",
             target=f"{lead.get('first_name', '')} {lead.get('last_name', '')} at {lead.get('company_name', '')}",
-            status="sent",
-            notes=f"Message: {message}"
+            status="sent" if sent else "failed",
+            notes=f"Message: {message}",
+            lead=lead
         )
         
-        return True
+        return sent
     
     def simulate_follow_up_message(self, lead, industry):
         """Simulate sending a follow-up message on LinkedIn"""
@@ -259,86 +310,158 @@ class LinkedInAutomation:
             industry=industry
         )
         
-        # Simulate the action
-        time.sleep(random.uniform(*self.config['delay_between_actions']))
+        sent = self.backend.send(self.account, "follow_up_message", lead, message) if self.backend else True
         
         # Log the action
         self.log_action(
             action_type="follow_up_message",
             target=f"{lead.get('first_name', '')} {lead.get('last_name', '')} at {lead.get('company_name', '')}",
-            status="sent",
-            notes=f"Message: {message}"
+            status="sent" if sent else "failed",
+            notes=f"Message: {message}",
+            lead=lead
         )
         
-        return True
+        return sent
     
-    def run_campaign(self, industry, action_type, limit=10):
-        """Run a LinkedIn campaign for a specific industry"""
-        print(f"\n{'='*50}\nRunning LinkedIn {action_type} campaign for {industry}\n{'='*50}")
+    def perform_action(self, action_type, lead, industry):
+        """Perform one LinkedIn action for a lead"""
+        if action_type == 'connection':
+            return self.simulate_connection_request(lead, industry)
+        elif action_type == 'follow_up':
+            return self.simulate_follow_up_message(lead, industry)
+        
+        raise ValueError(f"Unknown action type: {action_type}")
+    
+    @property
+    def leads(self):
+        return self._leads
+    
+    @leads.setter
+    def leads(self, leads):
+        self._leads = leads
+        self.lead_index = None
+    
+    def build_lead_index(self):
+        """Group the loaded leads by template industry, once per set of leads"""
+        index = {}
+        classify_lead = self.classifier.classify_lead
         
-        # Filter leads by industry
-        industry_leads = [lead for lead in self.leads if industry.lower() in lead.get('industry', '').lower()]
+        for lead in self._leads:
+            index.setdefault(classify_lead(lead), []).append(lead)
         
-        if not industry_leads:
-            print(f"No leads found for industry: {industry}")
-            return 0
+        self.lead_index = index
+        return index
+    
+    def campaign_leads(self, industry):
+        """Return the loaded leads for a template industry"""
+        index = self.lead_index if self.lead_index is not None else self.build_lead_index()
         
-        # Limit the number of actions
-        if limit > 0 and len(industry_leads) > limit:
-            industry_leads = industry_leads[:limit]
-            print(f"Limited to {limit} leads for {industry}")
+        if industry in index or industry in self.config['search_filters']:
+            return index.get(industry, [])
         
-        actions_completed = 0
+        # Free-text industries that are not template industries fall back to a substring match
+        industry = industry.lower()
+        return [lead for lead in self._leads if industry in (lead.get('industry') or '').lower()]
+    
+    def get_scheduler(self):
+        """Open the persistent action schedule"""
+        if self.scheduler is None:
+            self.scheduler = ActionScheduler(
+                self.config['schedule_db'],
+                self.config['working_hours'],
+                self.config['days_off'],
+                min_gap=self.config['delay_between_actions'][0]
+            )
+        return self.scheduler
+    
+    def schedule(self, industries=None, action_types=None, limits=None):
+        """Queue actions for the loaded leads in time slots spread over working hours
+
+        The daily limits are spread across the working hours of as many working
+        days as the queue needs. Returns the number of actions scheduled.
+        """
+        industries = industries or list(self.config['search_filters'].keys())
+        action_types = action_types or ['connection', 'follow_up']
+        limits = limits or {
+            'connection': self.config['connection_limit_per_day'],
+            'follow_up': self.config['message_limit_per_day']
+        }
         
-        for lead in industry_leads:
-            try:
-                if action_type == 'connection':
-                    success = self.simulate_connection_request(lead, industry)
-                elif action_type == 'follow_up':
-                    success = self.simulate_follow_up_message(lead, industry)
-                else:
-                    print(f"Unknown action type: {action_type}")
-                    continue
-                
-                if success:
-                    actions_completed += 1
-                
-                # Add a random delay between actions
-                time.sleep(random.uniform(*self.config['delay_between_actions']))
-                
-            except Exception as e:
-                print(f"Error performing {action_type} for lead: {e}")
+        scheduler = self.get_scheduler()
+        total_scheduled = 0
         
-        print(f"Completed {actions_completed} {action_type} actions for {industry}")
-        return actions_completed
+        for action_type in action_types:
+            items = [(lead, industry) for industry in industries for lead in self.campaign_leads(industry)]
+            scheduled = scheduler.schedule(self.account, action_type, items, limits.get(action_type, 10))
+            self.logger.info(f"Scheduled {scheduled} {action_type} actions for account {self.account}")
+            total_scheduled += scheduled
+        
+        return total_scheduled
     
-    def run(self, industries=None, action_types=None, limits=None):
-        """Run the LinkedIn automation for specified industries and action types"""
-        if not industries:
-            industries = list(self.config['search_filters'].keys())
+    def perform_scheduled(self, action):
+        """Perform a scheduled action from the action schedule"""
+        return self.perform_action(action['action_type'], action['lead'], action['industry'])
+    
+    def run_scheduled(self, until_idle=True, until=None, progress=None):
+        """Perform scheduled actions as their slots come up, without blocking between them
+
+        progress, if given, is called with (completed, total) after each round
+        of due actions and may raise to stop the run.
+        """
+        try:
+            completed = asyncio.run(self.get_scheduler().run(
+                {self.account: self.perform_scheduled}, until_idle=until_idle, until=until, progress=progress
+            ))
+        finally:
+            self.save_actions_log()
+        
+        self.logger.info(f"Scheduled LinkedIn actions completed: {completed}")
+        return completed
+    
+    def run_due(self):
+        """Perform the scheduled actions that are due now and return without waiting for later slots"""
+        scheduler = self.get_scheduler()
+        if not scheduler.in_working_hours(datetime.now()):
+            self.logger.info("Outside working hours; queued actions will run in a later window")
+            return 0
         
-        if not action_types:
-            action_types = ['connection', 'follow_up']
+        try:
+            completed, due = asyncio.run(scheduler.run_due({self.account: self.perform_scheduled}))
+        finally:
+            self.save_actions_log()
         
-        if not limits:
-            limits = {
-                'connection': self.config['connection_limit_per_day'],
-                'follow_up': self.config['message_limit_per_day']
-            }
+        self.logger.info(f"Performed {completed} of {due} due LinkedIn actions")
+        return completed
+    
+    def run(self, industries=None, action_types=None, limits=None):
+        """Queue actions for the loaded leads and perform the ones already due
+
+        Later slots are left to a long-running driver such as --run-scheduled
+        or the campaign runner.
+        """
+        self.schedule(industries, action_types, limits)
         
-        total_actions = 0
+        total_actions = self.run_due()
         
-        for industry in industries:
-            for action_type in action_types:
-                limit = limits.get(action_type, 10)
-                actions = self.run_campaign(industry, action_type, limit)
-                total_actions += actions
+        self.logger.info(f"LinkedIn automation completed. Total actions: {total_actions}")
+        return total_actions
+    
+    def close(self):
+        """Close the action schedule and, unless it is shared, the actions journal"""
+        if self.scheduler is not None:
+            self.scheduler.close()
+            self.scheduler = None
         
-        # Save the actions log
-        self.save_actions_log()
+        if self.owns_journal:
+            self.actions_log.close()
         
-        print(f"\nLinkedIn automation completed. Total actions: {total_actions}")
-        return total_actions
+        close_logger(self.logger.name)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
 def parse_arguments():
     """Parse command line arguments"""
@@ -367,17 +490,24 @@ def parse_arguments():
                         default='/home/ubuntu/lead_generation/data/leads_database.db',
                         help='SQLite database file with leads data')
     
-    return parser.parse_args()
-
-def main():
-    """Main function to run the LinkedIn automation"""
-    print(f"Starting LinkedIn automation at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    parser.add_argument('--schedule', action='store_true',
+                        help='Queue actions in working-hours time slots instead of running them now')
     
-    # Parse arguments
-    args = parse_arguments()
+    parser.add_argument('--run-scheduled', action='store_true',
+                        help='Perform queued actions as their time slots come up')
     
-    # Initialize the automation
-    linkedin = LinkedInAutomation()
+    parser.add_argument('--account', type=str, default='default',
+                        help='LinkedIn account whose schedule to use (default: default)')
+    
+    return parser.parse_args()
+
+def run_automation(linkedin, args):
+    """Load leads and queue or perform actions as the arguments ask"""
+    # Queued actions need no leads loaded
+    if args.run_scheduled and not args.schedule:
+        linkedin.run_scheduled()
+        print(f"LinkedIn automation completed at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        return 0
     
     # Load leads
     if args.input and os.path.exists(args.input):
@@ -409,10 +539,26 @@ def main():
     }
     
     # Run the automation
-    linkedin.run(industries, actions, limits)
+    if args.schedule:
+        linkedin.schedule(industries, actions, limits)
+        if args.run_scheduled:
+            linkedin.run_scheduled()
+    else:
+        linkedin.run(industries, actions, limits)
     
     print(f"LinkedIn automation completed at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     return 0
 
+def main():
+    """Main function to run the LinkedIn automation"""
+    print(f"Starting LinkedIn automation at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    
+    # Parse arguments
+    args = parse_arguments()
+    
+    # Initialize the automation
+    with LinkedInAutomation(args.account) as linkedin:
+        return run_automation(linkedin, args)
+
 if __name__ == "__main__":
     sys.exit(main())
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Structured Logging for LinkedIn Automation
+This module provides queue-backed loggers that write JSON lines to rotating log files
+"""
+
+import os
+import json
+import queue
+import atexit
+import logging
+import logging.handlers
+from datetime import datetime
+
+class JsonFormatter(logging.Formatter):
+    """Format log records as one JSON object per line"""
+
+    def format(self, record):
+        entry = {
+            'timestamp': datetime.fromtimestamp(record.created).strftime('%Y-%m-%d %H:%M:%S'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+
+        # Structured fields passed with extra={'fields': {...}}
+        fields = getattr(record, 'fields', None)
+        if fields:
+            entry.update(fields)
+
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+# Active queue listeners keyed by logger name
+_listeners = {}
+
+def get_logger(name, log_file, max_bytes=10 * 1024 * 1024, backup_count=5, json_format=True, level=logging.INFO):
+    """Return a logger whose records are written to log_file by a background thread
+
+    Callers only enqueue records, so hot loops never block on file writes. The
+    logger does not propagate, which keeps it from writing into the output of
+    whichever process embeds it.
+    """
+    logger = logging.getLogger(name)
+
+    existing = _listeners.get(name)
+    if existing and existing['log_file'] == log_file:
+        return logger
+
+    # Replace a handler that points at a different log file
+    if existing:
+        close_logger(name)
+
+    os.makedirs(os.path.dirname(log_file), exist_ok=True)
+
+    file_handler = logging.handlers.RotatingFileHandler(
+        log_file, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8'
+    )
+    if json_format:
+        file_handler.setFormatter(JsonFormatter())
+    else:
+        file_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    listener = logging.handlers.QueueListener(log_queue, file_handler, respect_handler_level=True)
+    listener.start()
+
+    logger.addHandler(queue_handler)
+    logger.setLevel(level)
+    logger.propagate = False
+
+    _listeners[name] = {
+        'log_file': log_file,
+        'queue_handler': queue_handler,
+        'file_handler': file_handler,
+        'listener': listener
+    }
+
+    return logger
+
+def close_logger(name):
+    """Flush and close the background writer for a logger"""
+    entry = _listeners.pop(name, None)
+    if not entry:
+        return
+
+    logging.getLogger(name).removeHandler(entry['queue_handler'])
+    entry['listener'].stop()
+    entry['file_handler'].close()
+
+@atexit.register
+def shutdown_logging():
+    """Flush every queued record before the process exits"""
+    for name in list(_listeners):
+        close_logger(name)
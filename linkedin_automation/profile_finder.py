@@ -6,25 +6,47 @@ This script finds LinkedIn profiles for leads and enriches the data
 
 import os
 import sys
-import time
-import random
 import json
 import csv
 from datetime import datetime
 import argparse
 import re
 
+from logging_setup import get_logger
+from action_journal import ActionJournal
+from search_engine import SearchEngine, SearchUsage, SearchQuotaExceeded, get_search_backend, NO_PROFILE, NO_EMAIL
+from search_cache import SearchCache
+from email_patterns import EmailPatternLearner, add_source_columns
+
+# Orders contacts with neither a LinkedIn URL nor an email first, then those missing one
+UNENRICHED_FIRST = "(COALESCE(ct.linkedin_url, '') NOT IN ('', 'N/A')) + (COALESCE(ct.email, '') NOT IN ('', 'N/A'))"
+
 class LinkedInProfileFinder:
-    def __init__(self):
+    def __init__(self, search_backend=None, workers=8, use_cache=True):
         """Initialize the LinkedIn profile finder tool"""
         self.timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         self.log_file = f"/home/ubuntu/lead_generation/linkedin_automation/logs/profile_finder_{self.timestamp}.log"
         self.setup_logging()
         
+        # Searches are journaled to disk as they happen
+        self.journal_file = f"/home/ubuntu/lead_generation/linkedin_automation/logs/searches_{self.timestamp}.jsonl"
+        self.search_log = ActionJournal(self.journal_file)
+        
         # Configuration settings
         self.config = {
             'search_delay': (2, 5),  # Random delay in seconds
             'max_searches_per_day': 100,
+            # The daily search count is kept here so every run shares one quota
+            'search_usage_db': '/home/ubuntu/lead_generation/linkedin_automation/data/search_cache.db',
+            'searches_per_minute': 30,
+            'search_burst': 1,
+            'workers': workers,
+            'search_cache': {
+                'enabled': use_cache,
+                'db_file': '/home/ubuntu/lead_generation/linkedin_automation/data/search_cache.db',
+                'ttl_days': 30,
+                'negative_ttl_days': 7
+            },
             'search_patterns': {
                 'linkedin': [
                     '{first_name} {last_name} {company} linkedin',
@@ -39,51 +61,73 @@ class LinkedInProfileFinder:
             }
         }
         
+        # Repeated queries are answered from a persistent cache
+        self.search_cache = None
+        cache_config = self.config['search_cache']
+        if cache_config['enabled']:
+            self.search_cache = SearchCache(
+                cache_config['db_file'],
+                cache_config['ttl_days'],
+                cache_config['negative_ttl_days'],
+                negative_results=(NO_PROFILE, NO_EMAIL)
+            )
+        
+        # Searches run concurrently under a shared rate limit and daily quota
+        self.search_usage = SearchUsage(self.config['search_usage_db'])
+        self.search_engine = SearchEngine(
+            search_backend or get_search_backend('simulated', search_delay=self.config['search_delay']),
+            self.config['searches_per_minute'],
+            self.config['max_searches_per_day'],
+            self.config['workers'],
+            usage=self.search_usage,
+            cache=self.search_cache,
+            burst=self.config['search_burst']
+        )
+        
+        # Learned per-domain email patterns, loaded with load_email_patterns
+        self.email_patterns = None
+        
         # Initialize data storage
         self.leads = []
         self.enriched_leads = []
-        self.search_log = []
+        # Leads cut off by the daily search quota, partially enriched or not started
+        self.retry_leads = []
     
     def setup_logging(self):
         """Set up logging for the script"""
-        # Create logs directory if it doesn't exist
-        os.makedirs(os.path.dirname(self.log_file), exist_ok=True)
-        
-        # Redirect stdout and stderr to the log file
-        sys.stdout = open(self.log_file, 'w')
-        sys.stderr = open(self.log_file, 'a')
+        # Records are queued and written as JSON lines by a background thread,
+        # leaving the caller's stdout and stderr untouched
+        self.logger = get_logger('profile_finder', self.log_file)
         
-        print(f"LinkedIn profile finder logging started at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        print(f"Log file: {self.log_file}")
+        self.logger.info(f"LinkedIn profile finder logging started at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        self.logger.info(f"Log file: {self.log_file}")
     
-    def log_search(self, search_type, query, result):
-        """Log a search to the search log"""
+    def log_search(self, search_type, query, result, lead=None):
+        """Log a search to the search journal"""
         search = {
             'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
             'search_type': search_type,
             'query': query,
-            'result': result
+            'result': result,
+            'company_id': lead.get('id') if lead else None,
+            'contact_id': lead.get('contact_id') if lead else None
         }
         
         self.search_log.append(search)
-        print(f"[{search['timestamp']}] {search_type}: {query} - Result: {result}")
+        self.logger.info(f"{search_type}: {query} - Result: {result}", extra={'fields': search})
     
-    def save_search_log(self):
-        """Save the search log to a CSV file"""
-        log_file = f"/home/ubuntu/lead_generation/linkedin_automation/logs/search_log_{self.timestamp}.csv"
-        
+    def save_search_log(self, csv_file=None):
+        """Sync the search journal to disk, optionally exporting it to a CSV file"""
         try:
-            with open(log_file, 'w', newline='', encoding='utf-8') as csvfile:
-                fieldnames = ['timestamp', 'search_type', 'query', 'result']
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                
-                writer.writeheader()
-                for search in self.search_log:
-                    writer.writerow(search)
+            self.search_log.sync()
+            self.logger.info(f"Journaled {len(self.search_log)} searches to {self.journal_file}")
             
-            print(f"Saved {len(self.search_log)} searches to {log_file}")
+            if csv_file:
+                fieldnames = ['timestamp', 'search_type', 'query', 'result', 'company_id', 'contact_id']
+                self.search_log.export_csv(csv_file, fieldnames)
+                self.logger.info(f"Exported searches to {csv_file}")
         except Exception as e:
-            print(f"Error saving search log: {e}")
+            self.logger.error(f"Error saving search log: {e}")
     
     def load_leads_from_csv(self, csv_file):
         """Load leads from a CSV file"""
@@ -96,10 +140,10 @@ class LinkedInProfileFinder:
                     self.leads.append(row)
                     leads_loaded += 1
                 
-                print(f"Loaded {leads_loaded} leads from {csv_file}")
+                self.logger.info(f"Loaded {leads_loaded} leads from {csv_file}")
                 return leads_loaded
         except Exception as e:
-            print(f"Error loading leads from CSV: {e}")
+            self.logger.error(f"Error loading leads from CSV: {e}")
             return 0
     
     def load_leads_from_database(self, db_file, industry=None, limit=100):
@@ -113,7 +157,7 @@ class LinkedInProfileFinder:
             query = """
             SELECT c.id, c.company_name, c.website, c.industry, c.company_size, 
                    c.current_chatbot, c.address, c.city, c.state, c.zipcode, 
-                   c.country, ct.first_name, ct.last_name, ct.email, ct.phone,
+                   c.country, ct.id as contact_id, ct.first_name, ct.last_name, ct.email, ct.phone,
                    ct.position
             FROM companies c
             LEFT JOIN contacts ct ON c.id = ct.company_id
@@ -124,6 +168,8 @@ class LinkedInProfileFinder:
             if industry:
                 query += f" AND c.industry LIKE '%{industry}%'"
             
+            # Contacts still missing details come first, so leads cut off by the quota are retried
+            query += f" ORDER BY {UNENRICHED_FIRST}"
             query += f" LIMIT {limit}"
             
             cursor.execute(query)
@@ -135,72 +181,34 @@ class LinkedInProfileFinder:
                 leads.append(lead)
             
             self.leads.extend(leads)
-            print(f"Loaded {len(leads)} leads from database")
+            self.logger.info(f"Loaded {len(leads)} leads from database")
             
             conn.close()
+            
+            self.load_email_patterns(db_file)
             return len(leads)
         except Exception as e:
-            print(f"Error loading leads from database: {e}")
+            self.logger.error(f"Error loading leads from database: {e}")
             return 0
     
-    def simulate_search(self, query, search_type):
-        """Simulate a search for LinkedIn profiles or email addresses"""
-        # In a real implementation, this would use a search API or web scraping
-        
-        # Simulate the search delay
-        time.sleep(random.uniform(*self.config['search_delay']))
-        
-        # For simulation purposes, we'll generate random results
-        if search_type == 'linkedin':
-            # Simulate finding a LinkedIn profile URL
-            found = random.choice([True, True, False])  # 2/3 chance of finding a profile
-            
-            if found:
-                # Generate a fake LinkedIn URL
-                name_parts = query.split()
-                if len(name_parts) >= 2:
-                    first_name = name_parts[0].lower()
-                    last_name = name_parts[1].lower()
-                    variations = [
-                        f"https://www.linkedin.com/in/{first_name}-{last_name}-123456/",
-                        f"https://www.linkedin.com/in/{first_name}.{last_name}/",
-                        f"https://www.linkedin.com/in/{first_name}{last_name}/",
-                        f"https://www.linkedin.com/in/{last_name}{first_name}/"
-                    ]
-                    result = random.choice(variations)
-                else:
-                    result = "No profile found"
-            else:
-                result = "No profile found"
-        
-        elif search_type == 'email':
-            # Simulate finding an email address
-            found = random.choice([True, False, False])  # 1/3 chance of finding an email
-            
-            if found:
-                # Generate a fake email address
-                name_parts = query.split()
-                if len(name_parts) >= 2:
-                    first_name = name_parts[0].lower()
-                    last_name = name_parts[1].lower()
-                    domains = ['gmail.com', 'outlook.com', 'yahoo.com', 'company.com', 'business.com']
-                    variations = [
-                        f"{first_name}.{last_name}@{random.choice(domains)}",
-                        f"{first_name[0]}{last_name}@{random.choice(domains)}",
-                        f"{first_name}{last_name[0]}@{random.choice(domains)}",
-                        f"{first_name}@{random.choice(domains)}"
-                    ]
-                    result = random.choice(variations)
-                else:
-                    result = "No email found"
-            else:
-                result = "No email found"
-        
-        else:
-            result = "Unknown search type"
+    def load_email_patterns(self, db_file):
+        """Learn the email pattern of every company domain from the contacts in the database"""
+        try:
+            self.email_patterns = EmailPatternLearner(db_file)
+            learned = self.email_patterns.learn()
+            self.logger.info(f"Learned email patterns for {learned} domains")
+            return learned
+        except Exception as e:
+            self.logger.error(f"Error learning email patterns: {e}")
+            self.email_patterns = None
+            return 0
+    
+    def simulate_search(self, query, search_type, lead=None):
+        """Search for LinkedIn profiles or email addresses through the search engine"""
+        result = self.search_engine.search(query, search_type)
         
         # Log the search
-        self.log_search(search_type, query, result)
+        self.log_search(search_type, query, result, lead)
         
         return result
     
@@ -243,9 +251,9 @@ class LinkedInProfileFinder:
             if not query:
                 continue
             
-            result = self.simulate_search(query, 'linkedin')
+            result = self.simulate_search(query, 'linkedin', lead)
             
-            if result != "No profile found":
+            if result != NO_PROFILE:
                 return result
         
         return None
@@ -259,17 +267,31 @@ class LinkedInProfileFinder:
             if not query:
                 continue
             
-            result = self.simulate_search(query, 'email')
+            result = self.simulate_search(query, 'email', lead)
             
-            if result != "No email found":
+            if result != NO_EMAIL:
                 return result
         
         return None
     
     def enrich_lead(self, lead):
-        """Enrich a lead with LinkedIn profile and email information"""
+        """Enrich a lead with LinkedIn profile and email information
+
+        If the daily search quota runs out part way, the fields found so far are
+        kept and the lead is flagged with enrichment_incomplete.
+        """
         enriched_lead = lead.copy()
         
+        try:
+            self.find_lead_details(lead, enriched_lead)
+        except SearchQuotaExceeded as e:
+            self.logger.info(f"{e}; keeping the partial enrichment of {lead.get('company_name', 'Unknown')}")
+            enriched_lead['enrichment_incomplete'] = True
+        
+        return enriched_lead
+    
+    def find_lead_details(self, lead, enriched_lead):
+        """Search for a lead's LinkedIn profile and missing email, filling in enriched_lead"""
         # Find LinkedIn profile
         linkedin_profile = self.find_linkedin_profile(lead)
         if linkedin_profile:
@@ -277,11 +299,18 @@ class LinkedInProfileFinder:
         
         # Find email address if not already present
         if not lead.get('email') or lead.get('email') == 'N/A':
-            email = self.find_email_address(lead)
+            # A known pattern for the company's domain saves the searches
+            email = self.email_patterns.guess(lead) if self.email_patterns else None
             if email:
                 enriched_lead['email'] = email
-        
-        return enriched_lead
+                enriched_lead['email_source'] = 'pattern'
+            else:
+                email = self.find_email_address(lead)
+                if email:
+                    enriched_lead['email'] = email
+                    enriched_lead['email_source'] = 'search'
+                    if self.email_patterns:
+                        self.email_patterns.observe(lead, email)
     
     def save_enriched_leads(self, output_file=None):
         """Save the enriched leads to a CSV file"""
@@ -306,84 +335,158 @@ class LinkedInProfileFinder:
                     
                     writer.writerow(lead)
             
-            print(f"Saved {len(self.enriched_leads)} enriched leads to {output_file}")
+            self.logger.info(f"Saved {len(self.enriched_leads)} enriched leads to {output_file}")
             return output_file
         except Exception as e:
-            print(f"Error saving enriched leads: {e}")
+            self.logger.error(f"Error saving enriched leads: {e}")
             return None
     
+    def match_contact(self, cursor, lead):
+        """Find the contact id of a lead loaded without one, such as a CSV row
+
+        The company is matched by id, or by name when the lead has no id, and the
+        contact within it by its original email or by first and last name.
+        Returns None when no contact matches.
+        """
+        company_id = lead.get('id') or None
+        company_name = lead.get('company_name') or None
+        # An email found during this run is not in the database yet
+        email = lead.get('email') if not lead.get('email_source') and lead.get('email') not in (None, '', 'N/A') else None
+        
+        cursor.execute('''
+        SELECT ct.id FROM contacts ct
+        JOIN companies c ON c.id = ct.company_id
+        WHERE (c.id = ? OR (? IS NULL AND c.company_name = ?))
+        AND ((? IS NOT NULL AND ct.email = ?) OR (ct.first_name = ? AND ct.last_name = ?))
+        ORDER BY ct.email = ? DESC
+        LIMIT 1
+        ''', (company_id, company_id, company_name, email, email,
+              lead.get('first_name'), lead.get('last_name'), email))
+        row = cursor.fetchone()
+        return row[0] if row else None
+    
     def update_database(self, db_file):
-        """Update the database with enriched lead information"""
+        """Write the enriched LinkedIn URLs and emails back to the contacts table in one transaction
+
+        Leads without a contact_id are matched to a contact through match_contact;
+        leads that match none are counted and logged as a warning. Emails keep
+        their email_source, and an address guessed from a pattern only fills a
+        contact that has no email.
+        """
         try:
             import sqlite3
             
             conn = sqlite3.connect(db_file)
             cursor = conn.cursor()
             
-            updates = 0
-            
+            rows = []
+            unmatched = 0
             for lead in self.enriched_leads:
-                # Update contacts table with LinkedIn URL and email
-                if 'id' in lead and lead['id']:
-                    if 'linkedin_url' in lead and lead['linkedin_url']:
-                        cursor.execute(
-                            "UPDATE contacts SET linkedin_url = ?, updated_at = CURRENT_TIMESTAMP WHERE company_id = ?",
-                            (lead['linkedin_url'], lead['id'])
-                        )
-                    
-                    if 'email' in lead and lead['email'] and lead['email'] != 'N/A':
-                        cursor.execute(
-                            "UPDATE contacts SET email = ?, updated_at = CURRENT_TIMESTAMP WHERE company_id = ?",
-                            (lead['email'], lead['id'])
-                        )
-                    
-                    updates += 1
+                linkedin_url = lead.get('linkedin_url') or None
+                if linkedin_url == 'N/A':
+                    linkedin_url = None
+                # Only write emails found during this run
+                email = lead.get('email') if lead.get('email_source') and lead.get('email') != 'N/A' else None
+                
+                if not linkedin_url and not email:
+                    continue
+                
+                contact_id = lead.get('contact_id') or self.match_contact(cursor, lead)
+                if not contact_id:
+                    unmatched += 1
+                    continue
+                
+                rows.append({
+                    'linkedin_url': linkedin_url,
+                    'email': email,
+                    'source': lead.get('email_source') if email else None,
+                    'contact_id': contact_id
+                })
+            
+            if unmatched:
+                self.logger.warning(f"Could not match {unmatched} enriched leads to a contact in {db_file}; they were not written")
             
-            conn.commit()
+            with conn:
+                add_source_columns(conn)
+                conn.executemany('''
+                UPDATE contacts
+                SET linkedin_url = COALESCE(:linkedin_url, linkedin_url),
+                    email = CASE
+                        WHEN :email IS NULL OR (:source = 'pattern' AND COALESCE(email, '') NOT IN ('', 'N/A')) THEN email
+                        ELSE :email
+                    END,
+                    email_source = CASE
+                        WHEN :email IS NULL OR (:source = 'pattern' AND COALESCE(email, '') NOT IN ('', 'N/A')) THEN email_source
+                        ELSE :source
+                    END,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE id = :contact_id
+                ''', rows)
             conn.close()
             
-            print(f"Updated {updates} leads in the database")
-            return updates
+            self.logger.info(f"Updated {len(rows)} leads in the database")
+            return len(rows)
         except Exception as e:
-            print(f"Error updating database: {e}")
+            self.logger.error(f"Error updating database: {e}")
             return 0
     
-    def run(self, limit=None):
-        """Run the LinkedIn profile finder for all leads"""
-        print(f"\n{'='*50}\nRunning LinkedIn profile finder\n{'='*50}")
+    def run(self, limit=None, output_file=None, save_csv=False, progress=None):
+        """Run the LinkedIn profile finder for all leads
+
+        The enriched leads stay in self.enriched_leads for update_database; the
+        CSV file is only written when save_csv is set. progress, if given, is
+        called with (finished, total) after every lead and may raise to stop.
+        """
+        self.logger.info("Running LinkedIn profile finder")
         
         # Limit the number of leads to process
         leads_to_process = self.leads
         if limit and limit > 0 and len(leads_to_process) > limit:
             leads_to_process = leads_to_process[:limit]
-            print(f"Limited to {limit} leads")
+            self.logger.info(f"Limited to {limit} leads")
         
         total_processed = 0
+        finished = 0
+        self.retry_leads = []
         
-        for lead in leads_to_process:
-            try:
-                print(f"Processing lead: {lead.get('company_name', 'Unknown')} - {lead.get('first_name', '')} {lead.get('last_name', '')}")
-                
-                enriched_lead = self.enrich_lead(lead)
+        def process(lead):
+            self.logger.info(f"Processing lead: {lead.get('company_name', 'Unknown')} - {lead.get('first_name', '')} {lead.get('last_name', '')}")
+            return self.enrich_lead(lead)
+        
+        for lead, enriched_lead, error in self.search_engine.map(process, leads_to_process):
+            if isinstance(error, SearchQuotaExceeded):
+                # Leads cut off by the quota are left for the next run
+                self.logger.info(str(error))
+                self.retry_leads.append(lead)
+            elif error:
+                self.logger.error(f"Error processing lead: {error}")
+            else:
+                # Partial enrichments are kept, and the lead is searched again on a later run
                 self.enriched_leads.append(enriched_lead)
-                
                 total_processed += 1
-                
-                # Check if we've reached the daily limit
-                if total_processed >= self.config['max_searches_per_day']:
-                    print(f"Reached daily limit of {self.config['max_searches_per_day']} searches")
-                    break
-                
-            except Exception as e:
-                print(f"Error processing lead: {e}")
+                if enriched_lead.get('enrichment_incomplete'):
+                    self.retry_leads.append(lead)
+            
+            finished += 1
+            if progress:
+                progress(finished, len(leads_to_process))
+        
+        if self.search_cache:
+            self.logger.info(f"Search cache: {self.search_cache.hits} hits, {self.search_cache.misses} misses")
         
         # Save the search log
         self.save_search_log()
         
         # Save the enriched leads
-        output_file = self.save_enriched_leads()
+        if save_csv:
+            output_file = self.save_enriched_leads(output_file)
+        
+        # Leads the pool never reached because the quota ran out are retried too
+        self.retry_leads.extend(leads_to_process[finished:])
+        if self.retry_leads:
+            self.logger.info(f"{len(self.retry_leads)} leads were cut off by the search quota and will be retried")
         
-        print(f"\nLinkedIn profile finder completed. Total leads processed: {total_processed}")
+        self.logger.info(f"LinkedIn profile finder completed. Total leads processed: {total_processed}")
         return total_processed, output_file
 
 def parse_arguments():
@@ -409,6 +512,16 @@ def parse_arguments():
     parser.add_argument('--update-db', action='store_true',
                         help='Update the database with enriched lead information')
     
+    parser.add_argument('--workers', type=int, default=8,
+                        help='Number of leads to enrich concurrently (default: 8)')
+    
+    parser.add_argument('--search-backend', type=str, default='simulated',
+                        choices=['simulated', 'fake'],
+                        help='Search backend to use; "fake" returns instant results for load testing')
+    
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Always run searches instead of reusing cached results')
+    
     return parser.parse_args()
 
 def main():
@@ -419,7 +532,7 @@ def main():
     args = parse_arguments()
     
     # Initialize the profile finder
-    finder = LinkedInProfileFinder()
+    finder = LinkedInProfileFinder(get_search_backend(args.search_backend), args.workers, not args.no_cache)
     
     # Load leads
     if args.input and os.path.exists(args.input):
@@ -431,14 +544,15 @@ def main():
         return 1
     
     # Run the profile finder
-    total_processed, output_file = finder.run(args.limit)
+    total_processed, output_file = finder.run(args.limit, args.output, save_csv=True)
     
     # Update the database if requested
     if args.update_db and args.database and os.path.exists(args.database):
         finder.update_database(args.database)
     
     print(f"LinkedIn profile finder completed at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    print(f"Enriched leads saved to: {output_file}")
+    if output_file:
+        print(f"Enriched leads saved to: {output_file}")
     
     return 0
 
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Search Result Cache for LinkedIn Profile Finder
+This module keeps search results in SQLite so repeated queries skip the search backend
+"""
+
+import os
+import re
+import sys
+import time
+import sqlite3
+import argparse
+import threading
+
+DAY = 24 * 60 * 60
+
+class SearchCache:
+    """Persistent query -> result cache with one namespace per search type
+
+    Found results and "not found" results have separate TTLs, so a missing
+    profile is retried sooner than a found one is refreshed.
+    """
+
+    def __init__(self, db_file, ttl_days=30, negative_ttl_days=7, negative_results=()):
+        """Open the cache database, creating it if needed"""
+        self.db_file = db_file
+        self.ttl = ttl_days * DAY
+        self.negative_ttl = negative_ttl_days * DAY
+        self.negative_results = set(negative_results)
+
+        os.makedirs(os.path.dirname(db_file), exist_ok=True)
+        self.conn = sqlite3.connect(db_file, check_same_thread=False)
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+        with self.lock:
+            self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS search_cache (
+                namespace TEXT NOT NULL,
+                query_key TEXT NOT NULL,
+                result TEXT,
+                found INTEGER,
+                created_at REAL,
+                expires_at REAL,
+                PRIMARY KEY (namespace, query_key)
+            )
+            ''')
+            self.conn.commit()
+
+    def query_key(self, query):
+        """Normalize a query so trivially different spellings share an entry"""
+        return re.sub(r'\s+', ' ', query.strip().lower())
+
+    def get(self, namespace, query):
+        """Return the cached result for a query, or None if missing or expired"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT result FROM search_cache WHERE namespace = ? AND query_key = ? AND expires_at > ?",
+                (namespace, self.query_key(query), time.time())
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            return row[0]
+
+    def put(self, namespace, query, result):
+        """Store a search result"""
+        found = result not in self.negative_results
+        now = time.time()
+
+        with self.lock:
+            self.conn.execute('''
+            INSERT OR REPLACE INTO search_cache (namespace, query_key, result, found, created_at, expires_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ''', (namespace, self.query_key(query), result, int(found), now, now + (self.ttl if found else self.negative_ttl)))
+            self.conn.commit()
+
+    def purge_expired(self):
+        """Delete expired entries and return how many were removed"""
+        with self.lock:
+            deleted = self.conn.execute("DELETE FROM search_cache WHERE expires_at <= ?", (time.time(),)).rowcount
+            self.conn.commit()
+            return deleted
+
+    def stats(self):
+        """Return entry counts per namespace"""
+        with self.lock:
+            rows = self.conn.execute('''
+            SELECT namespace, COUNT(*), SUM(found), SUM(expires_at <= ?)
+            FROM search_cache
+            GROUP BY namespace
+            ''', (time.time(),)).fetchall()
+
+        return {
+            namespace: {'entries': total, 'found': found or 0, 'expired': expired or 0}
+            for namespace, total, found, expired in rows
+        }
+
+    def close(self):
+        """Close the cache database"""
+        with self.lock:
+            self.conn.close()
+
+def parse_arguments():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Search Result Cache Maintenance')
+
+    parser.add_argument('--db-file', type=str,
+                        default='/home/ubuntu/lead_generation/linkedin_automation/data/search_cache.db',
+                        help='Search cache database file')
+
+    parser.add_argument('--purge', action='store_true',
+                        help='Delete expired entries')
+
+    return parser.parse_args()
+
+def main():
+    """Main function to inspect or purge the search cache"""
+    args = parse_arguments()
+    cache = SearchCache(args.db_file)
+
+    if args.purge:
+        print(f"Purged {cache.purge_expired()} expired entries")
+
+    for namespace, counts in cache.stats().items():
+        print(f"{namespace}: {counts['entries']} entries, {counts['found']} found, {counts['expired']} expired")
+
+    cache.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+Search Engine for LinkedIn Profile Finder
+This module runs profile and email searches concurrently under a per-minute
+rate limit and a daily quota, using a pluggable search backend
+"""
+
+import os
+import sys
+import time
+import random
+import hashlib
+import sqlite3
+import argparse
+import threading
+from datetime import date
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+NO_PROFILE = "No profile found"
+NO_EMAIL = "No email found"
+
+class SearchQuotaExceeded(Exception):
+    """Raised when the daily search quota has been used up"""
+
+class SimulatedSearchBackend:
+    """Random search results with a realistic delay, as the finder always produced"""
+
+    def __init__(self, search_delay=(2, 5)):
+        self.search_delay = search_delay
+
+    def search(self, query, search_type):
+        """Simulate a search for LinkedIn profiles or email addresses"""
+        # In a real implementation, this would use a search API or web scraping
+
+        # Simulate the search delay
+        time.sleep(random.uniform(*self.search_delay))
+
+        name_parts = query.split()
+
+        if search_type == 'linkedin':
+            # 2/3 chance of finding a profile
+            if random.choice([True, True, False]) and len(name_parts) >= 2:
+                first_name = name_parts[0].lower()
+                last_name = name_parts[1].lower()
+                variations = [
+                    f"https://www.linkedin.com/in/{first_name}-{last_name}-123456/",
+                    f"https://www.linkedin.com/in/{first_name}.{last_name}/",
+                    f"https://www.linkedin.com/in/{first_name}{last_name}/",
+                    f"https://www.linkedin.com/in/{last_name}{first_name}/"
+                ]
+                return random.choice(variations)
+            return NO_PROFILE
+
+        if search_type == 'email':
+            # 1/3 chance of finding an email
+            if random.choice([True, False, False]) and len(name_parts) >= 2:
+                first_name = name_parts[0].lower()
+                last_name = name_parts[1].lower()
+                domains = ['gmail.com', 'outlook.com', 'yahoo.com', 'company.com', 'business.com']
+                variations = [
+                    f"{first_name}.{last_name}@{random.choice(domains)}",
+                    f"{first_name[0]}{last_name}@{random.choice(domains)}",
+                    f"{first_name}{last_name[0]}@{random.choice(domains)}",
+                    f"{first_name}@{random.choice(domains)}"
+                ]
+                return random.choice(variations)
+            return NO_EMAIL
+
+        return "Unknown search type"
+
+class FakeSearchBackend:
+    """Instant, deterministic search results for load testing"""
+
+    def __init__(self, latency=0.0, hit_rate=0.5):
+        self.latency = latency
+        self.hit_rate = hit_rate
+
+    def search(self, query, search_type):
+        """Return a result derived from a hash of the query"""
+        if self.latency:
+            time.sleep(self.latency)
+
+        digest = hashlib.sha1(f"{search_type}\0{query}".encode('utf-8')).hexdigest()
+        found = int(digest[:8], 16) / 0xFFFFFFFF < self.hit_rate
+        slug = '-'.join(query.lower().split()[:2]) or 'lead'
+
+        if search_type == 'linkedin':
+            return f"https://www.linkedin.com/in/{slug}-{digest[:6]}/" if found else NO_PROFILE
+
+        if search_type == 'email':
+            return f"{slug.replace('-', '.')}@example.com" if found else NO_EMAIL
+
+        return "Unknown search type"
+
+SEARCH_BACKENDS = {
+    'simulated': SimulatedSearchBackend,
+    'fake': FakeSearchBackend
+}
+
+def get_search_backend(name, **options):
+    """Create a search backend by name"""
+    if name not in SEARCH_BACKENDS:
+        raise ValueError(f"Unknown search backend: {name}")
+    return SEARCH_BACKENDS[name](**options)
+
+class TokenBucket:
+    """Thread-safe token bucket that spreads calls evenly over each minute"""
+
+    def __init__(self, per_minute, burst=1):
+        self.rate = per_minute / 60.0 if per_minute else 0
+        self.capacity = max(1, burst)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available"""
+        if not self.rate:
+            return
+
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+
+                wait_time = (1 - self.tokens) / self.rate
+
+            time.sleep(wait_time)
+
+class SearchUsage:
+    """Per-day search counts in SQLite, shared by every process using the file"""
+
+    def __init__(self, db_file):
+        """Open the usage database, creating it if needed"""
+        os.makedirs(os.path.dirname(db_file), exist_ok=True)
+        # Autocommit, so reserve() controls its own write transaction
+        self.conn = sqlite3.connect(db_file, check_same_thread=False, timeout=30, isolation_level=None)
+        self.lock = threading.Lock()
+
+        with self.lock:
+            self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS search_usage (
+                day TEXT PRIMARY KEY,
+                searches INTEGER NOT NULL
+            )
+            ''')
+
+    def used(self, day):
+        """Return the number of searches counted for a day"""
+        with self.lock:
+            row = self.conn.execute("SELECT searches FROM search_usage WHERE day = ?", (day.isoformat(),)).fetchone()
+            return row[0] if row else 0
+
+    def reserve(self, day, limit):
+        """Count one search for a day unless limit is reached; return the new count, or None"""
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self.conn.execute("SELECT searches FROM search_usage WHERE day = ?", (day.isoformat(),)).fetchone()
+                used = row[0] if row else 0
+                if limit and used >= limit:
+                    return None
+
+                self.conn.execute('''
+                INSERT INTO search_usage (day, searches) VALUES (?, 1)
+                ON CONFLICT (day) DO UPDATE SET searches = searches + 1
+                ''', (day.isoformat(),))
+                return used + 1
+            finally:
+                self.conn.execute("COMMIT")
+
+    def close(self):
+        """Close the usage database"""
+        with self.lock:
+            self.conn.close()
+
+class SearchEngine:
+    """Runs searches from many worker threads under shared rate and quota limits"""
+
+    def __init__(self, backend, searches_per_minute=30, max_searches_per_day=100, workers=8, usage=None, cache=None, burst=1):
+        """Initialize the search engine
+
+        usage is a SearchUsage that keeps the daily count across runs and
+        processes; without one the quota only covers this engine. burst is the
+        number of searches that may start back-to-back after an idle spell; the
+        default of 1 keeps every search on the per-minute pace.
+        """
+        self.backend = backend
+        self.cache = cache
+        self.max_searches_per_day = max_searches_per_day
+        self.workers = workers
+        self.bucket = TokenBucket(searches_per_minute, burst=burst)
+
+        self.lock = threading.Lock()
+        self.usage = usage
+        self.day = date.today()
+        self.searches_today = usage.used(self.day) if usage else 0
+
+        # Searches currently running, so concurrent identical queries wait for one result
+        self.in_flight = {}
+
+    def reserve(self):
+        """Count one search against the daily quota"""
+        with self.lock:
+            today = date.today()
+            if today != self.day:
+                self.day = today
+                self.searches_today = 0
+
+            if self.usage:
+                used = self.usage.reserve(today, self.max_searches_per_day)
+                if used is None:
+                    self.searches_today = self.max_searches_per_day
+                    raise SearchQuotaExceeded(f"Reached daily limit of {self.max_searches_per_day} searches")
+                self.searches_today = used
+                return
+
+            if self.max_searches_per_day and self.searches_today >= self.max_searches_per_day:
+                raise SearchQuotaExceeded(f"Reached daily limit of {self.max_searches_per_day} searches")
+
+            self.searches_today += 1
+
+    def quota_exhausted(self):
+        """Return True once today's search quota has been used up"""
+        with self.lock:
+            return bool(self.max_searches_per_day) and self.day == date.today() \
+                and self.searches_today >= self.max_searches_per_day
+
+    def search(self, query, search_type):
+        """Run one search, answering from the cache when possible
+
+        Cached results do not count against the rate limit or the daily quota.
+        """
+        if not self.cache:
+            self.reserve()
+            self.bucket.acquire()
+            return self.backend.search(query, search_type)
+
+        key = (search_type, self.cache.query_key(query))
+
+        while True:
+            result = self.cache.get(search_type, query)
+            if result is not None:
+                return result
+
+            with self.lock:
+                event = self.in_flight.get(key)
+                if event is None:
+                    event = self.in_flight[key] = threading.Event()
+                    break
+
+            # Another worker is running the same query; reuse its result
+            event.wait()
+
+        try:
+            self.reserve()
+            self.bucket.acquire()
+            result = self.backend.search(query, search_type)
+            self.cache.put(search_type, query, result)
+            return result
+        finally:
+            with self.lock:
+                del self.in_flight[key]
+            event.set()
+
+    def map(self, func, items):
+        """Apply func to items on the worker pool, yielding (item, result, error) as they finish
+
+        Submission stops once the daily quota is used up. At most twice the
+        number of workers items are in flight at a time.
+        """
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            pending = {}
+            items = iter(items)
+            exhausted = False
+
+            while True:
+                while not exhausted and len(pending) < self.workers * 2:
+                    item = next(items, None)
+                    if item is None:
+                        exhausted = True
+                        break
+                    pending[executor.submit(func, item)] = item
+
+                if not pending:
+                    break
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    item = pending.pop(future)
+                    error = future.exception()
+
+                    if isinstance(error, SearchQuotaExceeded) or self.quota_exhausted():
+                        exhausted = True
+
+                    yield item, None if error else future.result(), error
+
+def benchmark(count=1000, workers=32, per_minute=0):
+    """Measure enrichment throughput against the fake backend"""
+    engine = SearchEngine(FakeSearchBackend(latency=0.05), per_minute, 0, workers)
+    queries = [f"First{i} Last{i} Company {i} linkedin" for i in range(count)]
+
+    start = time.perf_counter()
+    found = sum(1 for _, result, _ in engine.map(lambda q: engine.search(q, 'linkedin'), queries) if result != NO_PROFILE)
+    elapsed = time.perf_counter() - start
+
+    print(f"Ran {count} searches with {workers} workers in {elapsed:.2f}s ({count / elapsed:,.0f} searches/sec), {found} found")
+    return elapsed
+
+def parse_arguments():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Search Engine Load Test')
+
+    parser.add_argument('--count', type=int, default=1000,
+                        help='Number of searches to run')
+
+    parser.add_argument('--workers', type=int, default=32,
+                        help='Number of worker threads')
+
+    parser.add_argument('--per-minute', type=int, default=0,
+                        help='Searches per minute budget (0 for unlimited)')
+
+    return parser.parse_args()
+
+def main():
+    """Main function to run the load test"""
+    args = parse_arguments()
+    benchmark(args.count, args.workers, args.per_minute)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -11,14 +11,23 @@ import csv
 from datetime import datetime
 import argparse
 
+# Add the shared template renderer and industry classifier to the path
+sys.path.append('/home/ubuntu/lead_generation/email_templates')
+
+from template_renderer import TemplateRenderer
+from industry_classifier import get_classifier
+
 # Create necessary directories
 os.makedirs('/home/ubuntu/lead_generation/linkedin_automation/templates', exist_ok=True)
 
 class TemplateGenerator:
-    def __init__(self):
+    def __init__(self, rules_file=None):
         """Initialize the template generator"""
         self.timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         
+        # Shared, memoized mapping from raw industry strings to template industries
+        self.classifier = get_classifier(rules_file)
+        
         # Base templates for different industries
         self.templates = {
             'connection_request': {
@@ -103,6 +112,9 @@ class TemplateGenerator:
                 ]
             }
         }
+        
+        # Templates are compiled once; the first template of each industry is used
+        self.renderer = TemplateRenderer(self.templates, randomize=False)
     
     def generate_templates(self, output_dir=None):
         """Generate and save all templates"""
@@ -146,27 +158,15 @@ class TemplateGenerator:
     
     def generate_personalized_template(self, lead, message_type, industry):
         """Generate a personalized template for a specific lead"""
-        if industry not in self.templates[message_type]:
-            industry = list(self.templates[message_type].keys())[0]  # Use the first industry as fallback
-        
-        templates = self.templates[message_type][industry]
-        template = templates[0]  # Use the first template by default
-        
-        # Format the template with lead information
-        first_name = lead.get('first_name', 'there')
-        if first_name == 'N/A':
-            first_name = 'there'
-        
-        company = lead.get('company_name', 'your company')
-        if company == 'N/A':
-            company = 'your company'
-        
-        personalized = template.format(
-            first_name=first_name,
-            company=company
-        )
+        return self.renderer.render(lead, message_type, industry)
+    
+    def render_many(self, leads, message_type, industry=None):
+        """Lazily generate personalized messages for many leads of one type
         
-        return personalized
+        industry is either a template industry or a callable mapping a lead to one;
+        by default each lead is classified from its industry.
+        """
+        return self.renderer.render_many(leads, message_type, industry or self.classifier.classify_lead)
     
     def generate_personalized_templates_for_leads(self, leads, output_file=None):
         """Generate personalized templates for a list of leads"""
@@ -182,19 +182,10 @@ class TemplateGenerator:
                 writer.writeheader()
                 
                 for lead in leads:
-                    industry = lead.get('industry', '').lower()
+                    industry = (lead.get('industry') or '').lower()
                     
                     # Map the industry to one of our template categories
-                    template_industry = 'smes'  # Default to SMEs
-                    
-                    if 'market' in industry or 'digital' in industry or 'agency' in industry:
-                        template_industry = 'digital_marketing'
-                    elif 'saas' in industry or 'software' in industry or 'tech' in industry:
-                        template_industry = 'saas_companies'
-                    elif 'enterprise' in industry or 'it' in industry or 'information technology' in industry:
-                        template_industry = 'enterprise_it'
-                    elif 'service' in industry or 'plumb' in industry or 'electric' in industry:
-                        template_industry = 'service_businesses'
+                    template_industry = self.classifier.classify_lead(lead)
                     
                     # Generate personalized templates
                     connection_request = self.generate_personalized_template(lead, 'connection_request', template_industry)
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Company name normalization for lead generation
+This script strips legal suffixes from company names with one precompiled pattern and a memo
+"""
+
+import re
+import sys
+import time
+import random
+import argparse
+from functools import lru_cache
+
+# Legal suffixes removed from the end of a name or before a comma
+SUFFIXES = [
+    ' Inc', ' LLC', ' Ltd', ' Limited', ' Corp', ' Corporation',
+    ' GmbH', ' Co', ' Company', ' LLP', ' LP', ' Group', ' Holdings',
+    ' International', ' Incorporated', ' Pty', ' AG', ' SA', ' SRL', ' BV'
+]
+
+# One alternation over every suffix, longest first, compiled once
+SUFFIX_PATTERN = re.compile(
+    '(?:' + '|'.join(re.escape(suffix) for suffix in sorted(SUFFIXES, key=len, reverse=True)) + r')\.?(?:,|$)',
+    re.IGNORECASE
+)
+WHITESPACE_PATTERN = re.compile(r'\s+')
+TRAILING_PUNCTUATION_PATTERN = re.compile(r'[,\.]+$')
+
+# Distinct names remembered by normalize_company_name
+CACHE_SIZE = 65536
+
+@lru_cache(maxsize=CACHE_SIZE)
+def normalize_company_name(name):
+    """
+    Normalize company name by removing common suffixes and standardizing format
+    """
+    if not name or name == 'N/A':
+        return name
+
+    # Stacked suffixes such as "Holdings Inc" come off one per pass
+    normalized, count = SUFFIX_PATTERN.subn('', name)
+    while count:
+        normalized, count = SUFFIX_PATTERN.subn('', normalized)
+
+    # Remove extra whitespace and punctuation
+    normalized = WHITESPACE_PATTERN.sub(' ', normalized).strip()
+    normalized = TRAILING_PUNCTUATION_PATTERN.sub('', normalized).strip()
+
+    return normalized
+
+def normalize_company_names(names):
+    """
+    Normalize a column of company names, normalizing each distinct name once
+    Returns a list in the order of the input
+    """
+    # The column's own dict replaces the memo, so names do not churn it
+    normalize = normalize_company_name.__wrapped__
+    normalized = {}
+    for name in names:
+        if name not in normalized:
+            normalized[name] = normalize(name)
+    return [normalized[name] for name in names]
+
+def legacy_normalize_company_name(name):
+    """
+    The previous implementation, which builds and applies one pattern per suffix
+    Kept as the benchmark baseline
+    """
+    if not name or name == 'N/A':
+        return name
+
+    normalized = name
+    for suffix in SUFFIXES:
+        pattern = f"{suffix}\\.?$|{suffix}\\.?,"
+        normalized = re.sub(pattern, '', normalized, flags=re.IGNORECASE)
+
+    normalized = re.sub(r'\s+', ' ', normalized).strip()
+    normalized = re.sub(r'[,\.]+$', '', normalized).strip()
+
+    return normalized
+
+def sample_names(count, distinct, seed=0):
+    """
+    Generate company names with suffixes, repeating distinct names as scraped columns do
+    """
+    rng = random.Random(seed)
+    words = ['Acme', 'Bright', 'Wave', 'Digital', 'Cloud', 'Nimbus', 'Peak', 'Data', 'Blue', 'Harbor',
+             'Summit', 'Pixel', 'Forge', 'Lumen', 'Vertex', 'Atlas', 'Orbit', 'Signal', 'Northstar', 'Spark']
+    suffixes = [''] + [suffix.strip() for suffix in SUFFIXES] + ['Inc.', 'Co., Ltd', 'Holdings Inc']
+
+    pool = []
+    for index in range(distinct):
+        name = ' '.join(rng.sample(words, rng.randint(1, 3))) + f" {index}"
+        suffix = rng.choice(suffixes)
+        pool.append(f"{name}, {suffix}" if suffix and rng.random() < 0.2 else f"{name} {suffix}".strip())
+    return [rng.choice(pool) for _ in range(count)]
+
+def benchmark(names):
+    """
+    Time the legacy, single-pattern and batch normalizers over a list of names
+    Returns the timings in seconds and the number of names whose results differ
+    """
+    results = {}
+
+    start = time.perf_counter()
+    legacy = [legacy_normalize_company_name(name) for name in names]
+    results['legacy'] = time.perf_counter() - start
+
+    normalize_company_name.cache_clear()
+    start = time.perf_counter()
+    single = [normalize_company_name(name) for name in names]
+    results['precompiled'] = time.perf_counter() - start
+
+    normalize_company_name.cache_clear()
+    start = time.perf_counter()
+    normalize_company_names(names)
+    results['batch'] = time.perf_counter() - start
+
+    results['differences'] = sum(1 for old, new in zip(legacy, single) if old != new)
+    return results
+
+def parse_arguments():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Company Name Normalization Benchmark')
+
+    parser.add_argument('--count', type=int, default=200000,
+                        help='Number of names to normalize (default: 200000)')
+
+    parser.add_argument('--distinct', type=int, default=50000,
+                        help='Number of distinct names among them (default: 50000)')
+
+    return parser.parse_args()
+
+def main():
+    """Main function to benchmark company name normalization"""
+    args = parse_arguments()
+
+    names = sample_names(args.count, args.distinct)
+    results = benchmark(names)
+
+    print(f"Normalized {len(names)} names ({args.distinct} distinct)")
+    for name in ('legacy', 'precompiled', 'batch'):
+        print(f"  {name:<12} {results[name]:.3f}s  ({len(names) / results[name]:.0f} names/sec, "
+              f"{results['legacy'] / results[name]:.1f}x)")
+    print(f"  {results['differences']} names normalized differently from the legacy implementation")
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -11,6 +11,9 @@ import time
 import random
 from urllib.parse import urlparse, urljoin
 
+# Company name normalization lives in its own module; re-exported for existing callers
+from normalization import normalize_company_name, normalize_company_names
+
 def extract_contact_info(html):
     """
     Extract contact information from HTML content
@@ -298,31 +301,6 @@ def is_valid_company_website(url):
     except:
         return False
 
-def normalize_company_name(name):
-    """
-    Normalize company name by removing common suffixes and standardizing format
-    """
-    if not name or name == 'N/A':
-        return name
-    
-    # Remove common legal suffixes
-    suffixes = [
-        ' Inc', ' LLC', ' Ltd', ' Limited', ' Corp', ' Corporation',
-        ' GmbH', ' Co', ' Company', ' LLP', ' LP', ' Group', ' Holdings',
-        ' International', ' Incorporated', ' Pty', ' AG', ' SA', ' SRL', ' BV'
-    ]
-    
-    normalized = name
-    for suffix in suffixes:
-        pattern = f"{suffix}\.?$|{suffix}\.?,"
-        normalized = re.sub(pattern, '', normalized, flags=re.IGNORECASE)
-    
-    # Remove extra whitespace and punctuation
-    normalized = re.sub(r'\s+', ' ', normalized).strip()
-    normalized = re.sub(r'[,\.]+$', '', normalized).strip()
-    
-    return normalized
-
 def extract_meta_description(html):
     """
     Extract meta description from HTML